@@ -1,23 +1,49 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+import asyncio
+import threading
+import time
 import jwt
 from jwt import PyJWTError as JWTError
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
-from .db import get_db
+from .db import AsyncSessionLocal, get_async_db
 from .models import User
+from . import schemas
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing. Pinning min/max rounds to the configured cost makes
+# hashes made at any other cost "need update", so they're rehashed on login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+# bcrypt is pure CPU; a dedicated, bounded pool keeps login bursts from
+# starving the shared threadpool that sync routes run on
+_password_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
 
 # JWT configuration
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "1440"))
 
+# Principal cache: lets most authenticated requests skip the users lookup
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "1024"))
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "300"))
+
 # Security scheme
 security = HTTPBearer()
 
@@ -27,6 +53,29 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, pwd_context.hash, password)
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify off the event loop; also returns a new hash if the stored one uses another cost."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _password_executor, pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+def token_claims(user: User) -> dict:
+    """Claims for a user's access token; ``ver`` revokes it when bumped."""
+    return {
+        "sub": user.email,
+        "uid": user.id,
+        "adm": bool(user.is_admin),
+        "act": bool(user.is_active),
+        "ver": user.token_version or 0,
+    }
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -38,42 +87,140 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str):
+def decode_token(token: str) -> Optional[dict]:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-        return email
     except JWTError:
         return None
+    if payload.get("sub") is None:
+        return None
+    return payload
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
-    credentials_exception = HTTPException(
+def verify_token(token: str):
+    payload = decode_token(token)
+    if payload is None:
+        return None
+    return payload["sub"]
+
+class Principal:
+    """The authenticated user as authorization sees it, without an ORM row."""
+
+    __slots__ = ("id", "email", "is_active", "is_admin", "token_version", "profile")
+
+    def __init__(self, user: User):
+        self.id = user.id
+        self.email = user.email
+        self.is_active = bool(user.is_active)
+        self.is_admin = bool(user.is_admin)
+        self.token_version = user.token_version or 0
+        # Public profile, served by GET /api/auth/me without touching the database
+        self.profile = schemas.User.model_validate(user, from_attributes=True)
+
+class PrincipalCache:
+    """Bounded LRU of principals by user id, each entry valid for a TTL."""
+
+    def __init__(self, maxsize: int = AUTH_CACHE_SIZE, ttl: float = AUTH_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return principal
+
+    def put(self, principal: Principal):
+        with self._lock:
+            self._entries[principal.id] = (time.monotonic() + self.ttl, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+principal_cache = PrincipalCache()
+
+def bump_token_version(user: User):
+    """Revoke the user's outstanding tokens, e.g. after an admin flag change.
+
+    Invalidate the principal cache after committing, so a concurrent request
+    can't re-cache the old version in between.
+    """
+    user.token_version = (user.token_version or 0) + 1
+
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _claims(credentials: HTTPAuthorizationCredentials) -> dict:
+    claims = decode_token(credentials.credentials)
+    # Tokens issued before versioning carry no "uid"/"ver" and can't be revoked;
+    # they are refused, and their holders sign in again
+    if claims is None or "uid" not in claims or "ver" not in claims:
+        raise _credentials_exception()
+    return claims
+
+def _check_version(claims: dict, token_version: int):
+    if claims["ver"] != (token_version or 0):
+        raise _credentials_exception()
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Principal:
+    """The caller, from the principal cache; only a miss reads the users table.
+
+    A miss uses a session of its own that is back in the pool before the
+    route runs, so a sync route never waits for a threadpool slot while
+    holding a connection.
+    """
+    claims = _claims(credentials)
+    principal = principal_cache.get(claims["uid"])
+    if principal is None:
+        async with AsyncSessionLocal() as db:
+            user = await db.get(User, claims["uid"])
+            if user is None:
+                raise _credentials_exception()
+            principal = Principal(user)
+        principal_cache.put(principal)
     
-    email = verify_token(credentials.credentials)
-    if email is None:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.email == email).first()
+    _check_version(claims, principal.token_version)
+    return principal
+
+async def get_current_active_user(principal: Principal = Depends(get_current_user)) -> Principal:
+    if not principal.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return principal
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """The caller's ORM row, for routes that modify it."""
+    claims = _claims(credentials)
+    user = await db.get(User, claims["uid"])
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    _check_version(claims, user.token_version)
     
     return user
 
-def get_current_active_user(current_user: User = Depends(get_current_user)):
+async def get_current_active_user_async(current_user: User = Depends(get_current_user_async)) -> User:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
-def get_admin_user(current_user: User = Depends(get_current_active_user)):
+def get_admin_user(current_user: Principal = Depends(get_current_active_user)) -> Principal:
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
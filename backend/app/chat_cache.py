@@ -0,0 +1,87 @@
+"""Cache of chatbot answers to standalone questions.
+
+Most chat traffic is the same handful of questions. An answer is reused
+when the normalized question, model, compiled system prompt and retrieved
+context all match, so editing club data (which recompiles the prompt or
+changes what retrieval returns) retires stale answers without any explicit
+invalidation. Only first messages are cached: once a conversation has
+history, the answer depends on it.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+from .metrics import registry
+
+CHAT_CACHE_SIZE = int(os.getenv("CHAT_CACHE_SIZE", "512"))
+CHAT_CACHE_TTL_SECONDS = float(os.getenv("CHAT_CACHE_TTL_SECONDS", "3600"))
+
+CACHE_REQUESTS = registry.counter(
+    "chatbot_response_cache_requests_total", "Chatbot response cache lookups by result.", ("result",),
+)
+
+
+def normalize_question(text: str) -> str:
+    """Fold case, punctuation and spacing: "How do I join?!" == "how do i join"."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return " ".join(re.findall(r"\w+", text))
+
+
+def cache_key(question: str, model: str, prompt_digest: str, context: Optional[str]) -> str:
+    context_digest = hashlib.sha256(context.encode()).hexdigest() if context else ""
+    parts = (normalize_question(question), model, prompt_digest, context_digest)
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+class ResponseCache:
+    """Bounded LRU of answers by cache key, each entry valid for a TTL."""
+
+    def __init__(self, maxsize: int = CHAT_CACHE_SIZE, ttl: float = CHAT_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                CACHE_REQUESTS.inc("miss")
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            CACHE_REQUESTS.inc("hit")
+            return entry[1]
+
+    def put(self, key: str, answer: str):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def bypass(self):
+        CACHE_REQUESTS.inc("bypass")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+response_cache = ResponseCache()
\ No newline at end of file
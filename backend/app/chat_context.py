@@ -0,0 +1,112 @@
+"""Conversation history for the chatbot prompt, bounded by a token budget.
+
+The newest messages are included verbatim until CHAT_HISTORY_TOKEN_BUDGET
+is spent. Older ones are folded, once, into an extractive summary stored on
+the conversation, so each turn only summarizes the messages that just aged
+out and long conversations cost no more per turn than short ones.
+"""
+import os
+import re
+from typing import List, NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import ChatMessage
+from .retrieval import tokenize
+from .tokens import count_tokens
+
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "1500"))
+CHAT_SUMMARY_TOKEN_BUDGET = int(os.getenv("CHAT_SUMMARY_TOKEN_BUDGET", "300"))
+# Upper bound on recent messages read per turn; older ones are only read once, to summarize them
+CHAT_HISTORY_MAX_MESSAGES = int(os.getenv("CHAT_HISTORY_MAX_MESSAGES", "50"))
+
+# Chat format overhead per message (role and separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+SUMMARY_SENTENCE_WORDS = 40
+
+
+class History(NamedTuple):
+    messages: List[dict]
+    # True when the newest message is the whole conversation so far
+    standalone: bool
+
+
+def _plain(text: str) -> str:
+    text = re.sub(r"<[^>]+>", " ", text)
+    text = re.sub(r"\[([^\]]*)\]\([^)]*\)", r"\1", text)
+    return re.sub(r"[*_`#]+", "", text)
+
+
+def key_sentence(text: str) -> str:
+    """The sentence carrying the most distinct content words, trimmed."""
+    sentences = [s for s in re.split(r"(?<=[.!?])\s+|\n+", _plain(text)) if s.strip()]
+    if not sentences:
+        return ""
+    best = max(sentences, key=lambda sentence: len(set(tokenize(sentence))))
+    words = best.split()
+    if len(words) > SUMMARY_SENTENCE_WORDS:
+        return " ".join(words[:SUMMARY_SENTENCE_WORDS]) + " …"
+    return " ".join(words)
+
+
+def fold_summary(summary: str, messages: List[ChatMessage], budget: int = CHAT_SUMMARY_TOKEN_BUDGET) -> str:
+    """Append one line per message to ``summary``, dropping its oldest lines past ``budget``."""
+    lines = summary.splitlines() if summary else []
+    for message in messages:
+        sentence = key_sentence(message.content)
+        if sentence:
+            lines.append(f"{'User' if message.is_user else 'Assistant'}: {sentence}")
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > budget:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def _cost(message: ChatMessage) -> int:
+    return count_tokens(message.content) + MESSAGE_OVERHEAD_TOKENS
+
+
+async def build_history(db: AsyncSession, conversation, budget: int = CHAT_HISTORY_TOKEN_BUDGET) -> History:
+    """Summary and recent messages, oldest first, ending with the user's new message.
+
+    Messages that no longer fit are folded into ``conversation.summary`` and
+    committed, so the next turn starts after them.
+    """
+    query = select(ChatMessage).where(ChatMessage.conversation_id == conversation.id)
+    if conversation.summary_upto_id is not None:
+        query = query.where(ChatMessage.id > conversation.summary_upto_id)
+    result = await db.execute(query.order_by(ChatMessage.id.desc()).limit(CHAT_HISTORY_MAX_MESSAGES))
+    newest_first = result.scalars().all()
+
+    summary_cost = count_tokens(conversation.summary) + MESSAGE_OVERHEAD_TOKENS if conversation.summary else 0
+    kept, used = [], summary_cost
+    for message in newest_first:
+        # The newest message (the user's question) is always sent
+        if kept and used + _cost(message) > budget:
+            break
+        kept.append(message)
+        used += _cost(message)
+
+    backlog = []
+    if len(newest_first) == CHAT_HISTORY_MAX_MESSAGES:
+        # A full window can hide older unsummarized messages (e.g. conversations
+        # from before summaries existed); they are folded in rather than lost
+        older = query.where(ChatMessage.id < newest_first[-1].id).order_by(ChatMessage.id)
+        backlog = list((await db.execute(older)).scalars())
+
+    aged_out = backlog + newest_first[len(kept):][::-1]
+    if aged_out:
+        summary = conversation.summary
+        # In window-sized steps, so trimming to the budget never works on a huge summary
+        for start in range(0, len(aged_out), CHAT_HISTORY_MAX_MESSAGES):
+            summary = fold_summary(summary, aged_out[start:start + CHAT_HISTORY_MAX_MESSAGES])
+        conversation.summary = summary
+        conversation.summary_upto_id = aged_out[-1].id
+        await db.commit()
+
+    messages = []
+    if conversation.summary:
+        messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{conversation.summary}"})
+    for message in reversed(kept):
+        messages.append({"role": "user" if message.is_user else "assistant", "content": message.content})
+    return History(messages, standalone=len(newest_first) == 1 and not conversation.summary)
\ No newline at end of file
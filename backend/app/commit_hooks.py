@@ -0,0 +1,56 @@
+"""Refresh in-process caches after commits that touch the rows they hold.
+
+A ``CommitHook`` collects keys from every object a flush writes and, once
+the transaction commits, passes them to its refresh callback. Sync sessions
+commit in a worker thread, so the callback runs right there and the response
+already sees the change; an AsyncSession commits on the event loop, so the
+callback is handed to the default executor instead of blocking the loop.
+"""
+import asyncio
+from itertools import chain
+from typing import Callable, Hashable, Iterable, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class CommitHook:
+    def __init__(
+        self,
+        name: str,
+        collect: Callable[[Session, object], Iterable[Hashable]],
+        refresh: Callable[[Set[Hashable]], None],
+    ):
+        self.name = name
+        self._collect = collect
+        self._refresh = refresh
+        self._session_key = f"commit_hook:{name}"
+        event.listen(Session, "after_flush", self._after_flush)
+        event.listen(Session, "after_commit", self._after_commit)
+        event.listen(Session, "after_rollback", self._after_rollback)
+
+    def _after_flush(self, session, flush_context):
+        touched = session.info.setdefault(self._session_key, set())
+        for obj in chain(session.new, session.dirty, session.deleted):
+            touched.update(self._collect(session, obj))
+
+    def _after_commit(self, session):
+        touched = session.info.pop(self._session_key, None)
+        if not touched:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._run(touched)
+        else:
+            loop.run_in_executor(None, self._run, touched)
+
+    def _after_rollback(self, session):
+        session.info.pop(self._session_key, None)
+
+    def _run(self, touched):
+        # The write is already committed; a failed refresh must not turn it into an error
+        try:
+            self._refresh(touched)
+        except Exception as e:
+            print(f"{self.name} refresh failed, keeping the previous state: {e}")
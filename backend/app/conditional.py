@@ -0,0 +1,78 @@
+"""Conditional GET support: strong ETags, Last-Modified and 304 responses."""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Awaitable, Callable, Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from the values that identify a representation."""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; they are stored as UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(_as_utc(value).replace(microsecond=0), usegmt=True)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return any(tag[2:] == etag if tag.startswith("W/") else tag == etag for tag in candidates)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since is None:
+            return False
+        return _as_utc(last_modified).replace(microsecond=0) <= _as_utc(since)
+    return False
+
+
+def _validator_headers(etag: str, last_modified: Optional[datetime]) -> dict:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def conditional_response(
+    request: Request,
+    etag: str,
+    last_modified: Optional[datetime],
+    render: Callable[[], bytes],
+) -> Response:
+    """Answer with 304 when the client's copy is current, otherwise render the body."""
+    headers = _validator_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return Response(content=render(), media_type="application/json", headers=headers)
+
+
+async def conditional_response_async(
+    request: Request,
+    etag: str,
+    last_modified: Optional[datetime],
+    render: Callable[[], Awaitable[bytes]],
+) -> Response:
+    """Like :func:`conditional_response`, for renderers that need to await the database."""
+    headers = _validator_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return Response(content=await render(), media_type="application/json", headers=headers)
@@ -1,19 +1,304 @@
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import create_engine, event, exc, MetaData
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./rocketry.db")
 
+def get_async_database_url(url: str) -> str:
+    """Map the sync DATABASE_URL onto its async driver (aiosqlite / asyncpg)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    elif backend in ("postgresql", "postgres"):
+        query = dict(parsed.query)
+        # asyncpg spells libpq's sslmode as ssl
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        parsed = parsed.set(drivername="postgresql+asyncpg", query=query)
+    return parsed.render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", get_async_database_url(DATABASE_URL))
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+IS_SQLITE = make_url(DATABASE_URL).get_backend_name() == "sqlite"
+IS_SQLITE_MEMORY = IS_SQLITE and make_url(DATABASE_URL).database in (None, "", ":memory:")
+
+# Connection pool profile. Sync routes run on anyio's threadpool (40
+# threads by default), each holding at most one connection; with fewer
+# connections than threads, requests queue for DB_POOL_TIMEOUT and fail.
+# Overflow connections are closed when returned, so only DB_POOL_SIZE stay open.
+THREADPOOL_SIZE = 40
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", str(max(0, THREADPOOL_SIZE - DB_POOL_SIZE))))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# A local SQLite file can't drop the connection under us; a network database can
+DB_POOL_PRE_PING = _env_flag("DB_POOL_PRE_PING", not IS_SQLITE)
+
+# SQLite connection profile, applied to every new connection
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # negative means KiB
+
+# Query profiling: statements slower than this are logged with their plan
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+DB_EXPLAIN_SLOW_QUERIES = _env_flag("DB_EXPLAIN_SLOW_QUERIES", True)
+
+class PoolStats:
+    """Checkout and wait-time counters for one connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def as_dict(self, pool) -> dict:
+        with self._lock:
+            stats = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+        stats.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        })
+        return stats
+
+class _TimedPoolMixin:
+    """Times how long each checkout waits for a free connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - started)
+        return connection
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+def _pool_options(poolclass) -> dict:
+    if IS_SQLITE_MEMORY:
+        # In-memory databases live in a single connection; keep the dialect's pool
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers proceed while a chat request is writing; NORMAL sync is
+    # durable across application crashes and much cheaper than FULL under WAL.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+    # Off by default in SQLite, so enforce foreign keys the way Postgres always
+    # does. Deleting a conversation (from the chat API or the retention job)
+    # relies on ON DELETE CASCADE to remove its messages. Routes that take a
+    # referenced id from the client (a project's team, a team's lead, a
+    # project update's project) look it up first and answer 404, and nothing
+    # deletes users, teams or projects; anything that still slips through
+    # fails here as it would on Postgres.
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
 engine = create_engine(
     DATABASE_URL, 
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
+    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
+    **_pool_options(TimedQueuePool)
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for handlers that run on the event loop. Objects stay usable
+# after commit so responses can be built without implicit (blocking) reloads.
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_pool_options(TimedAsyncAdaptedQueuePool))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+if IS_SQLITE:
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+
+class QueryCounter:
+    """Counts SQL statements run on either engine while active.
+
+    Used to pin the number of statements an endpoint issues, so N+1 loading
+    shows up as a count that grows with the number of rows::
+
+        with count_queries() as counter:
+            client.get("/api/teams/my-teams")
+        assert counter.count == 3
+    """
+
+    _active = []
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+    def __enter__(self):
+        with self._lock:
+            self._active.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self._active.remove(self)
+
+    @classmethod
+    def _record(cls, conn, cursor, statement, parameters, context, executemany):
+        if not cls._active:
+            return
+        with cls._lock:
+            for counter in cls._active:
+                counter.count += 1
+                counter.statements.append(statement)
+
+count_queries = QueryCounter
+
+event.listen(engine, "before_cursor_execute", QueryCounter._record)
+event.listen(async_engine.sync_engine, "before_cursor_execute", QueryCounter._record)
+
+class QueryStats:
+    """Statements and database time attributed to one unit of work (usually a request)."""
+
+    __slots__ = ("label", "count", "seconds")
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.count = 0
+        self.seconds = 0.0
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def start_query_stats(label: str = "") -> QueryStats:
+    """Attribute statements run in the current context (and threads it spawns) to a new QueryStats."""
+    stats = QueryStats(label)
+    _query_stats.set(stats)
+    return stats
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _query_stats.get()
+
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _explain(conn, statement, parameters):
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    # A separate DB-API cursor keeps the plan out of the listeners and the caller's results
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return [" ".join(str(col) for col in row) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+def _log_slow_query(conn, statement, parameters, executemany, elapsed):
+    stats = _query_stats.get()
+    where = f" in {stats.label}" if stats is not None and stats.label else ""
+    params = repr(parameters)
+    if len(params) > 500:
+        params = params[:500] + "..."
+    print(f"Slow query ({elapsed * 1000:.1f} ms){where}: {statement} | params: {params}")
+    if DB_EXPLAIN_SLOW_QUERIES and not executemany and statement.lstrip().upper().startswith("SELECT"):
+        try:
+            for line in _explain(conn, statement, parameters):
+                print(f"    plan: {line}")
+        except Exception as e:
+            print(f"    plan unavailable: {e}")
+
+def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_start")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+    if elapsed * 1000 >= DB_SLOW_QUERY_MS:
+        _log_slow_query(conn, statement, parameters, executemany, elapsed)
+
+def _discard_timer(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    conn = exception_context.connection
+    started = conn.info.get("query_start") if conn is not None else None
+    if started:
+        started.pop()
+
+for _engine in (engine, async_engine.sync_engine):
+    event.listen(_engine, "before_cursor_execute", _start_timer)
+    event.listen(_engine, "after_cursor_execute", _stop_timer)
+    event.listen(_engine, "handle_error", _discard_timer)
+
+def check_pool_size(threads: int):
+    """Warn when the sync pool can't give each of ``threads`` workers a connection."""
+    if IS_SQLITE_MEMORY:
+        return
+    connections = DB_POOL_SIZE + max(DB_MAX_OVERFLOW, 0)
+    if connections < threads:
+        print(
+            f"Warning: DB_POOL_SIZE + DB_MAX_OVERFLOW is {connections}, below the {threads} threads "
+            f"sync routes run on; requests may wait up to DB_POOL_TIMEOUT for a connection"
+        )
+
+def get_pool_stats() -> dict:
+    """Pool checkout/wait statistics for sizing workers under load."""
+    stats = {}
+    for name, pool in (("sync", engine.pool), ("async", async_engine.sync_engine.pool)):
+        if isinstance(pool, _TimedPoolMixin):
+            stats[name] = pool.stats.as_dict(pool)
+    return stats
+
 Base = declarative_base()
 
 def get_db():
@@ -21,4 +306,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
\ No newline at end of file
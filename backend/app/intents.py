@@ -0,0 +1,228 @@
+"""Local FAQ answers for the chatbot.
+
+Every intent's keywords live in one compiled pattern, so a question is
+matched in a single pass. A reply is served locally only when the winning
+intent accounts for most of the question's content words and clearly beats
+the runner-up; anything vaguer goes to the model. The same templates back
+the canned replies used when the model is unavailable. Club data that the
+site edits (the executive team) comes from the read model, so replies match
+the site.
+"""
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional
+
+from .metrics import registry
+from .read_model import read_model
+from .retrieval import STOPWORDS
+from .routers.team_info import CLUB_INFO, TEAM_MEMBERS_INFO
+
+INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.5"))
+
+INTENT_REPLIES = registry.counter(
+    "chatbot_intent_replies_total", "Chat replies answered locally from an FAQ intent.", ("intent",),
+)
+
+# Checked in order: at any position the first alternative wins, so the
+# "become a member" phrase is claimed by join before team sees "member".
+INTENTS = (
+    ("join", r"join(?:ing)?|sign(?:ing)? ?up|membership|become (?:a )?member|get(?:ting)? involved|recruit(?:ing|ment)?"),
+    ("team", r"teams?|members?|executives?|execs?|leads?|leaders?|president|captains?|departments?"),
+    ("projects", r"projects?|rockets?|competitions?|cubesats?|satellites?|launch(?:es|ing)?"),
+    ("sponsor", r"sponsors?|sponsorships?|sponsoring|partners?|partnerships?|support(?:ing)?|donat(?:e|ions?)|funding"),
+    ("welcome", r"hi|hello|hey|greetings|good (?:morning|afternoon|evening)"),
+)
+_PRIORITY = {name: position for position, (name, _) in enumerate(INTENTS)}
+_MATCHER = re.compile(
+    r"\b(?:" + "|".join(f"(?P<{name}>{pattern})" for name, pattern in INTENTS) + r")\b",
+    re.IGNORECASE,
+)
+
+# Words about the club itself say nothing about which answer is wanted
+NEUTRAL_WORDS = frozenset("club guelph uofg university rocketry please thanks thank".split())
+
+
+class IntentMatch(NamedTuple):
+    intent: str
+    confidence: float
+
+
+def match(question: str) -> Optional[IntentMatch]:
+    """The best intent for ``question``, with a 0..1 confidence."""
+    words = [
+        word for word in re.findall(r"\w+", question.lower())
+        if word not in STOPWORDS and word not in NEUTRAL_WORDS
+    ]
+    hits: Dict[str, int] = {}
+    for found in _MATCHER.finditer(question):
+        # A phrase like "sign up" covers more than one content word
+        hits[found.lastgroup] = hits.get(found.lastgroup, 0) + len(found.group().split())
+    if not hits:
+        return None
+    ranked = sorted(hits.values(), reverse=True)
+    # Ties go to the intent listed first in INTENTS
+    best = min(hits, key=lambda intent: (-hits[intent], _PRIORITY[intent]))
+    runner_up = ranked[1] if len(ranked) > 1 else 0
+    return IntentMatch(best, (ranked[0] - runner_up) / max(len(words), ranked[0]))
+
+
+def answer(question: str) -> Optional[str]:
+    """A local reply when the question is confidently an FAQ, else None."""
+    found = match(question)
+    if found is None or found.confidence < INTENT_CONFIDENCE_THRESHOLD:
+        return None
+    INTENT_REPLIES.inc(found.intent)
+    return render(found.intent)
+
+
+def fallback(question: str) -> str:
+    """The closest canned reply, however weak the match."""
+    found = match(question)
+    return render(found.intent if found is not None else "welcome")
+
+
+def _connect(heading: str = "Connect with us") -> str:
+    links = CLUB_INFO["social_links"]
+    return (
+        f"**{heading}:**\n"
+        f"📱 [Discord]({links['discord']})\n"
+        f"💼 [LinkedIn]({links['linkedin']})\n"
+        f"📸 [Instagram]({links['instagram']})"
+    )
+
+
+def _link(path: str, label: str) -> str:
+    return f"<a href='{path}' class='text-primary-600 hover:text-primary-800 transition-colors'>{label}</a>"
+
+
+def _executives():
+    """(name, role) of each executive as the site lists them."""
+    rows = [json.loads(body) for _, body in read_model.snapshot("execs").items]
+    if rows:
+        return [(row["name"], row["position"]) for row in rows]
+    # Fresh databases have no executives yet; fall back to the static roster
+    return [(member["name"], member["role"]) for member in TEAM_MEMBERS_INFO["executives"]]
+
+
+def _team() -> str:
+    executives = "\n".join(f"• **{name}**: {role}" for name, role in _executives())
+    departments = "\n".join(f"• {department}" for department in CLUB_INFO["departments"])
+    return f"""**{CLUB_INFO['name']}** 🚀
+
+**Our Executive Team:**
+{executives}
+
+**Our Departments:**
+{departments}
+
+Visit our {_link('/team', 'Team page')} to learn more!
+
+{_connect()}"""
+
+
+def _projects() -> str:
+    return f"""🚀 **{CLUB_INFO['name']} Projects:**
+
+**Current Projects:**
+🛰️ **CubeSat Development** - Working on a CubeSat that surveys land
+🚀 **Rocket Launches** - Building and launching rockets for competitions and learning
+📚 **Educational Programs** - Teaching UofG students about rocketry and CubeSat technology
+🔬 **Research & Development** - Advancing aerospace technology for students
+
+**Our Mission:** {CLUB_INFO['vision']}
+
+Check out our {_link('/projects', 'Projects page')} for more details!
+
+{_connect('Join our community')}"""
+
+
+def _join() -> str:
+    discord = CLUB_INFO["social_links"]["discord"]
+    return f"""Welcome to **{CLUB_INFO['name']}**! 🚀
+
+**Our Mission:** {CLUB_INFO['vision']}
+
+**How to Join:**
+• Visit our {_link('/join', 'Join Us page')}
+• Join our Discord community: [{discord}]({discord})
+• No prior experience required - all UofG students welcome!
+
+**Our Departments:**
+🖥️ **Software** - Flight computers, data analysis, mission control
+⚡ **Avionics** - Navigation, telemetry, electronic systems
+🚀 **Rocketry** - Rocket design, propulsion, recovery systems
+💰 **Finance** - Budget management and funding
+
+**What You'll Get:**
+• Hands-on rocketry and CubeSat experience
+• Competition opportunities
+• Real aerospace engineering projects
+• Community of passionate students
+
+{_connect()}"""
+
+
+def _sponsor() -> str:
+    return f"""Thank you for your interest in supporting the {CLUB_INFO['name']}! 🤝
+
+**Sponsorship Opportunities:**
+• Equipment and materials support
+• Competition funding
+• Educational workshops and mentorship
+• Industry partnership programs
+
+**Benefits for Sponsors:**
+• Brand visibility at competitions and events
+• Access to talented engineering students
+• Community engagement opportunities
+• Supporting the next generation of aerospace engineers
+
+Learn more about our sponsorship packages on the {_link('/sponsors', 'Sponsors page')}.
+
+For partnership inquiries, please contact our team through our website!"""
+
+
+def _welcome() -> str:
+    return f"""Hi! Welcome to **{CLUB_INFO['name']}**! 🚀
+
+**Our Mission:** {CLUB_INFO['vision']}
+
+**What We Do:**
+🛰️ CubeSat development and land surveying
+🚀 Rocket launches and competitions
+📚 Educational rocketry programs for UofG students
+🔬 Hands-on aerospace learning experiences
+
+**Our Departments:**
+• {' • '.join(CLUB_INFO['departments'])}
+
+**Get Involved:**
+• {_link('/team', 'Meet our Team')}
+• {_link('/projects', 'View Projects')}
+• {_link('/join', 'Join Us')}
+• {_link('/sponsors', 'Become a Sponsor')}
+
+{_connect()}
+
+Ask me anything about our club, projects, or how to get involved!"""
+
+
+_TEMPLATES = {
+    "team": _team,
+    "projects": _projects,
+    "join": _join,
+    "sponsor": _sponsor,
+    "welcome": _welcome,
+}
+
+
+def render(intent: str) -> str:
+    # Re-rendered whenever the executives snapshot changes
+    return _render(intent, read_model.snapshot("execs").version)
+
+
+@lru_cache(maxsize=64)
+def _render(intent: str, execs_version: int) -> str:
+    return _TEMPLATES[intent]()
\ No newline at end of file
@@ -0,0 +1,275 @@
+"""Gateway for every OpenAI chat completion the app makes.
+
+At most LLM_MAX_CONCURRENCY calls are in flight at once; further callers
+queue (up to LLM_MAX_QUEUE of them, after which ``Overloaded`` is raised
+so the caller can fall back immediately). Identical non-streaming requests
+that arrive while one is in flight share its result instead of each
+making a call.
+
+Every call must finish (streams: produce each chunk) within
+LLM_DEADLINE_SECONDS, queueing included. A circuit breaker opens after
+LLM_BREAKER_FAILURES consecutive errors or timeouts; while it is open calls
+fail at once with ``CircuitOpen``, and after LLM_BREAKER_RESET_SECONDS a
+single probe call decides whether it closes again.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+
+from openai import AsyncOpenAI, BadRequestError
+
+from .metrics import registry
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "100"))
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "15"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+OPENAI_LATENCY = registry.histogram(
+    "chatbot_openai_request_duration_seconds",
+    "Time spent waiting on OpenAI chat completions (streams are timed to the last chunk).",
+    ("mode", "outcome"),
+    buckets=(0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0),
+)
+QUEUE_WAIT = registry.histogram(
+    "llm_queue_wait_seconds", "Time calls waited for a free LLM concurrency slot.", ("mode",),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+IN_FLIGHT = registry.gauge("llm_in_flight_requests", "OpenAI calls currently in flight.")
+QUEUED = registry.gauge("llm_queued_requests", "Calls waiting for an LLM concurrency slot.")
+COALESCED = registry.counter(
+    "llm_coalesced_requests_total", "Completions served by joining an identical in-flight call.",
+)
+REJECTED = registry.counter("llm_rejected_requests_total", "Calls refused because the LLM queue was full.")
+BREAKER_STATE = registry.gauge(
+    "llm_circuit_breaker_state", "OpenAI circuit breaker state: 0 closed, 1 half-open, 2 open.",
+)
+BREAKER_TRIPS = registry.counter("llm_circuit_breaker_trips_total", "Times the OpenAI circuit breaker opened.")
+SHORT_CIRCUITED = registry.counter(
+    "llm_short_circuited_requests_total", "Calls refused without trying OpenAI because the breaker was open.",
+)
+
+
+class Unavailable(Exception):
+    """No completion right now; ``reason`` says why."""
+    reason = "unavailable"
+
+
+class Overloaded(Unavailable):
+    """The LLM queue is full."""
+    reason = "overloaded"
+
+
+class CircuitOpen(Unavailable):
+    """Recent calls failed, so OpenAI is not being tried."""
+    reason = "circuit_open"
+
+
+class DeadlineExceeded(Unavailable):
+    """The call did not finish within the deadline."""
+    reason = "timeout"
+
+
+class CircuitBreaker:
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES, reset_seconds: float = LLM_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead; in half-open state only one probe at a time."""
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_seconds:
+                return False
+            self._set_state(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                return False
+            self._probing = True
+        return True
+
+    def record_success(self):
+        self._probing = False
+        self.failures = 0
+        self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        self._probing = False
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                BREAKER_TRIPS.inc()
+            self._opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+    def release(self):
+        """The call ended without a verdict (e.g. the client went away)."""
+        self._probing = False
+
+    def _set_state(self, state: int):
+        self.state = state
+        BREAKER_STATE.set(value=state)
+
+
+def _counts_against_breaker(error: Exception) -> bool:
+    # A request OpenAI rejects as malformed says nothing about its health
+    return not isinstance(error, BadRequestError)
+
+
+def _fingerprint(options: dict) -> str:
+    return hashlib.sha256(json.dumps(options, sort_keys=True).encode()).hexdigest()
+
+
+class LLMGateway:
+    def __init__(
+        self, client, max_concurrency: int = LLM_MAX_CONCURRENCY, max_queue: int = LLM_MAX_QUEUE,
+        deadline: float = LLM_DEADLINE_SECONDS, breaker: CircuitBreaker = None,
+    ):
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.deadline = deadline
+        self.breaker = breaker or CircuitBreaker()
+        self._loop = None
+        self._semaphore = None
+        self._waiting = 0
+        self._inflight = {}
+
+    def _bind(self):
+        # asyncio primitives belong to one event loop; tests and workers may start several
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._waiting = 0
+            self._inflight = {}
+
+    @asynccontextmanager
+    async def _slot(self, mode: str):
+        self._bind()
+        if self._semaphore.locked() and self._waiting >= self.max_queue:
+            REJECTED.inc()
+            raise Overloaded(f"{self._waiting} LLM calls already queued")
+        self._waiting += 1
+        QUEUED.inc()
+        start = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+            QUEUED.dec()
+        QUEUE_WAIT.observe(time.perf_counter() - start, mode)
+        IN_FLIGHT.inc()
+        try:
+            yield
+        finally:
+            IN_FLIGHT.dec()
+            self._semaphore.release()
+
+    def _admit(self):
+        if not self.breaker.allow():
+            SHORT_CIRCUITED.inc()
+            raise CircuitOpen("OpenAI circuit breaker is open")
+
+    def _record(self, error: Exception = None):
+        if error is None:
+            self.breaker.record_success()
+        elif _counts_against_breaker(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.release()
+
+    async def _call(self, options: dict):
+        async with self._slot("complete"):
+            start = time.perf_counter()
+            try:
+                # Bounded here too, so a slow upstream can't hold the slot after callers give up
+                response = await asyncio.wait_for(self.client.chat.completions.create(**options), self.deadline)
+            except asyncio.TimeoutError:
+                OPENAI_LATENCY.observe(time.perf_counter() - start, "complete", "timeout")
+                raise DeadlineExceeded(f"no completion within {self.deadline:g}s")
+            except Exception:
+                OPENAI_LATENCY.observe(time.perf_counter() - start, "complete", "error")
+                raise
+            OPENAI_LATENCY.observe(time.perf_counter() - start, "complete", "ok")
+            return response
+
+    async def complete(self, **options):
+        """A chat completion response, shared with identical in-flight requests."""
+        self._bind()
+        key = _fingerprint(options)
+        call = self._inflight.get(key)
+        if call is None:
+            self._admit()
+            call = asyncio.ensure_future(self._call(options))
+            self._inflight[key] = call
+            call.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            COALESCED.inc()
+        # One caller giving up must not cancel the call for the others
+        try:
+            return await asyncio.wait_for(asyncio.shield(call), self.deadline)
+        except asyncio.TimeoutError:
+            # Still queued; the call itself reports its outcome to the breaker
+            raise DeadlineExceeded(f"no completion within {self.deadline:g}s")
+
+    def _finished(self, key: str, call):
+        if self._inflight.get(key) is call:
+            del self._inflight[key]
+        if call.cancelled():
+            self.breaker.release()
+        elif isinstance(call.exception(), Overloaded):
+            self.breaker.release()
+        else:
+            self._record(call.exception())
+
+    async def stream(self, **options):
+        """Yield completion chunks; the slot is held until the stream ends.
+
+        The deadline applies to the wait for each chunk, so long answers
+        that keep arriving are never cut off.
+        """
+        self._admit()
+        error = None
+        done = False
+        try:
+            async with self._slot("stream"):
+                start = time.perf_counter()
+                try:
+                    response = await asyncio.wait_for(
+                        self.client.chat.completions.create(stream=True, **options), self.deadline
+                    )
+                    chunks = response.__aiter__()
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), self.deadline)
+                        except StopAsyncIteration:
+                            break
+                        yield chunk
+                except asyncio.TimeoutError:
+                    OPENAI_LATENCY.observe(time.perf_counter() - start, "stream", "timeout")
+                    error = DeadlineExceeded(f"no stream chunk within {self.deadline:g}s")
+                    raise error
+                except Exception as e:
+                    OPENAI_LATENCY.observe(time.perf_counter() - start, "stream", "error")
+                    error = e
+                    raise
+                OPENAI_LATENCY.observe(time.perf_counter() - start, "stream", "ok")
+                done = True
+        finally:
+            if done or error is not None:
+                self._record(error)
+            else:
+                self.breaker.release()
+
+
+gateway = LLMGateway(AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY")))
\ No newline at end of file
@@ -0,0 +1,242 @@
+"""Persistent email outbox.
+
+Notification emails are written to ``email_outbox`` in the same transaction
+as the row they announce, so a crash or restart can't lose them. A background
+worker drains the outbox over a single reused, authenticated SMTP session,
+folds bursts of the same kind into one digest email and retries failures with
+exponential backoff.
+"""
+import asyncio
+import os
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from itertools import groupby
+
+from .db import SessionLocal
+from .metrics import registry
+from .models import EmailOutbox
+
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "30"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+# This many due emails of one kind are sent as a single digest
+OUTBOX_DIGEST_THRESHOLD = int(os.getenv("OUTBOX_DIGEST_THRESHOLD", "3"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", "60"))
+# A claimed row is retried by any worker if it isn't settled within the lease
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+SMTP_IDLE_SECONDS = float(os.getenv("SMTP_IDLE_SECONDS", "60"))
+
+SMTP_SEND_DURATION = registry.histogram(
+    "smtp_send_duration_seconds", "Time to hand one email (or digest) to the SMTP server.", ("outcome",),
+)
+EMAILS_SENT = registry.counter(
+    "email_outbox_sent_total", "Outbox emails delivered, by kind.", ("kind",),
+)
+
+DIGEST_LABELS = {
+    "contact": "contact form submissions",
+    "sponsor_inquiry": "sponsor inquiries",
+}
+
+
+def enqueue_email(db, kind: str, subject: str, body: str) -> EmailOutbox:
+    """Queue a notification; it is sent once the caller's transaction commits."""
+    email = EmailOutbox(
+        kind=kind,
+        subject=subject,
+        body=body,
+        status="pending",
+        attempts=0,
+        next_attempt_at=datetime.now(timezone.utc),
+    )
+    db.add(email)
+    return email
+
+
+def _smtp_settings():
+    return {
+        "server": os.getenv("SMTP_SERVER"),
+        "port": int(os.getenv("SMTP_PORT", 587)),
+        "username": os.getenv("SMTP_USERNAME"),
+        "password": os.getenv("SMTP_PASSWORD"),
+        "sender": os.getenv("SMTP_USERNAME") or os.getenv("CONTACT_EMAIL_FROM"),
+        "recipient": os.getenv("CONTACT_EMAIL_TO"),
+        "starttls": os.getenv("SMTP_STARTTLS", "true").lower() in ("1", "true", "yes", "on"),
+    }
+
+
+class SmtpSession:
+    """One authenticated SMTP connection, reused across sends until it idles out."""
+
+    def __init__(self, settings: dict):
+        self.settings = settings
+        self._server = None
+        self._last_used = 0.0
+
+    def _connect(self):
+        server = smtplib.SMTP(self.settings["server"], self.settings["port"], timeout=30)
+        if self.settings["starttls"]:
+            server.starttls()
+        if self.settings["username"] and self.settings["password"]:
+            server.login(self.settings["username"], self.settings["password"])
+        return server
+
+    def send(self, msg):
+        if self._server is not None and time.monotonic() - self._last_used > SMTP_IDLE_SECONDS:
+            self.close()
+        if self._server is None:
+            self._server = self._connect()
+        try:
+            self._server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped our idle connection; reconnect once and retry
+            self._server = self._connect()
+            self._server.send_message(msg)
+        self._last_used = time.monotonic()
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except smtplib.SMTPException:
+                pass
+            except OSError:
+                pass
+            self._server = None
+
+
+def _digest(kind: str, emails):
+    label = DIGEST_LABELS.get(kind, kind)
+    subject = f"{len(emails)} new {label}"
+    separator = "\n" + "-" * 60 + "\n"
+    body = separator.join(f"{email.subject}\n{email.body}" for email in emails)
+    return subject, body
+
+
+class OutboxWorker:
+    def __init__(self, session_factory=SessionLocal):
+        self._session_factory = session_factory
+        self._smtp = None
+        self._wake = None
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def wake(self):
+        """Ask the worker to drain now instead of at the next poll (thread-safe)."""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _claim(self, db, now):
+        """Lease due rows so concurrent workers (e.g. other uvicorn processes) skip them."""
+        due = db.query(EmailOutbox).filter(
+            EmailOutbox.status == "pending",
+            EmailOutbox.next_attempt_at <= now
+        ).order_by(EmailOutbox.next_attempt_at, EmailOutbox.id).limit(OUTBOX_BATCH_SIZE).all()
+
+        lease_until = now + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+        claimed = []
+        for email in due:
+            updated = db.query(EmailOutbox).filter(
+                EmailOutbox.id == email.id,
+                EmailOutbox.status == "pending",
+                EmailOutbox.next_attempt_at == email.next_attempt_at
+            ).update({EmailOutbox.next_attempt_at: lease_until}, synchronize_session=False)
+            if updated:
+                claimed.append(email)
+        db.commit()
+        return claimed
+
+    def _message(self, settings, subject: str, body: str):
+        msg = MIMEMultipart()
+        msg['From'] = settings["sender"]
+        msg['To'] = settings["recipient"]
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain'))
+        return msg
+
+    def drain_once(self) -> int:
+        """Send everything that is due; returns the number of emails delivered."""
+        settings = _smtp_settings()
+        if not all([settings["server"], settings["sender"], settings["recipient"]]):
+            # Not configured (e.g. local development); emails stay queued
+            return 0
+
+        with self._lock:
+            if self._smtp is None or self._smtp.settings != settings:
+                if self._smtp is not None:
+                    self._smtp.close()
+                self._smtp = SmtpSession(settings)
+
+            db = self._session_factory()
+            delivered = 0
+            try:
+                emails = self._claim(db, datetime.now(timezone.utc))
+                emails.sort(key=lambda email: (email.kind, email.id))
+                for kind, group in groupby(emails, key=lambda email: email.kind):
+                    group = list(group)
+                    if len(group) >= OUTBOX_DIGEST_THRESHOLD:
+                        batches = [(group, *_digest(kind, group))]
+                    else:
+                        batches = [([email], email.subject, email.body) for email in group]
+
+                    for batch, subject, body in batches:
+                        start = time.perf_counter()
+                        try:
+                            self._smtp.send(self._message(settings, subject, body))
+                        except Exception as e:
+                            SMTP_SEND_DURATION.observe(time.perf_counter() - start, "error")
+                            print(f"Failed to send email: {e}")
+                            self._smtp.close()
+                            self._schedule_retry(batch, str(e))
+                        else:
+                            SMTP_SEND_DURATION.observe(time.perf_counter() - start, "ok")
+                            EMAILS_SENT.inc(kind, amount=len(batch))
+                            sent_at = datetime.now(timezone.utc)
+                            for email in batch:
+                                email.status = "sent"
+                                email.sent_at = sent_at
+                            delivered += len(batch)
+                        # Settle each send immediately so a crash can't resend it
+                        db.commit()
+            finally:
+                db.close()
+            return delivered
+
+    def _schedule_retry(self, emails, error: str):
+        now = datetime.now(timezone.utc)
+        for email in emails:
+            email.attempts = (email.attempts or 0) + 1
+            email.last_error = error
+            if email.attempts >= OUTBOX_MAX_ATTEMPTS:
+                email.status = "failed"
+            else:
+                delay = OUTBOX_BACKOFF_SECONDS * 2 ** (email.attempts - 1)
+                email.next_attempt_at = now + timedelta(seconds=delay)
+
+    async def run(self):
+        """Drain the outbox until cancelled; runs for the lifetime of the app."""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        try:
+            while True:
+                self._wake.clear()
+                try:
+                    await self._loop.run_in_executor(None, self.drain_once)
+                except Exception as e:
+                    print(f"Email outbox drain failed: {e}")
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=OUTBOX_POLL_SECONDS)
+                    # Let a burst of submissions accumulate into one digest
+                    await asyncio.sleep(1)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if self._smtp is not None:
+                self._smtp.close()
+
+
+outbox = OutboxWorker()
\ No newline at end of file
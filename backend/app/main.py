@@ -1,19 +1,54 @@
-from fastapi import FastAPI
+import asyncio
+import anyio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import (
     projects, news, contact, execs, sponsors, sponsor_inquiries, 
-    discord, auth, teams, project_updates, chatbot
+    discord, auth, teams, project_updates, chatbot, search
 )
-from app.db import engine, Base
+from app.db import engine, async_engine, check_pool_size, get_pool_stats
+from app.migrations import migrate
+from app.read_model import read_model
+from app.retrieval import retriever
+from app import search as search_index
+from app.mailer import outbox
+from app.retention import retention
+from app.pagination import NEXT_CURSOR_HEADER
+from app.metrics import MetricsMiddleware, QueryProfilerMiddleware, registry, CONTENT_TYPE
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+DEBUG = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes", "on")
 
-app = FastAPI(title="University of Guelph Rocketry Club API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    check_pool_size(anyio.to_thread.current_default_thread_limiter().total_tokens)
+    # Bring the schema up to date before anything reads it
+    migrate(engine)
+    # Search answers 503 unless migration 10 built its indexes
+    search_index.install(engine)
+    # Warm the in-memory snapshots so public reads never hit the database
+    read_model.load()
+    # Index recent news and project activity for the chatbot
+    retriever.load()
+    # Deliver queued notification emails, including any left over from a restart
+    outbox_task = asyncio.create_task(outbox.run())
+    # Move idle chat conversations into compressed archives
+    retention_task = asyncio.create_task(retention.run())
+    yield
+    for task in (outbox_task, retention_task):
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    # Pooled aiosqlite connections each own a worker thread; close them cleanly
+    await async_engine.dispose()
+
+app = FastAPI(title="University of Guelph Rocketry Club API", lifespan=lifespan)
 
 # Configure CORS - Allow all origins for development
 app.add_middleware(
@@ -22,7 +57,10 @@ app.add_middleware(
     allow_credentials=False,  # Set to False when using allow_origins=["*"]
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "X-DB-Query-Count", "X-DB-Time"],
 )
+app.add_middleware(QueryProfilerMiddleware, expose_headers=DEBUG)
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
@@ -36,7 +74,16 @@ app.include_router(discord.router, prefix="/api/discord", tags=["discord"])
 app.include_router(teams.router, prefix="/api/teams", tags=["teams"])
 app.include_router(project_updates.router, prefix="/api/project-updates", tags=["project-updates"])
 app.include_router(chatbot.router, prefix="/api/chatbot", tags=["chatbot"])
+app.include_router(search.router, prefix="/api/search", tags=["search"])
 
 @app.get("/")
 def read_root():
-    return {"message": "University of Guelph Rocketry Club API"}
\ No newline at end of file
+    return {"message": "University of Guelph Rocketry Club API"}
+
+@app.get("/health/db")
+def database_health():
+    return {"pools": get_pool_stats()}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
\ No newline at end of file
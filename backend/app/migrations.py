@@ -0,0 +1,654 @@
+"""Versioned schema migrations, applied at startup.
+
+Each migration runs once, in order, and is recorded in ``schema_migrations``.
+Migrations spell out their own DDL instead of reading the current models, so
+replaying them from version 1 always builds the same schema. Steps are
+additive and online where the database allows it (CREATE TABLE / ADD COLUMN
+/ CREATE INDEX IF NOT EXISTS) and skip work that is already done, so
+databases created before versioning are upgraded in place. A migration that
+adds indexes also lists the queries they exist for; after it runs, each
+query's plan is checked for full table scans.
+
+Run by the app on startup, or by hand::
+
+    python -m app.migrations            # apply pending migrations
+    python -m app.migrations status
+    python -m app.migrations check      # re-run every query plan check; exits 1 on a table scan
+"""
+import re
+import sys
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import (
+    Boolean, Column, DateTime, ForeignKey, Integer, LargeBinary, MetaData, String, Table, Text, func, inspect, select,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateTable
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String),
+    Column("applied_at", DateTime(timezone=True)),
+)
+
+# Any constant works; it just has to be the same in every worker
+_POSTGRES_LOCK_ID = 0x5C4E3A
+
+
+class PlanCheck(NamedTuple):
+    """A query (as the routers run it) that must not scan ``table``."""
+    description: str
+    table: str
+    sql: str
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    upgrade: Callable
+    checks: Tuple[PlanCheck, ...] = ()
+
+
+# The schema as it stood before versioning, frozen. Never edit these tables:
+# later changes belong in new migrations.
+_BASELINE = MetaData()
+
+Table(
+    "users", _BASELINE,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, unique=True, index=True),
+    Column("username", String, unique=True, index=True),
+    Column("full_name", String),
+    Column("hashed_password", String),
+    Column("is_active", Boolean),
+    Column("is_admin", Boolean),
+    Column("student_id", String),
+    Column("program", String),
+    Column("year", String),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+Table(
+    "teams", _BASELINE,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, index=True),
+    Column("description", Text),
+    Column("team_lead_id", Integer, ForeignKey("users.id")),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+Table(
+    "user_teams", _BASELINE,
+    Column("user_id", Integer, ForeignKey("users.id")),
+    Column("team_id", Integer, ForeignKey("teams.id")),
+)
+Table(
+    "projects", _BASELINE,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("title", String, index=True),
+    Column("description", Text),
+    Column("image_url", String),
+    Column("status", String),
+    Column("team_id", Integer, ForeignKey("teams.id")),
+    Column("progress_percentage", Integer),
+    Column("priority", String),
+    Column("due_date", DateTime(timezone=True)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+Table(
+    "news", _BASELINE,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("title", String, index=True),
+    Column("content", Text),
+    Column("image_url", String),
+    Column("published_at", DateTime(timezone=True), server_default=func.now()),
+)
+Table(
+    "executives", _BASELINE,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, index=True),
+    Column("position", String),
+    Column("bio", Text),
+    Column("image_url", String),
+    Column("email", String),
+)
+Table(
+    "sponsors", _BASELINE,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, index=True),
+    Column("logo_url", String),
+    Column("website_url", String),
+    Column("tier", String),
+)
+Table(
+    "sponsor_inquiries", _BASELINE,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("company_name", String, index=True),
+    Column("contact_name", String),
+    Column("email", String),
+    Column("phone", String),
+    Column("message", Text),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("status", String),
+)
+Table(
+    "contact_messages", _BASELINE,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String),
+    Column("email", String),
+    Column("subject", String),
+    Column("message", Text),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("status", String),
+)
+Table(
+    "project_updates", _BASELINE,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("project_id", Integer, ForeignKey("projects.id")),
+    Column("team_id", Integer, ForeignKey("teams.id")),
+    Column("author_id", Integer, ForeignKey("users.id")),
+    Column("title", String),
+    Column("content", Text),
+    Column("update_type", String),
+    Column("progress_change", Integer),
+    Column("images", Text),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+Table(
+    "conversations", _BASELINE,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("title", String),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+Table(
+    "chat_messages", _BASELINE,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("conversation_id", Integer, ForeignKey("conversations.id")),
+    Column("content", Text),
+    Column("is_user", Boolean),
+    Column("timestamp", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+def _baseline(bind):
+    _BASELINE.create_all(bind=bind)
+
+
+def _create_indexes(*indexes: Tuple[str, ...]) -> Callable:
+    """Create indexes given as ``(name, table, column, ...)``."""
+    def upgrade(bind):
+        with bind.begin() as conn:
+            for name, table, *columns in indexes:
+                conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+    return upgrade
+
+
+def _add_columns(table: str, *columns: Tuple[str, str]) -> Callable:
+    """Add columns given as ``(name, type and constraints)`` unless they exist."""
+    def upgrade(bind):
+        existing = {column["name"] for column in inspect(bind).get_columns(table)}
+        with bind.begin() as conn:
+            for name, spec in columns:
+                if name not in existing:
+                    conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {name} {spec}")
+    return upgrade
+
+
+def _create_tables(*tables: Table) -> Callable:
+    def upgrade(bind):
+        with bind.begin() as conn:
+            for table in tables:
+                table.create(conn, checkfirst=True)
+    return upgrade
+
+
+def _rebuild_sqlite_table(bind, table: Table, sources: Optional[Dict[str, str]] = None):
+    # SQLite can't alter a constraint or key: copy the rows into a table
+    # created from ``table``, then swap it in and recreate the old table's
+    # indexes and triggers (https://sqlite.org/lang_altertable.html). ``sources`` maps new
+    # columns to the old ones they are copied from; by default every column
+    # is copied from its namesake.
+    temporary = f"{table.name}__rebuild"
+    create = str(CreateTable(table).compile(dialect=bind.dialect)).strip()
+    create = create.replace(f"CREATE TABLE {table.name} ", f"CREATE TABLE {temporary} ", 1)
+    if sources is None:
+        sources = {column.name: column.name for column in table.columns}
+    columns = ", ".join(sources)
+    selected = ", ".join(sources.values())
+    raw = bind.raw_connection()
+    try:
+        cursor = raw.cursor()
+        foreign_keys = cursor.execute("PRAGMA foreign_keys").fetchone()[0]
+        cursor.execute("PRAGMA foreign_keys=OFF")
+        cursor.execute("BEGIN")
+        try:
+            schema = [
+                row[0] for row in cursor.execute(
+                    "SELECT sql FROM sqlite_master "
+                    "WHERE type IN ('index', 'trigger') AND tbl_name = ? AND sql IS NOT NULL",
+                    (table.name,),
+                )
+            ]
+            cursor.execute(create)
+            cursor.execute(f"INSERT INTO {temporary} ({columns}) SELECT {selected} FROM {table.name}")
+            cursor.execute(f"DROP TABLE {table.name}")
+            cursor.execute(f"ALTER TABLE {temporary} RENAME TO {table.name}")
+            for statement in schema:
+                cursor.execute(statement)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        finally:
+            cursor.execute(f"PRAGMA foreign_keys={foreign_keys}")
+    finally:
+        raw.close()
+
+
+def _normalize_paged_timestamps(bind):
+    # Rows written by CURRENT_TIMESTAMP lack the fraction that Python-written
+    # rows carry; give them one so the text sorts in time order (see models.paged_timestamp)
+    if bind.dialect.name != "sqlite":
+        return
+    with bind.begin() as conn:
+        for table, column in (
+            ("news", "published_at"),
+            ("sponsor_inquiries", "created_at"),
+            ("contact_messages", "created_at"),
+            ("project_updates", "created_at"),
+        ):
+            conn.exec_driver_sql(f"UPDATE {table} SET {column} = {column} || '.000000' WHERE length({column}) = 19")
+
+
+# Tables added after the baseline, frozen as they were added
+_LATER = MetaData()
+# Only here so the foreign keys below resolve; never created
+Table("conversations", _LATER, Column("id", Integer, primary_key=True))
+
+_email_outbox = Table(
+    "email_outbox", _LATER,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("kind", String),
+    Column("subject", String),
+    Column("body", Text),
+    Column("status", String),
+    Column("attempts", Integer),
+    Column("next_attempt_at", DateTime(timezone=True), server_default=func.now()),
+    Column("last_error", Text),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("sent_at", DateTime(timezone=True)),
+)
+_chat_messages_cascade = Table(
+    "chat_messages", _LATER,
+    Column("id", Integer, primary_key=True),
+    Column("conversation_id", Integer, ForeignKey("conversations.id", ondelete="CASCADE")),
+    Column("content", Text),
+    Column("is_user", Boolean),
+    Column("timestamp", DateTime(timezone=True), server_default=func.now()),
+)
+_conversation_archives = Table(
+    "conversation_archives", _LATER,
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    Column("user_id", Integer, nullable=True),
+    Column("title", String),
+    Column("created_at", DateTime(timezone=True)),
+    Column("updated_at", DateTime(timezone=True)),
+    Column("archived_at", DateTime(timezone=True), server_default=func.now()),
+    Column("message_count", Integer),
+    Column("payload", LargeBinary),
+)
+
+
+def _cascade_chat_messages(bind):
+    # Deleting a conversation removes its messages in the database
+    foreign_key = next(
+        fk for fk in inspect(bind).get_foreign_keys("chat_messages") if fk["referred_table"] == "conversations"
+    )
+    if (foreign_key["options"].get("ondelete") or "").upper() == "CASCADE":
+        return
+    if bind.dialect.name == "sqlite":
+        _rebuild_sqlite_table(bind, _chat_messages_cascade)
+    else:
+        name = foreign_key["name"]
+        with bind.begin() as conn:
+            conn.exec_driver_sql(
+                f"ALTER TABLE chat_messages DROP CONSTRAINT {name}, "
+                f"ADD CONSTRAINT {name} FOREIGN KEY (conversation_id) "
+                f"REFERENCES conversations (id) ON DELETE CASCADE"
+            )
+
+
+def _email_outbox_table(bind):
+    _create_tables(_email_outbox)(bind)
+    _create_indexes(("ix_email_outbox_status_next_attempt_at", "email_outbox", "status", "next_attempt_at"))(bind)
+
+
+def _chat_retention(bind):
+    _cascade_chat_messages(bind)
+    _create_tables(_conversation_archives)(bind)
+
+
+# Version 9: conversation ids are never reused, and archives get their own key
+_V9 = MetaData()
+# Only here so the foreign key below resolves; never created
+Table("users", _V9, Column("id", Integer, primary_key=True))
+
+_conversations_autoincrement = Table(
+    "conversations", _V9,
+    Column("id", Integer, primary_key=True),
+    Column("title", String),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+    Column("summary", Text, nullable=True),
+    Column("summary_upto_id", Integer, nullable=True),
+    sqlite_autoincrement=True,
+)
+_keyed_conversation_archives = Table(
+    "conversation_archives", _V9,
+    Column("id", Integer, primary_key=True),
+    Column("conversation_id", Integer),
+    Column("user_id", Integer, nullable=True),
+    Column("title", String),
+    Column("created_at", DateTime(timezone=True)),
+    Column("updated_at", DateTime(timezone=True)),
+    Column("archived_at", DateTime(timezone=True), server_default=func.now()),
+    Column("message_count", Integer),
+    Column("payload", LargeBinary),
+)
+
+
+def _key_conversation_archives(bind):
+    inspector = inspect(bind)
+    if "conversation_id" not in {column["name"] for column in inspector.get_columns("conversation_archives")}:
+        if bind.dialect.name == "sqlite":
+            archived = [c.name for c in _keyed_conversation_archives.columns if c.name not in ("id", "conversation_id")]
+            _rebuild_sqlite_table(
+                bind, _keyed_conversation_archives, {"conversation_id": "id", **{name: name for name in archived}},
+            )
+        else:
+            primary_key = inspector.get_pk_constraint("conversation_archives")["name"]
+            with bind.begin() as conn:
+                conn.exec_driver_sql(f"ALTER TABLE conversation_archives DROP CONSTRAINT {primary_key}")
+                conn.exec_driver_sql("ALTER TABLE conversation_archives RENAME COLUMN id TO conversation_id")
+                conn.exec_driver_sql("ALTER TABLE conversation_archives ADD COLUMN id SERIAL PRIMARY KEY")
+    _create_indexes(
+        ("ix_conversation_archives_id", "conversation_archives", "id"),
+        ("ix_conversation_archives_conversation_id", "conversation_archives", "conversation_id"),
+    )(bind)
+
+    # Postgres sequences never hand out an id twice; SQLite needs AUTOINCREMENT
+    # for that, and a sequence that starts past every archived id
+    if bind.dialect.name != "sqlite":
+        return
+    with bind.connect() as conn:
+        create = conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'conversations'")
+        autoincrement = "AUTOINCREMENT" in create.scalar()
+    if not autoincrement:
+        _rebuild_sqlite_table(bind, _conversations_autoincrement)
+    with bind.begin() as conn:
+        last = conn.exec_driver_sql(
+            "SELECT max(coalesce((SELECT seq FROM sqlite_sequence WHERE name = 'conversations'), 0), "
+            "coalesce((SELECT max(id) FROM conversations), 0), "
+            "coalesce((SELECT max(conversation_id) FROM conversation_archives), 0))"
+        ).scalar()
+        conn.exec_driver_sql("DELETE FROM sqlite_sequence WHERE name = 'conversations'")
+        conn.exec_driver_sql("INSERT INTO sqlite_sequence (name, seq) VALUES ('conversations', ?)", (last,))
+
+
+# Version 10: full-text search (see app.search), frozen as it was added
+_SEARCHED = (
+    ("news", "title", "content"),
+    ("projects", "title", "description"),
+    ("project_updates", "title", "content"),
+)
+
+
+def _sqlite_search_statements(table: str, title: str, body: str, exists: bool) -> List[str]:
+    # An external-content FTS5 table per source, kept current by triggers
+    fts = f"{table}_fts"
+    columns = f"{title}, {body}"
+    new_values = f"new.id, new.{title}, new.{body}"
+    old_values = f"old.id, old.{title}, old.{body}"
+    statements = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{columns}, content='{table}', content_rowid='id', "
+        f"tokenize='porter unicode61', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {columns}) VALUES ({new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', {old_values}); END",
+        # Only text edits touch the index; progress and status updates don't
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {columns} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', {old_values}); "
+        f"INSERT INTO {fts}(rowid, {columns}) VALUES ({new_values}); END",
+    ]
+    if not exists:
+        # Index the rows written before search existed
+        statements.append(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+    return statements
+
+
+def _postgres_search_statements(table: str, title: str, body: str) -> List[str]:
+    # A stored, generated tsvector column with a GIN index
+    vector = (
+        f"setweight(to_tsvector('english', coalesce({title}, '')), 'A') || "
+        f"setweight(to_tsvector('english', coalesce({body}, '')), 'B')"
+    )
+    return [
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({vector}) STORED",
+        f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING GIN (search_vector)",
+    ]
+
+
+def _search_indexes(bind):
+    if bind.dialect.name == "sqlite":
+        with bind.connect() as conn:
+            fts5 = conn.exec_driver_sql("SELECT sqlite_compileoption_used('ENABLE_FTS5')").scalar()
+            existing = set(conn.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%_fts'"
+            ).scalars())
+        if not fts5:
+            print("This SQLite build has no FTS5; full-text search stays unavailable")
+            return
+        statements = [
+            statement for table, title, body in _SEARCHED
+            for statement in _sqlite_search_statements(table, title, body, f"{table}_fts" in existing)
+        ]
+    elif bind.dialect.name == "postgresql":
+        statements = [
+            statement for table, title, body in _SEARCHED for statement in _postgres_search_statements(table, title, body)
+        ]
+    else:
+        print(f"Full-text search is not supported on {bind.dialect.name}")
+        return
+    with bind.begin() as conn:
+        for statement in statements:
+            conn.exec_driver_sql(statement)
+
+
+MIGRATIONS = (
+    Migration(1, "baseline", _baseline),
+    Migration(
+        2,
+        "query indexes for chat history, project updates and team membership",
+        _create_indexes(
+            ("ix_chat_messages_conversation_id_timestamp", "chat_messages", "conversation_id", "timestamp"),
+            ("ix_chat_messages_conversation_id_id", "chat_messages", "conversation_id", "id"),
+            ("ix_conversations_updated_at", "conversations", "updated_at"),
+            ("ix_project_updates_team_id_created_at_id", "project_updates", "team_id", "created_at", "id"),
+            ("ix_project_updates_project_id_created_at_id", "project_updates", "project_id", "created_at", "id"),
+            ("ix_user_teams_user_id_team_id", "user_teams", "user_id", "team_id"),
+            ("ix_user_teams_team_id_user_id", "user_teams", "team_id", "user_id"),
+        ),
+        checks=(
+            PlanCheck(
+                "conversation history", "chat_messages",
+                "SELECT * FROM chat_messages WHERE conversation_id = 1 ORDER BY timestamp",
+            ),
+            PlanCheck(
+                "prompt history and message paging", "chat_messages",
+                "SELECT * FROM chat_messages WHERE conversation_id = 1 AND id > 0 ORDER BY id DESC LIMIT 50",
+            ),
+            PlanCheck(
+                "conversation list", "conversations",
+                "SELECT * FROM conversations ORDER BY updated_at DESC",
+            ),
+            PlanCheck(
+                "retention idle scan", "conversations",
+                "SELECT * FROM conversations WHERE updated_at < '2000-01-01' ORDER BY updated_at, id LIMIT 200",
+            ),
+            PlanCheck(
+                "team updates page", "project_updates",
+                "SELECT * FROM project_updates WHERE team_id = 1 ORDER BY created_at DESC, id DESC LIMIT 20",
+            ),
+            PlanCheck(
+                "project updates page", "project_updates",
+                "SELECT * FROM project_updates WHERE project_id = 1 ORDER BY created_at DESC, id DESC LIMIT 20",
+            ),
+            PlanCheck(
+                "my teams", "user_teams",
+                "SELECT team_id FROM user_teams WHERE user_id = 1",
+            ),
+            PlanCheck(
+                "team members", "user_teams",
+                "SELECT user_id FROM user_teams WHERE team_id = 1",
+            ),
+        ),
+    ),
+    Migration(3, "one text format for keyset-paginated timestamps", _normalize_paged_timestamps),
+    Migration(
+        4,
+        "keyset pagination indexes",
+        _create_indexes(
+            ("ix_news_published_at_id", "news", "published_at", "id"),
+            ("ix_sponsor_inquiries_created_at_id", "sponsor_inquiries", "created_at", "id"),
+            ("ix_contact_messages_created_at_id", "contact_messages", "created_at", "id"),
+            ("ix_project_updates_created_at_id", "project_updates", "created_at", "id"),
+        ),
+        checks=(
+            PlanCheck("news page", "news", "SELECT * FROM news ORDER BY published_at DESC, id DESC LIMIT 20"),
+            PlanCheck(
+                "contact messages page", "contact_messages",
+                "SELECT * FROM contact_messages ORDER BY created_at DESC, id DESC LIMIT 20",
+            ),
+        ),
+    ),
+    Migration(5, "token versions for revoking issued tokens", _add_columns(
+        "users", ("token_version", "INTEGER DEFAULT 0 NOT NULL"),
+    )),
+    Migration(
+        6,
+        "email outbox",
+        _email_outbox_table,
+        checks=(
+            PlanCheck(
+                "outbox poll", "email_outbox",
+                "SELECT * FROM email_outbox WHERE status = 'pending' AND next_attempt_at <= '2000-01-01' "
+                "ORDER BY next_attempt_at, id LIMIT 20",
+            ),
+        ),
+    ),
+    Migration(7, "rolling conversation summaries", _add_columns(
+        "conversations", ("summary", "TEXT"), ("summary_upto_id", "INTEGER"),
+    )),
+    Migration(8, "chat retention: cascading message deletes and conversation archives", _chat_retention),
+    Migration(9, "conversation ids are never reused; archives get their own key", _key_conversation_archives),
+    Migration(10, "full-text search indexes for news, projects and project updates", _search_indexes),
+)
+
+
+def applied_versions(bind) -> set:
+    schema_migrations.create(bind, checkfirst=True)
+    with bind.connect() as conn:
+        return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def _table_scans(conn, check: PlanCheck) -> List[str]:
+    """Plan lines showing a full scan of ``check.table``."""
+    if conn.dialect.name == "sqlite":
+        plan = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {check.sql}")]
+        # "SCAN t" is a table scan; "SCAN t USING INDEX i" and "SEARCH t ..." are not
+        pattern = re.compile(rf"^SCAN (TABLE )?{check.table}\b(?!.*\bUSING\b)")
+    else:
+        # Tiny tables are always cheapest to seq-scan; ask whether an index *can* serve the query
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        plan = [row[0] for row in conn.exec_driver_sql(f"EXPLAIN {check.sql}")]
+        pattern = re.compile(rf"Seq Scan on {check.table}\b")
+    return [line.strip() for line in plan if pattern.search(line.strip())]
+
+
+def check_plans(bind, migrations=MIGRATIONS) -> bool:
+    """Report queries that would scan a whole table; returns True if there are none."""
+    ok = True
+    with bind.connect() as conn:
+        for migration in migrations:
+            for check in migration.checks:
+                with conn.begin():
+                    scans = _table_scans(conn, check)
+                if scans:
+                    ok = False
+                    print(
+                        f"Migration {migration.version}: {check.description} query scans {check.table}: {scans}",
+                        file=sys.stderr,
+                    )
+    return ok
+
+
+def migrate(bind) -> List[Migration]:
+    """Apply pending migrations in order; returns the ones applied."""
+    lock = None
+    if bind.dialect.name == "postgresql":
+        # Several workers may start at once; one migrates, the others wait
+        lock = bind.connect()
+        lock.exec_driver_sql(f"SELECT pg_advisory_lock({_POSTGRES_LOCK_ID})")
+    try:
+        done = applied_versions(bind)
+        applied = []
+        for migration in MIGRATIONS:
+            if migration.version in done:
+                continue
+            migration.upgrade(bind)
+            try:
+                with bind.begin() as conn:
+                    conn.execute(schema_migrations.insert().values(
+                        version=migration.version, name=migration.name, applied_at=datetime.now(timezone.utc)
+                    ))
+            except IntegrityError:
+                # Another SQLite worker got there first; the steps are idempotent
+                continue
+            print(f"Applied migration {migration.version}: {migration.name}")
+            applied.append(migration)
+        if applied and not check_plans(bind, applied):
+            print("Some queries scan whole tables; run `python -m app.migrations check`", file=sys.stderr)
+        return applied
+    finally:
+        if lock is not None:
+            lock.exec_driver_sql(f"SELECT pg_advisory_unlock({_POSTGRES_LOCK_ID})")
+            lock.close()
+
+
+def main(argv=None):
+    from .db import engine
+
+    command = (argv or sys.argv[1:] or ["upgrade"])[0]
+    if command == "upgrade":
+        migrate(engine)
+    elif command == "status":
+        done = applied_versions(engine)
+        for migration in MIGRATIONS:
+            print(f"{migration.version:>4}  {'applied' if migration.version in done else 'pending':8} {migration.name}")
+    elif command == "check":
+        if not check_plans(engine):
+            sys.exit(1)
+        print("All checked queries use an index")
+    else:
+        sys.exit(f"unknown command {command!r}; expected upgrade, status or check")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,14 +1,28 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Table
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Table, Index, LargeBinary
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from .db import Base
 
+def utcnow():
+    return datetime.now(timezone.utc)
+
+# Keyset-paginated timestamps get a Python default as well as the server one.
+# SQLite stores timestamps as text, and CURRENT_TIMESTAMP writes no fraction
+# ('... HH:MM:SS') while bound datetimes write '... HH:MM:SS.ffffff'. The two
+# styles would sort inconsistently, so rows are always written by Python.
+def paged_timestamp():
+    return Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
+
 # Association table for many-to-many relationship between users and teams
 user_team_association = Table(
     'user_teams',
     Base.metadata,
     Column('user_id', Integer, ForeignKey('users.id')),
-    Column('team_id', Integer, ForeignKey('teams.id'))
+    Column('team_id', Integer, ForeignKey('teams.id')),
+    # Membership is looked up from both sides ("my teams", "team members")
+    Index("ix_user_teams_user_id_team_id", "user_id", "team_id"),
+    Index("ix_user_teams_team_id_user_id", "team_id", "user_id"),
 )
 
 class User(Base):
@@ -21,6 +35,7 @@ class User(Base):
     hashed_password = Column(String)
     is_active = Column(Boolean, default=True)
     is_admin = Column(Boolean, default=False)
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)  # bumped to revoke issued tokens
     student_id = Column(String)
     program = Column(String)
     year = Column(String)
@@ -71,7 +86,10 @@ class NewsArticle(Base):
     title = Column(String, index=True)
     content = Column(Text)
     image_url = Column(String)
-    published_at = Column(DateTime(timezone=True), server_default=func.now())
+    published_at = paged_timestamp()
+
+    # Keyset pagination: ORDER BY published_at DESC, id DESC
+    __table_args__ = (Index("ix_news_published_at_id", "published_at", "id"),)
 
 class Executive(Base):
     __tablename__ = "executives"
@@ -101,9 +119,12 @@ class SponsorInquiry(Base):
     email = Column(String)
     phone = Column(String)
     message = Column(Text)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = paged_timestamp()
     status = Column(String, default="pending")  # "pending", "contacted", "closed"
 
+    # Keyset pagination: ORDER BY created_at DESC, id DESC
+    __table_args__ = (Index("ix_sponsor_inquiries_created_at_id", "created_at", "id"),)
+
 class ContactMessage(Base):
     __tablename__ = "contact_messages"
     
@@ -112,9 +133,12 @@ class ContactMessage(Base):
     email = Column(String)
     subject = Column(String)
     message = Column(Text)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = paged_timestamp()
     status = Column(String, default="unread")  # "unread", "read", "replied"
 
+    # Keyset pagination: ORDER BY created_at DESC, id DESC
+    __table_args__ = (Index("ix_contact_messages_created_at_id", "created_at", "id"),)
+
 class ProjectUpdate(Base):
     __tablename__ = "project_updates"
     
@@ -127,7 +151,15 @@ class ProjectUpdate(Base):
     update_type = Column(String)  # "progress", "milestone", "issue", "announcement"
     progress_change = Column(Integer, default=0)  # Change in progress percentage
     images = Column(Text)  # JSON string of image URLs
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = paged_timestamp()
+
+    # Keyset pagination: ORDER BY created_at DESC, id DESC
+    __table_args__ = (
+        Index("ix_project_updates_created_at_id", "created_at", "id"),
+        # Keyset pages of one team's or project's updates
+        Index("ix_project_updates_team_id_created_at_id", "team_id", "created_at", "id"),
+        Index("ix_project_updates_project_id_created_at_id", "project_id", "created_at", "id"),
+    )
     
     # Relationships
     project = relationship("Project", back_populates="updates")
@@ -142,19 +174,70 @@ class Conversation(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # Make nullable
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Rolling summary of the messages up to summary_upto_id, which have
+    # aged out of the prompt's token budget
+    summary = Column(Text, nullable=True)
+    summary_upto_id = Column(Integer, nullable=True)
     
     # Relationships
     user = relationship("User", back_populates="conversations")
-    messages = relationship("ChatMessage", back_populates="conversation")
+    # Messages are removed by the database's ON DELETE CASCADE, not loaded to be deleted
+    messages = relationship(
+        "ChatMessage", back_populates="conversation", cascade="all, delete-orphan", passive_deletes=True
+    )
+
+    __table_args__ = (
+        # Newest-first listing and the retention job's idle scan
+        Index("ix_conversations_updated_at", "updated_at"),
+        # SQLite reuses the highest rowid once it is deleted; an archived conversation's id must stay its own
+        {"sqlite_autoincrement": True},
+    )
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
     
     id = Column(Integer, primary_key=True, index=True)
-    conversation_id = Column(Integer, ForeignKey('conversations.id'))
+    conversation_id = Column(Integer, ForeignKey('conversations.id', ondelete="CASCADE"))
     content = Column(Text)
     is_user = Column(Boolean)  # True if user message, False if AI response
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    conversation = relationship("Conversation", back_populates="messages")
\ No newline at end of file
+    conversation = relationship("Conversation", back_populates="messages")
+
+    # A conversation's messages in time order (history) and id order (paging, prompt building)
+    __table_args__ = (
+        Index("ix_chat_messages_conversation_id_timestamp", "conversation_id", "timestamp"),
+        Index("ix_chat_messages_conversation_id_id", "conversation_id", "id"),
+    )
+
+class ConversationArchive(Base):
+    """A conversation moved out of the hot tables by the retention job"""
+    __tablename__ = "conversation_archives"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    conversation_id = Column(Integer, index=True)  # The archived conversation's id
+    user_id = Column(Integer, nullable=True)
+    title = Column(String)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    message_count = Column(Integer)
+    payload = Column(LargeBinary)  # zlib-compressed JSON: summary and messages
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String)  # "contact", "sponsor_inquiry"
+    subject = Column(String)
+    body = Column(Text)
+    status = Column(String, default="pending")  # "pending", "sent", "failed"
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True))
+
+    # The worker polls for due rows: WHERE status = 'pending' AND next_attempt_at <= now
+    __table_args__ = (Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),)
\ No newline at end of file
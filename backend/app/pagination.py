@@ -0,0 +1,91 @@
+"""Keyset (cursor) pagination over ``(timestamp, id)`` ordered collections.
+
+Pages are fetched with ``WHERE (ts, id) < (:ts, :id) ORDER BY ts DESC, id DESC``
+so every page is an index range seek, however deep it is. The cursor handed to
+clients is an opaque URL-safe token and is returned in the ``X-Next-Cursor``
+response header, leaving the list bodies unchanged for existing clients.
+
+On SQLite the timestamp column is compared as text, so every row must be
+stored in the same format (see ``models.paged_timestamp``).
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    raw = json.dumps([timestamp.isoformat(), row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _keyset(db, query, timestamp_column, id_column, cursor, limit, skip):
+    # Works on both ORM Query objects and 2.0-style select() statements
+    query = query.order_by(timestamp_column.desc(), id_column.desc())
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(timestamp_column, id_column) < tuple_(timestamp, row_id))
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(max(limit, 0) + 1)
+
+
+def _split_page(rows, timestamp_column, id_column, limit):
+    limit = max(limit, 0)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        if rows:
+            last = rows[-1]
+            next_cursor = encode_cursor(
+                getattr(last, timestamp_column.key), getattr(last, id_column.key)
+            )
+    return rows, next_cursor
+
+
+def keyset_page(
+    db: Session,
+    query: Query,
+    timestamp_column,
+    id_column,
+    cursor: Optional[str],
+    limit: int,
+    skip: int = 0,
+):
+    """Return ``(rows, next_cursor)`` for the page that starts after ``cursor``.
+
+    ``skip`` is honoured only without a cursor, for clients that still page by offset.
+    """
+    rows = _keyset(db, query, timestamp_column, id_column, cursor, limit, skip).all()
+    return _split_page(rows, timestamp_column, id_column, limit)
+
+
+async def keyset_page_async(
+    db: AsyncSession,
+    statement: Select,
+    timestamp_column,
+    id_column,
+    cursor: Optional[str],
+    limit: int,
+    skip: int = 0,
+):
+    """Async counterpart of :func:`keyset_page` for ``select()`` statements."""
+    statement = _keyset(db, statement, timestamp_column, id_column, cursor, limit, skip)
+    rows = (await db.execute(statement)).scalars().all()
+    return _split_page(list(rows), timestamp_column, id_column, limit)
@@ -0,0 +1,114 @@
+"""Compiled chatbot system prompt.
+
+The prompt is built from the executives, projects and sponsors read-model
+snapshots plus the static CLUB_INFO/PAGE_INFO, and cached together with its
+token count. It is recompiled only when one of those snapshots changes, so
+chat requests reuse the exact same prefix (which also lets the LLM provider
+cache it).
+"""
+import hashlib
+import json
+import os
+import threading
+
+from .read_model import read_model
+from .routers.team_info import CLUB_INFO, PAGE_INFO, TEAM_MEMBERS_INFO
+from .tokens import count_tokens
+
+SOURCES = ("execs", "projects", "sponsors")
+
+INSTRUCTIONS = """You are the University of Guelph Rocketry Club's AI assistant.
+When referring to pages, use HTML anchor tags with this format:
+<a href='/page-path' class='text-primary-600 hover:text-primary-800 transition-colors'>Link Text</a>
+
+For example: To view our projects, visit <a href='/projects' class='text-primary-600 hover:text-primary-800 transition-colors'>Projects page</a>.
+
+Always use HTML anchor tags for links, not markdown or plain URLs."""
+
+
+class CompiledPrompt:
+    __slots__ = ("text", "token_count", "digest", "key")
+
+    def __init__(self, text: str, key):
+        self.text = text
+        self.token_count = count_tokens(text)
+        self.digest = hashlib.sha256(text.encode()).hexdigest()
+        self.key = key
+
+
+def _rows(name: str):
+    return [json.loads(body) for _, body in read_model.snapshot(name).items]
+
+
+def _club_context(executives, projects, sponsors) -> str:
+    context = f"Club: {CLUB_INFO['name']}\n"
+    context += f"Vision: {CLUB_INFO['vision']}\n"
+    context += f"About: {CLUB_INFO['description']}\n"
+    context += f"Departments: {', '.join(CLUB_INFO['departments'])}\n\n"
+
+    context += "Executive Team:\n"
+    if executives:
+        for exec in executives:
+            context += f"- {exec['name']}: {exec['position']}\n"
+    else:
+        # Fresh databases have no executives yet; fall back to the static roster
+        for exec in TEAM_MEMBERS_INFO["executives"]:
+            context += f"- {exec['name']}: {exec['role']}\n"
+
+    context += "\nProjects:\n"
+    if projects:
+        for project in projects:
+            context += (
+                f"- {project['title']} ({project['status']}, "
+                f"{project['progress_percentage']}% complete): {project['description']}\n"
+            )
+    else:
+        for project in CLUB_INFO["projects"]:
+            context += f"- {project}\n"
+
+    if sponsors:
+        context += "\nSponsors:\n"
+        for sponsor in sponsors:
+            context += f"- {sponsor['name']} ({sponsor['tier']})\n"
+    return context
+
+
+def _page_context() -> str:
+    """Website pages (anchors open in new tab to avoid reloading SPA)"""
+    base = os.getenv("FRONTEND_BASE_URL", "http://localhost:5173")
+    context = "Available Pages:\n\n"
+    for key, info in PAGE_INFO.items():
+        url = info.get("url") or (base.rstrip("/") + info.get("path", "/"))
+        context += (
+            f"- {info['description']}: "
+            f"<a href='{url}' target='_blank' rel='noopener noreferrer' "
+            f"class='text-primary-600 hover:text-primary-800 transition-colors'>{key.title()}</a>\n"
+        )
+    return context
+
+
+class PromptRegistry:
+    def __init__(self):
+        self._compiled = None
+        self._lock = threading.Lock()
+
+    def _key(self):
+        return tuple(read_model.snapshot(name).version for name in SOURCES)
+
+    def system_prompt(self) -> CompiledPrompt:
+        key = self._key()
+        compiled = self._compiled
+        if compiled is not None and compiled.key == key:
+            return compiled
+        with self._lock:
+            if self._compiled is None or self._compiled.key != key:
+                text = "\n\n".join((
+                    INSTRUCTIONS,
+                    _club_context(*(_rows(name) for name in SOURCES)),
+                    _page_context(),
+                ))
+                self._compiled = CompiledPrompt(text, key)
+            return self._compiled
+
+
+prompt_registry = PromptRegistry()
@@ -0,0 +1,100 @@
+"""In-process token-bucket rate limiting."""
+import ipaddress
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request
+
+from .metrics import registry
+
+RATE_LIMITED = registry.counter("rate_limited_requests_total", "Requests refused with 429, by limiter.", ("limiter",))
+
+# Proxies whose X-Forwarded-For is believed: addresses or networks, or "*" for
+# any peer (e.g. behind Render's load balancer). Same setting uvicorn reads.
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def _parse_proxies(value: str):
+    entries = [entry.strip() for entry in value.split(",") if entry.strip()]
+    return "*" in entries, [ipaddress.ip_network(entry, strict=False) for entry in entries if entry != "*"]
+
+
+_TRUST_ANY_PEER, _TRUSTED_NETWORKS = _parse_proxies(FORWARDED_ALLOW_IPS)
+
+
+def _is_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in _TRUSTED_NETWORKS)
+
+
+def client_ip(request: Request):
+    """The address a request came from, seen through trusted proxies.
+
+    X-Forwarded-For is read right to left, skipping known proxies; the first
+    other hop is the client. Entries further left are set by the client and
+    can't be trusted.
+    """
+    if request.client is None:
+        return None
+    peer = request.client.host
+    if not (_TRUST_ANY_PEER or _is_proxy(peer)):
+        return peer
+    hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_proxy(hop):
+            return hop
+    return hops[0] if hops else peer
+
+
+class TokenBucketLimiter:
+    """One bucket of ``burst`` tokens per key, refilled at ``per_minute``.
+
+    Buckets for the least recently seen keys are dropped past ``max_keys``;
+    a forgotten key simply starts again with a full bucket.
+    """
+
+    def __init__(self, name: str, per_minute: float, burst: int, max_keys: int = 10000):
+        self.name = name
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0 and self.burst > 0
+
+    def acquire(self, key) -> float:
+        """Take a token for ``key``; 0 on success, else seconds until one is available."""
+        if not self.enabled:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def check(self, key):
+        """Raise 429 with a Retry-After header if ``key`` is out of tokens."""
+        wait = self.acquire(key)
+        if wait:
+            RATE_LIMITED.inc(self.name)
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, please slow down",
+                headers={"Retry-After": str(max(1, round(wait)))},
+            )
\ No newline at end of file
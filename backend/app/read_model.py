@@ -0,0 +1,150 @@
+"""In-process read model for the small public collections.
+
+Executives, sponsors, projects and teams hold a few dozen rows and change a
+few times a month, so they are loaded once into immutable, pre-serialized
+snapshots and served straight from memory. Any commit that touches one of
+these tables refreshes the affected snapshots (see ``commit_hooks``).
+"""
+import hashlib
+import threading
+from types import MappingProxyType
+
+from fastapi import Request, Response
+from sqlalchemy import inspect
+from sqlalchemy.orm import selectinload
+
+from . import schemas
+from .commit_hooks import CommitHook
+from .conditional import conditional_response, make_etag
+from .db import SessionLocal
+from .models import Executive, Sponsor, Project, Team, User
+
+# collection name -> (model, response schema, loader options)
+COLLECTIONS = {
+    "execs": (Executive, schemas.Executive, ()),
+    "sponsors": (Sponsor, schemas.Sponsor, ()),
+    "projects": (Project, schemas.Project, ()),
+    "teams": (Team, schemas.Team, (selectinload(Team.members),)),
+}
+
+# Which snapshots a change to a given model invalidates
+DEPENDENCIES = {
+    Executive: ("execs",),
+    Sponsor: ("sponsors",),
+    Project: ("projects",),
+    Team: ("teams",),
+}
+# Teams embed their members, so a user matters only when their memberships
+# change or a member edits a field the team payload shows
+MEMBER_FIELDS = frozenset(schemas.User.model_fields)
+
+
+class Snapshot:
+    """Immutable, pre-serialized view of one collection."""
+
+    __slots__ = ("items", "by_id", "item_etags", "digest", "version")
+
+    def __init__(self, items, version):
+        self.items = items  # tuple of (id, JSON bytes) in id order
+        self.by_id = MappingProxyType(dict(items))
+        self.item_etags = MappingProxyType(
+            {item_id: make_etag(hashlib.sha1(body).hexdigest()) for item_id, body in items}
+        )
+        self.digest = hashlib.sha1(b"\n".join(body for _, body in items)).hexdigest()
+        self.version = version
+
+    def page(self, skip: int = 0, limit: int = 100) -> bytes:
+        skip = max(skip, 0)
+        window = self.items[skip:skip + max(limit, 0)]
+        return b"[" + b",".join(body for _, body in window) + b"]"
+
+
+class ReadModel:
+    def __init__(self, session_factory=SessionLocal):
+        self._session_factory = session_factory
+        self._snapshots = {}
+        self._version = 0
+        # Per collection: the last refresh started and the one whose snapshot is installed
+        self._started = {}
+        self._installed = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load every collection; called once at startup."""
+        self.refresh(*COLLECTIONS)
+
+    def refresh(self, *names):
+        db = self._session_factory()
+        try:
+            for name in names:
+                with self._lock:
+                    generation = self._started[name] = self._started.get(name, 0) + 1
+                model, schema, options = COLLECTIONS[name]
+                rows = db.query(model).options(*options).order_by(model.id).all()
+                items = tuple(
+                    (row.id, schema.model_validate(row, from_attributes=True).model_dump_json().encode())
+                    for row in rows
+                )
+                with self._lock:
+                    # A refresh that started later (and so read newer rows) already won
+                    if generation <= self._installed.get(name, 0):
+                        continue
+                    self._installed[name] = generation
+                    self._version += 1
+                    self._snapshots[name] = Snapshot(items, self._version)
+        finally:
+            db.close()
+
+    def snapshot(self, name: str) -> Snapshot:
+        snapshot = self._snapshots.get(name)
+        if snapshot is None:
+            self.refresh(name)
+            snapshot = self._snapshots[name]
+        return snapshot
+
+    def list_response(self, name: str, request: Request, skip: int = 0, limit: int = 100) -> Response:
+        snapshot = self.snapshot(name)
+        # No Last-Modified: these tables record no modification times, and the
+        # load time differs between workers and restarts. The ETag alone revalidates.
+        return conditional_response(
+            request, make_etag(snapshot.digest, skip, limit), None, lambda: snapshot.page(skip, limit)
+        )
+
+    def item_response(self, name: str, item_id: int, request: Request):
+        """Return the cached item as a response, or None if it doesn't exist."""
+        snapshot = self.snapshot(name)
+        body = snapshot.by_id.get(item_id)
+        if body is None:
+            return None
+        return conditional_response(
+            request, snapshot.item_etags[item_id], None, lambda: body
+        )
+
+
+read_model = ReadModel()
+
+
+def _touches_teams(session, user) -> bool:
+    state = inspect(user)
+    if state.attrs.teams.history.has_changes():
+        return True
+    if user in session.new:
+        # A new account joins no team by being created
+        return False
+    # Never load inside a flush; not loaded means assume there are memberships
+    teams = state.dict.get("teams")
+    is_member = teams is None or bool(teams)
+    if user in session.deleted:
+        return is_member
+    return is_member and any(
+        state.attrs[field].history.has_changes() for field in MEMBER_FIELDS if field in state.attrs
+    )
+
+
+def _dependencies(session, obj):
+    if isinstance(obj, User):
+        return ("teams",) if _touches_teams(session, obj) else ()
+    return DEPENDENCIES.get(type(obj), ())
+
+
+refresh_hook = CommitHook("Read model", _dependencies, lambda names: read_model.refresh(*names))
@@ -0,0 +1,167 @@
+"""Archive chat conversations that have been idle for a while.
+
+Every conversation untouched for CHAT_RETENTION_DAYS is packed into a single
+zlib-compressed JSON row in ``conversation_archives`` and deleted from the
+hot tables (its messages go with it through ON DELETE CASCADE). Work is
+done in batches of CHAT_RETENTION_BATCH_SIZE conversations, each its own
+short transaction, so chat writes are never blocked for long. Empty
+conversations are dropped without an archive row.
+"""
+import asyncio
+import json
+import os
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+
+from sqlalchemy import delete, insert, select, text
+
+from .db import SessionLocal
+from .metrics import registry
+from .models import ChatMessage, Conversation, ConversationArchive
+
+CHAT_RETENTION_DAYS = float(os.getenv("CHAT_RETENTION_DAYS", "90"))  # 0 keeps everything
+CHAT_RETENTION_BATCH_SIZE = int(os.getenv("CHAT_RETENTION_BATCH_SIZE", "200"))
+CHAT_RETENTION_INTERVAL_SECONDS = float(os.getenv("CHAT_RETENTION_INTERVAL_SECONDS", "3600"))
+# Breather between batches so queued writers get the lock
+CHAT_RETENTION_PAUSE_SECONDS = float(os.getenv("CHAT_RETENTION_PAUSE_SECONDS", "0.05"))
+
+ARCHIVED_CONVERSATIONS = registry.counter(
+    "chat_conversations_archived_total", "Conversations moved out of the hot tables, by outcome.", ("outcome",),
+)
+ARCHIVED_MESSAGES = registry.counter("chat_messages_archived_total", "Chat messages moved into archives.")
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def _parse(value):
+    return datetime.fromisoformat(value) if value is not None else None
+
+
+def pack(conversation, messages) -> bytes:
+    document = {
+        "summary": conversation.summary,
+        "messages": [
+            {"id": m.id, "content": m.content, "is_user": m.is_user, "timestamp": _iso(m.timestamp)}
+            for m in messages
+        ],
+    }
+    return zlib.compress(json.dumps(document, separators=(",", ":")).encode(), 9)
+
+
+def unpack(archive: ConversationArchive) -> dict:
+    """The archived conversation in the shape the chat API returns."""
+    document = json.loads(zlib.decompress(archive.payload))
+    return {
+        "id": archive.conversation_id,
+        "title": archive.title,
+        "user_id": archive.user_id,
+        "created_at": archive.created_at,
+        "updated_at": archive.updated_at,
+        "messages": [
+            {**message, "conversation_id": archive.conversation_id, "timestamp": _parse(message["timestamp"])}
+            for message in document["messages"]
+        ],
+    }
+
+
+def archive_batch(db, cutoff: datetime, batch_size: int = CHAT_RETENTION_BATCH_SIZE) -> int:
+    """Archive up to ``batch_size`` conversations idle since ``cutoff``; returns how many."""
+    # Chat writes must not land between reading a conversation and deleting
+    # it. SQLite takes the write lock up front; Postgres locks the rows, which
+    # also holds off new messages (their foreign key check needs a row share).
+    if db.get_bind().dialect.name == "sqlite":
+        db.execute(text("BEGIN IMMEDIATE"))
+    conversations = db.execute(
+        select(Conversation)
+        .where(Conversation.updated_at < cutoff)
+        .order_by(Conversation.updated_at, Conversation.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not conversations:
+        db.rollback()
+        return 0
+    ids = [conversation.id for conversation in conversations]
+    messages = db.execute(
+        select(ChatMessage)
+        .where(ChatMessage.conversation_id.in_(ids))
+        .order_by(ChatMessage.conversation_id, ChatMessage.id)
+    ).scalars().all()
+    by_conversation = {key: list(group) for key, group in groupby(messages, key=lambda m: m.conversation_id)}
+
+    # Only what is still idle goes, and only what went is archived
+    deleted = set(db.execute(
+        delete(Conversation)
+        .where(Conversation.id.in_(ids), Conversation.updated_at < cutoff)
+        .returning(Conversation.id),
+        execution_options={"synchronize_session": False},
+    ).scalars())
+
+    archived_at = datetime.now(timezone.utc)
+    rows = []
+    for conversation in conversations:
+        conversation_messages = by_conversation.get(conversation.id, [])
+        if conversation.id not in deleted or not conversation_messages:
+            continue
+        rows.append({
+            "conversation_id": conversation.id,
+            "user_id": conversation.user_id,
+            "title": conversation.title,
+            "created_at": conversation.created_at,
+            "updated_at": conversation.updated_at,
+            "archived_at": archived_at,
+            "message_count": len(conversation_messages),
+            "payload": pack(conversation, conversation_messages),
+        })
+    if rows:
+        db.execute(insert(ConversationArchive), rows)
+    db.commit()
+
+    ARCHIVED_CONVERSATIONS.inc("archived", amount=len(rows))
+    ARCHIVED_CONVERSATIONS.inc("dropped_empty", amount=len(deleted) - len(rows))
+    ARCHIVED_MESSAGES.inc(amount=sum(row["message_count"] for row in rows))
+    return len(deleted)
+
+
+class RetentionWorker:
+    def __init__(self, session_factory=SessionLocal):
+        self._session_factory = session_factory
+
+    def run_once(self, now: datetime = None) -> int:
+        """Archive everything past retention; returns the number of conversations."""
+        if CHAT_RETENTION_DAYS <= 0:
+            return 0
+        cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=CHAT_RETENTION_DAYS)
+        total = 0
+        while True:
+            db = self._session_factory()
+            try:
+                done = archive_batch(db, cutoff)
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+            total += done
+            if done < CHAT_RETENTION_BATCH_SIZE:
+                return total
+            time.sleep(CHAT_RETENTION_PAUSE_SECONDS)
+
+    async def run(self):
+        """Archive idle conversations until cancelled; runs for the lifetime of the app."""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                archived = await loop.run_in_executor(None, self.run_once)
+                if archived:
+                    print(f"Archived {archived} idle conversations")
+            except Exception as e:
+                print(f"Chat retention failed: {e}")
+            await asyncio.sleep(CHAT_RETENTION_INTERVAL_SECONDS)
+
+
+retention = RetentionWorker()
\ No newline at end of file
@@ -0,0 +1,240 @@
+"""Local BM25 retrieval over club news, projects and project updates.
+
+Documents are split into short passages and kept in an in-process inverted
+index, so the chatbot can ground answers in recent club activity without an
+external search or vector service. The index is loaded at startup and kept
+current the same way as the read model: any commit that touches one of the
+indexed models re-indexes just those rows.
+"""
+import heapq
+import math
+import os
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .commit_hooks import CommitHook
+from .db import SessionLocal
+from .models import NewsArticle, Project, ProjectUpdate
+from .tokens import count_tokens
+
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "4"))
+RETRIEVAL_TOKEN_BUDGET = int(os.getenv("RETRIEVAL_TOKEN_BUDGET", "600"))
+# Only the newest documents of each kind are indexed, bounding memory
+RETRIEVAL_MAX_DOCUMENTS = int(os.getenv("RETRIEVAL_MAX_DOCUMENTS", "5000"))
+PASSAGE_WORDS = 80
+
+# BM25 parameters (the usual defaults)
+K1 = 1.2
+B = 0.75
+
+STOPWORDS = frozenset("""
+a about an and any are as at be been but by can could did do does for from had has have
+how i if in into is it its me my of on or our so tell than that the their them then there
+these they this to us was we were what when where which who why will with would you your
+""".split())
+
+
+def _stem(word: str) -> str:
+    # Light suffix stripping so "rockets"/"rocket" and "launched"/"launch" meet
+    for suffix in ("ing", "ed", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(word) for word in re.findall(r"\w+", text.lower()) if word not in STOPWORDS]
+
+
+def _date(value) -> str:
+    return f" ({value:%Y-%m-%d})" if value is not None else ""
+
+
+def _render_news(article: NewsArticle) -> Tuple[str, str]:
+    return f"News{_date(article.published_at)}: {article.title}", article.content or ""
+
+
+def _render_project(project: Project) -> Tuple[str, str]:
+    progress = f"{project.progress_percentage or 0}% complete"
+    return f"Project: {project.title} ({project.status}, {progress})", project.description or ""
+
+
+def _render_update(update: ProjectUpdate) -> Tuple[str, str]:
+    kind = f" [{update.update_type}]" if update.update_type else ""
+    return f"Project update{_date(update.created_at)}{kind}: {update.title}", update.content or ""
+
+
+# source name -> (model, newest-first ordering column, renderer)
+SOURCES = {
+    "news": (NewsArticle, NewsArticle.published_at, _render_news),
+    "projects": (Project, Project.created_at, _render_project),
+    "updates": (ProjectUpdate, ProjectUpdate.created_at, _render_update),
+}
+_SOURCE_BY_MODEL = {model: name for name, (model, _, _) in SOURCES.items()}
+
+
+class Passage(NamedTuple):
+    source: str
+    row_id: int
+    text: str
+
+
+class RetrievedContext(NamedTuple):
+    text: str
+    passages: Tuple[Passage, ...]
+    token_count: int
+
+
+def split_passages(heading: str, body: str) -> List[str]:
+    """Chunk a document; every chunk repeats the heading so it stands on its own."""
+    words = body.split()
+    if not words:
+        return [heading]
+    return [
+        f"{heading}\n{' '.join(words[start:start + PASSAGE_WORDS])}"
+        for start in range(0, len(words), PASSAGE_WORDS)
+    ]
+
+
+class BM25Index:
+    """Inverted index supporting incremental add/remove of passages."""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.lengths: Dict[int, int] = {}
+        self.passages: Dict[int, Passage] = {}
+        self.total_length = 0
+        self._next_id = 0
+
+    def add(self, passage: Passage) -> int:
+        passage_id = self._next_id
+        self._next_id += 1
+        terms = tokenize(passage.text)
+        counts: Dict[str, int] = defaultdict(int)
+        for term in terms:
+            counts[term] += 1
+        for term, count in counts.items():
+            self.postings[term][passage_id] = count
+        self.lengths[passage_id] = len(terms)
+        self.passages[passage_id] = passage
+        self.total_length += len(terms)
+        return passage_id
+
+    def remove(self, passage_id: int):
+        passage = self.passages.pop(passage_id, None)
+        if passage is None:
+            return
+        for term in set(tokenize(passage.text)):
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(passage_id, None)
+                if not postings:
+                    del self.postings[term]
+        self.total_length -= self.lengths.pop(passage_id)
+
+    def search(self, query: str, k: int) -> List[Tuple[float, Passage]]:
+        count = len(self.passages)
+        if not count:
+            return []
+        average_length = self.total_length / count or 1
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for passage_id, frequency in postings.items():
+                norm = K1 * (1 - B + B * self.lengths[passage_id] / average_length)
+                scores[passage_id] += idf * frequency * (K1 + 1) / (frequency + norm)
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(score, self.passages[passage_id]) for passage_id, score in best]
+
+
+class Retriever:
+    def __init__(self, session_factory=SessionLocal):
+        self._session_factory = session_factory
+        self._index = BM25Index()
+        # (source, row id) -> passage ids, oldest first per source for eviction
+        self._documents: Dict[str, "OrderedDict[int, List[int]]"] = {name: OrderedDict() for name in SOURCES}
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def load(self):
+        """Index the newest documents of every source; called once at startup."""
+        db = self._session_factory()
+        try:
+            for name, (model, newest, render) in SOURCES.items():
+                rows = db.query(model).order_by(newest.desc(), model.id.desc()).limit(RETRIEVAL_MAX_DOCUMENTS).all()
+                with self._lock:
+                    for row in reversed(rows):
+                        self._put(name, row.id, render(row))
+                    self.version += 1
+        finally:
+            db.close()
+
+    def _put(self, name: str, row_id: int, document: Tuple[str, str]):
+        documents = self._documents[name]
+        self._drop(name, row_id)
+        documents[row_id] = [
+            self._index.add(Passage(name, row_id, text)) for text in split_passages(*document)
+        ]
+        while len(documents) > RETRIEVAL_MAX_DOCUMENTS:
+            self._drop(name, next(iter(documents)))
+
+    def _drop(self, name: str, row_id: int):
+        for passage_id in self._documents[name].pop(row_id, ()):
+            self._index.remove(passage_id)
+
+    def refresh(self, touched):
+        """Re-index the given ``(source, row id)`` pairs from the database."""
+        by_source = defaultdict(set)
+        for name, row_id in touched:
+            by_source[name].add(row_id)
+        db = self._session_factory()
+        try:
+            for name, ids in by_source.items():
+                model, _, render = SOURCES[name]
+                rows = {row.id: row for row in db.query(model).filter(model.id.in_(ids))}
+                with self._lock:
+                    for row_id in ids:
+                        row = rows.get(row_id)
+                        if row is None:
+                            self._drop(name, row_id)
+                        else:
+                            self._put(name, row_id, render(row))
+                    self.version += 1
+        finally:
+            db.close()
+
+    def retrieve(self, query: str, k: int = RETRIEVAL_TOP_K) -> List[Tuple[float, Passage]]:
+        with self._lock:
+            return self._index.search(query, k)
+
+    def context(self, query: str, budget: int = RETRIEVAL_TOKEN_BUDGET) -> Optional[RetrievedContext]:
+        """The most relevant passages that fit in ``budget`` tokens, best first."""
+        header = "Recent club content that may help answer the question:"
+        selected, used = [], count_tokens(header)
+        for _, passage in self.retrieve(query):
+            cost = count_tokens(passage.text) + 2
+            if used + cost > budget:
+                continue
+            selected.append(passage)
+            used += cost
+        if not selected:
+            return None
+        text = header + "\n\n" + "\n\n".join(f"- {passage.text}" for passage in selected)
+        return RetrievedContext(text, tuple(selected), used)
+
+
+retriever = Retriever()
+
+
+def _touched_documents(session, obj):
+    name = _SOURCE_BY_MODEL.get(type(obj))
+    if name is not None and obj.id is not None:
+        yield name, obj.id
+
+
+refresh_hook = CommitHook("Retrieval index", _touched_documents, retriever.refresh)
@@ -1,16 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from ..db import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..db import get_async_db
 from ..models import User as UserModel
-from ..schemas import UserCreate, UserLogin, Token, User
-from ..auth import get_password_hash, verify_password, create_access_token, get_current_active_user
+from ..schemas import UserCreate, UserLogin, UserStatusUpdate, Token, User
+from ..auth import (
+    get_password_hash_async, verify_and_update_password, create_access_token, token_claims,
+    get_current_active_user_async, get_current_active_user, get_admin_user,
+    bump_token_version, principal_cache, Principal
+)
 
 router = APIRouter()
 
+async def _get_user_by(db: AsyncSession, column, value):
+    result = await db.execute(select(UserModel).where(column == value))
+    return result.scalars().first()
+
 @router.post("/register", response_model=User)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if user already exists
-    db_user = db.query(UserModel).filter(UserModel.email == user.email).first()
+    db_user = await _get_user_by(db, UserModel.email, user.email)
     if db_user:
         raise HTTPException(
             status_code=400,
@@ -18,15 +27,15 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Check if username already exists
-    db_user = db.query(UserModel).filter(UserModel.username == user.username).first()
+    db_user = await _get_user_by(db, UserModel.username, user.username)
     if db_user:
         raise HTTPException(
             status_code=400,
             detail="Username already taken"
         )
     
-    # Create new user
-    hashed_password = get_password_hash(user.password)
+    # Create new user; bcrypt is CPU-bound, keep it off the event loop
+    hashed_password = await get_password_hash_async(user.password)
     db_user = UserModel(
         email=user.email,
         username=user.username,
@@ -37,22 +46,32 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         hashed_password=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 @router.post("/login", response_model=Token)
-def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(UserModel).filter(UserModel.email == user_credentials.email).first()
+async def login(user_credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    user = await _get_user_by(db, UserModel.email, user_credentials.email)
     
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+    verified, new_hash = False, None
+    if user:
+        verified, new_hash = await verify_and_update_password(
+            user_credentials.password, user.hashed_password
+        )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token = create_access_token(data={"sub": user.email})
+    # The bcrypt cost changed since this password was stored; upgrade it in place
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    
+    access_token = create_access_token(data=token_claims(user))
     return {
         "access_token": access_token,
         "token_type": "bearer",
@@ -60,14 +79,14 @@ def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     }
 
 @router.get("/me", response_model=User)
-def get_current_user_info(current_user: UserModel = Depends(get_current_active_user)):
-    return current_user
+async def get_current_user_info(current_user: Principal = Depends(get_current_active_user)):
+    return current_user.profile
 
 @router.patch("/me", response_model=User)
-def update_current_user(
+async def update_current_user(
     user_update: dict,
-    current_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: UserModel = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Update allowed fields
     allowed_fields = ["full_name", "student_id", "program", "year"]
@@ -75,6 +94,30 @@ def update_current_user(
         if field in allowed_fields and hasattr(current_user, field):
             setattr(current_user, field, value)
     
-    db.commit()
-    db.refresh(current_user)
-    return current_user
\ No newline at end of file
+    await db.commit()
+    await db.refresh(current_user)
+    # Profile fields don't affect authorization, so drop the cached copy without revoking tokens
+    principal_cache.invalidate(current_user.id)
+    return current_user
+
+@router.patch("/users/{user_id}", response_model=User)
+async def update_user_status(
+    user_id: int,
+    update: UserStatusUpdate,
+    current_user: Principal = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user = await db.get(UserModel, user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    changes = update.model_dump(exclude_none=True)
+    if any(getattr(user, field) != value for field, value in changes.items()):
+        for field, value in changes.items():
+            setattr(user, field, value)
+        # Flags are carried in the token, so outstanding tokens must be reissued
+        bump_token_version(user)
+        await db.commit()
+        await db.refresh(user)
+        principal_cache.invalidate(user.id)
+    return user
\ No newline at end of file
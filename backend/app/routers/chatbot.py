@@ -1,416 +1,425 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from openai import AsyncOpenAI  # Update import
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
+import asyncio
+import json
 import os
-from ..db import get_db
+import re
+from ..db import get_async_db, AsyncSessionLocal
 from ..models import Conversation as ConversationModel, ChatMessage as ChatMessageModel, User as UserModel
+from ..models import ConversationArchive as ConversationArchiveModel
 from ..schemas import Conversation, ChatMessage, ChatMessageCreate, ChatResponse, ConversationCreate
 from ..auth import get_current_active_user
-from .team_info import TEAM_MEMBERS_INFO, PAGE_INFO, CLUB_INFO
+from ..prompts import prompt_registry
+from ..retrieval import retriever
+from ..chat_cache import cache_key, response_cache
+from .. import intents
+from ..chat_context import build_history
+from ..retention import unpack
+from ..llm import Unavailable, gateway
+from ..rate_limit import TokenBucketLimiter, client_ip
+from ..metrics import registry
 from datetime import datetime, timezone
 
 router = APIRouter()
 
-# Initialize OpenAI client
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))  # Update client initialization
+FALLBACK_REPLIES = registry.counter(
+    "chatbot_fallback_replies_total", "Replies served from canned answers instead of OpenAI.", ("reason",),
+)
 
 SYSTEM_PROMPT = os.getenv(
     "CHATBOT_SYSTEM_PROMPT"
 )
 
-def get_team_context():
-    """Generate context about team members for the chatbot"""
-    context = f"Club: {CLUB_INFO['name']}\n"
-    context += f"Vision: {CLUB_INFO['vision']}\n"
-    context += f"Departments: {', '.join(CLUB_INFO['departments'])}\n\n"
-    context += "Executive Team:\n"
-    for exec in TEAM_MEMBERS_INFO["executives"]:
-        context += f"- {exec['name']}: {exec['role']}\n"
-    return context
-
-def get_page_context():
-    """Generate context about website pages (anchors open in new tab to avoid reloading SPA)"""
-    base = os.getenv("FRONTEND_BASE_URL", "http://localhost:5173")
-    context = "Available Pages:\n\n"
-    for key, info in PAGE_INFO.items():
-        url = info.get("url") or (base.rstrip("/") + info.get("path", "/"))
-        context += (
-            f"- {info['description']}: "
-            f"<a href='{url}' target='_blank' rel='noopener noreferrer' "
-            f"class='text-primary-600 hover:text-primary-800 transition-colors'>{key.title()}</a>\n"
-        )
-    return context
+# Per-client and per-conversation chat limits; a rate of 0 disables a limiter
+ip_limiter = TokenBucketLimiter(
+    "chat_ip",
+    float(os.getenv("CHAT_RATE_LIMIT_PER_IP_PER_MINUTE", "20")),
+    int(os.getenv("CHAT_RATE_LIMIT_PER_IP_BURST", "10")),
+)
+conversation_limiter = TokenBucketLimiter(
+    "chat_conversation",
+    float(os.getenv("CHAT_RATE_LIMIT_PER_CONVERSATION_PER_MINUTE", "10")),
+    int(os.getenv("CHAT_RATE_LIMIT_PER_CONVERSATION_BURST", "5")),
+)
+
+def _fallback_reply(content: str) -> str:
+    """Canned replies used when the OpenAI call is unavailable or fails"""
+    return intents.fallback(content)
+
+def _message_dict(m):
+    return {
+        "id": m.id,
+        "conversation_id": m.conversation_id,
+        "content": m.content,
+        "is_user": m.is_user,
+        "timestamp": m.timestamp
+    }
+
+def _conversation_dict(conversation, messages):
+    return {
+        "id": conversation.id,
+        "title": conversation.title,
+        "user_id": conversation.user_id,
+        "created_at": conversation.created_at,
+        "updated_at": conversation.updated_at,
+        "messages": [_message_dict(m) for m in messages]
+    }
+
+async def _get_conversation_or_404(db: AsyncSession, conversation_id: int):
+    conversation = await db.get(ConversationModel, conversation_id)
+    if conversation is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return conversation
+
+async def _conversation_messages(db: AsyncSession, conversation_id: int):
+    result = await db.execute(
+        select(ChatMessageModel)
+        .where(ChatMessageModel.conversation_id == conversation_id)
+        .order_by(ChatMessageModel.timestamp.asc())
+    )
+    return result.scalars().all()
 
 @router.get("/conversations", response_model=List[Conversation])
-def get_conversations(
+async def get_conversations(
     # Remove authentication requirement
     # current_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Return all conversations or empty list
-    conversations = db.query(ConversationModel).order_by(ConversationModel.updated_at.desc()).all()
-    return conversations
+    result = await db.execute(
+        select(ConversationModel)
+        .options(selectinload(ConversationModel.messages))
+        .order_by(ConversationModel.updated_at.desc())
+    )
+    return result.scalars().all()
 
 @router.post("/conversations", response_model=Conversation)
-def create_conversation(
+async def create_conversation(
     conversation: ConversationCreate,
     # Remove authentication requirement
     # current_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     db_conversation = ConversationModel(
         user_id=None,  # Anonymous conversation
         title=conversation.title
     )
     db.add(db_conversation)
-    db.commit()
-    db.refresh(db_conversation)
-    return db_conversation
+    await db.commit()
+    await db.refresh(db_conversation)
+    return _conversation_dict(db_conversation, [])
 
 @router.get("/conversations/{conversation_id}", response_model=Conversation)
-def get_conversation(
+async def get_conversation(
     conversation_id: int,
     # Remove authentication requirement
     # current_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    conversation = db.query(ConversationModel).filter(
-        ConversationModel.id == conversation_id
-    ).first()
-    
+    conversation = await db.get(ConversationModel, conversation_id)
     if conversation is None:
-        raise HTTPException(status_code=404, detail="Conversation not found")
+        # Idle conversations are moved out by the retention job but stay readable
+        archive = (await db.execute(
+            select(ConversationArchiveModel)
+            .where(ConversationArchiveModel.conversation_id == conversation_id)
+            .order_by(ConversationArchiveModel.id.desc())
+            .limit(1)
+        )).scalar_one_or_none()
+        if archive is None:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        return unpack(archive)
     
     # Load messages explicitly and serialize to plain structures so Pydantic accepts them
-    messages = db.query(ChatMessageModel).filter(
-        ChatMessageModel.conversation_id == conversation_id
-    ).order_by(ChatMessageModel.timestamp.asc()).all()
-
-    message_list = []
-    for m in messages:
-        message_list.append({
-            "id": m.id,
-            "conversation_id": m.conversation_id,
-            "content": m.content,
-            "is_user": m.is_user,
-            "timestamp": m.timestamp
-        })
-
-    conversation_dict = {
-        "id": conversation.id,
-        "title": conversation.title,
-        "user_id": conversation.user_id,
-        "created_at": conversation.created_at,
-        "updated_at": conversation.updated_at,
-        "messages": message_list
+    messages = await _conversation_messages(db, conversation_id)
+    return _conversation_dict(conversation, messages)
+
+async def _start_turn(db: AsyncSession, message: ChatMessageCreate):
+    """Persist the user's message, creating the conversation if needed"""
+    # Find or create conversation first
+    conversation = None
+    if message.conversation_id:
+        conversation = await db.get(ConversationModel, message.conversation_id)
+
+    if not conversation:
+        # Create new conversation for anonymous user
+        conversation = ConversationModel(
+            title="New Conversation",
+            user_id=None
+        )
+        db.add(conversation)
+        await db.flush()
+
+    # Persist the user's message so conversation history includes user messages
+    user_msg = ChatMessageModel(
+        conversation_id=conversation.id,
+        content=message.content,
+        is_user=True,
+        timestamp=datetime.now(timezone.utc)
+    )
+    db.add(user_msg)
+    # An active conversation is not idle, even before the reply is saved
+    conversation.updated_at = user_msg.timestamp
+    await db.commit()
+    return conversation, user_msg
+
+async def _build_prompt(db: AsyncSession, conversation, message: ChatMessageCreate):
+    """Messages for the model, plus the response cache key when the question stands alone"""
+    # The system prompt is compiled once from club data and reused until it changes
+    prompt = prompt_registry.system_prompt()
+    system_message = {"role": "system", "content": prompt.text}
+
+    messages = [system_message]
+
+    # Ground the answer in the few news/project passages relevant to this
+    # question; kept out of the system prompt so its cached prefix is stable
+    retrieved = retriever.context(message.content)
+    if retrieved is not None:
+        messages.append({"role": "system", "content": retrieved.text})
+
+    # Recent history within the token budget (ending with the message we
+    # just saved), older turns condensed into the conversation's summary
+    history = await build_history(db, conversation)
+    messages.extend(history.messages)
+
+    # Standalone questions can share answers; follow-ups depend on the history
+    key = None
+    if history.standalone:
+        key = cache_key(
+            message.content, _model(), prompt.digest, retrieved.text if retrieved is not None else None
+        )
+    else:
+        response_cache.bypass()
+
+    return messages, key
+
+async def _save_reply(db: AsyncSession, conversation, content: str):
+    """Persist the assistant's reply and bump the conversation timestamp"""
+    # Use UTC timestamp for consistency
+    ai_message = ChatMessageModel(
+        conversation_id=conversation.id,
+        content=content,
+        is_user=False,
+        timestamp=datetime.now(timezone.utc)
+    )
+    db.add(ai_message)
+
+    # Update conversation timestamp
+    conversation.updated_at = ai_message.timestamp
+    await db.commit()
+    await db.refresh(conversation)
+    return ai_message
+
+def _has_api_key() -> bool:
+    api_key = os.getenv("OPENAI_API_KEY")
+    return bool(api_key) and not api_key.startswith("sk-placeholder")
+
+def _model() -> str:
+    return os.getenv("CHATBOT_MODEL", "gpt-3.5-turbo")
+
+def _completion_options(messages) -> dict:
+    return {
+        "model": _model(),
+        "messages": messages,
+        "max_tokens": 500,
+        "temperature": 0.7,
     }
 
-    return conversation_dict
-
-@router.post("/chat", response_model=ChatResponse)
+async def _complete(messages, user_content: str, key: Optional[str] = None) -> str:
+    if key is not None:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached
+    # Call OpenAI with fallback for demo
+    if not _has_api_key():
+        FALLBACK_REPLIES.inc("no_api_key")
+        return _fallback_reply(user_content)
+    try:
+        response = await gateway.complete(**_completion_options(messages))
+    except Unavailable as unavailable:
+        # Busy, timed out or circuit open: answer locally right away
+        FALLBACK_REPLIES.inc(unavailable.reason)
+        return _fallback_reply(user_content)
+    except Exception:
+        FALLBACK_REPLIES.inc("openai_error")
+        return _fallback_reply(user_content)
+    content = response.choices[0].message.content
+    # Canned fallbacks are never cached, so a recovered API is used right away
+    if key is not None and content:
+        response_cache.put(key, content)
+    return content
+
+async def _stream_text(text: str):
+    for piece in re.findall(r"\S+\s*|\s+", text):
+        yield piece
+        await asyncio.sleep(0)
+
+async def _stream_completion(messages, user_content: str, key: Optional[str] = None):
+    """Yield reply text as it arrives; cached and canned replies are streamed word by word"""
+    if key is not None:
+        cached = response_cache.get(key)
+        if cached is not None:
+            async for piece in _stream_text(cached):
+                yield piece
+            return
+    streamed = False
+    parts = []
+    if not _has_api_key():
+        FALLBACK_REPLIES.inc("no_api_key")
+    else:
+        try:
+            async for chunk in gateway.stream(**_completion_options(messages)):
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    streamed = True
+                    parts.append(delta)
+                    yield delta
+            if key is not None and parts:
+                response_cache.put(key, "".join(parts))
+            return
+        except Exception as openai_error:
+            if streamed:
+                # Keep the partial answer rather than splicing a canned reply onto it
+                print(f"OpenAI stream interrupted: {openai_error}")
+                return
+            FALLBACK_REPLIES.inc(openai_error.reason if isinstance(openai_error, Unavailable) else "openai_error")
+
+    async for piece in _stream_text(_fallback_reply(user_content)):
+        yield piece
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+def _rate_limit(request: Request, message: ChatMessageCreate):
+    """Shed excess chat traffic with 429 before anything is written"""
+    ip = client_ip(request)
+    if ip is not None:
+        ip_limiter.check(ip)
+    if message.conversation_id:
+        conversation_limiter.check(message.conversation_id)
+
+@router.post("/chat", response_model=ChatResponse, dependencies=[Depends(_rate_limit)])
 async def send_message(
     message: ChatMessageCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        # Find or create conversation first
-        conversation = None
-        if message.conversation_id:
-            conversation = db.query(ConversationModel).get(message.conversation_id)
-
-        if not conversation:
-            # Create new conversation for anonymous user
-            conversation = ConversationModel(
-                title="New Conversation",
-                user_id=None
-            )
-            db.add(conversation)
-            db.commit()
-            db.refresh(conversation)
-
-        # --- NEW: persist the user's message so conversation history includes user messages ---
-        user_msg = ChatMessageModel(
-            conversation_id=conversation.id,
-            content=message.content,
-            is_user=True,
-            timestamp=datetime.now(timezone.utc)
-        )
-        db.add(user_msg)
-        db.commit()
-        db.refresh(user_msg)
-        # -------------------------------------------------------------------------------
-
-        # After conversation is defined, create system message and handle chat
-        system_message = {
-            "role": "system",
-            "content": f"""You are the University of Guelph Rocketry Club's AI assistant. 
-            When referring to pages, use HTML anchor tags with this format:
-            <a href='/page-path' class='text-primary-600 hover:text-primary-800 transition-colors'>Link Text</a>
-
-            For example: To view our projects, visit <a href='/projects' class='text-primary-600 hover:text-primary-800 transition-colors'>Projects page</a>.
-
-            {get_team_context()}
-            {get_page_context()}
-
-            Always use HTML anchor tags for links, not markdown or plain URLs."""
-        }
-
-        messages = [system_message]
-
-        # Add recent conversation history (including the user message we just saved)
-        recent_messages = db.query(ChatMessageModel).filter(
-            ChatMessageModel.conversation_id == conversation.id
-        ).order_by(ChatMessageModel.timestamp.desc()).limit(10).all()
-
-        for msg in reversed(recent_messages):
-            role = "user" if msg.is_user else "assistant"
-            messages.append({"role": role, "content": msg.content})
-
-        # Add the current user message (already saved; ok to append again)
-        messages.append({"role": "user", "content": message.content})
-
-        # Call OpenAI with fallback for demo
-        try:
-            # Check if we have a valid API key
-            api_key = os.getenv("OPENAI_API_KEY")
-            if not api_key or api_key.startswith("sk-placeholder"):
-                raise Exception("No valid OpenAI API key available")
-                
-            response = await client.chat.completions.create(
-                model=os.getenv("CHATBOT_MODEL", "gpt-3.5-turbo"),
-                messages=messages,
-                max_tokens=500,
-                temperature=0.7
+        conversation, user_msg = await _start_turn(db, message)
+        # FAQs are answered locally; only open questions reach the model
+        ai_response_content = intents.answer(message.content)
+        if ai_response_content is None:
+            messages, key = await _build_prompt(db, conversation, message)
+            ai_response_content = await _complete(messages, message.content, key)
+        ai_message = await _save_reply(db, conversation, ai_response_content)
+
+        # Delta protocol: send back only the messages the client hasn't seen,
+        # never the whole history
+        if message.last_message_id is not None:
+            result = await db.execute(
+                select(ChatMessageModel)
+                .where(
+                    ChatMessageModel.conversation_id == conversation.id,
+                    ChatMessageModel.id > message.last_message_id
+                )
+                .order_by(ChatMessageModel.id.asc())
             )
-            ai_response_content = response.choices[0].message.content
-        except Exception as openai_error:
-            # Fallback response system for demo purposes
-            user_message_lower = message.content.lower()
-            
-            if any(word in user_message_lower for word in ['team', 'member', 'executive', 'lead']):
-                ai_response_content = f"""**{CLUB_INFO['name']}** 🚀
-
-**Our Executive Team:**
-• **Darren**: Club President
-• **Celina**: Vice President  
-• **Rahma**: Advisor
-• **Aban**: Finance
-• **Marko**: Rocketry Team Lead
-• **Nick**: Software Team Lead
-• **Tylen**: Avionics Team Lead
-• **Yassin**: Outreach Lead
-
-**Our Departments:**
-• Software
-• Avionics  
-• Rocketry
-• Finance
-
-Visit our <a href='/team' class='text-primary-600 hover:text-primary-800 transition-colors'>Team page</a> to learn more!
-
-**Connect with us:**
-📱 [Discord]({CLUB_INFO['social_links']['discord']})
-💼 [LinkedIn]({CLUB_INFO['social_links']['linkedin']})
-📸 [Instagram]({CLUB_INFO['social_links']['instagram']})"""
-            
-            elif any(word in user_message_lower for word in ['project', 'rocket', 'competition', 'cubesat']):
-                ai_response_content = f"""🚀 **{CLUB_INFO['name']} Projects:**
-
-**Current Projects:**
-🛰️ **CubeSat Development** - Working on a CubeSat that surveys land
-🚀 **Rocket Launches** - Building and launching rockets for competitions and learning
-📚 **Educational Programs** - Teaching UofG students about rocketry and CubeSat technology
-🔬 **Research & Development** - Advancing aerospace technology for students
-
-**Our Mission:** {CLUB_INFO['vision']}
-
-Check out our <a href='/projects' class='text-primary-600 hover:text-primary-800 transition-colors'>Projects page</a> for more details!
-
-**Join our community:**
-📱 [Discord]({CLUB_INFO['social_links']['discord']})
-💼 [LinkedIn]({CLUB_INFO['social_links']['linkedin']})
-📸 [Instagram]({CLUB_INFO['social_links']['instagram']})"""
-            
-            elif any(word in user_message_lower for word in ['join', 'member', 'how to']):
-                ai_response_content = f"""Welcome to **{CLUB_INFO['name']}**! 🚀
-
-**Our Mission:** {CLUB_INFO['vision']}
-
-**How to Join:**
-• Visit our <a href='/join' class='text-primary-600 hover:text-primary-800 transition-colors'>Join Us page</a>
-• Join our Discord community: [{CLUB_INFO['social_links']['discord']}]({CLUB_INFO['social_links']['discord']})
-• No prior experience required - all UofG students welcome!
-
-**Our Departments:**
-🖥️ **Software** - Flight computers, data analysis, mission control
-⚡ **Avionics** - Navigation, telemetry, electronic systems  
-🚀 **Rocketry** - Rocket design, propulsion, recovery systems
-💰 **Finance** - Budget management and funding
-
-**What You'll Get:**
-• Hands-on rocketry and CubeSat experience
-• Competition opportunities
-• Real aerospace engineering projects
-• Community of passionate students
-
-**Connect with us:**
-📱 [Discord]({CLUB_INFO['social_links']['discord']})
-💼 [LinkedIn]({CLUB_INFO['social_links']['linkedin']})
-📸 [Instagram]({CLUB_INFO['social_links']['instagram']})"""
-            
-            elif any(word in user_message_lower for word in ['sponsor', 'partnership', 'support']):
-                ai_response_content = """Thank you for your interest in supporting the University of Guelph Rocketry Club! 🤝
-
-**Sponsorship Opportunities:**
-• Equipment and materials support
-• Competition funding
-• Educational workshops and mentorship
-• Industry partnership programs
-
-**Benefits for Sponsors:**
-• Brand visibility at competitions and events
-• Access to talented engineering students
-• Community engagement opportunities
-• Supporting the next generation of aerospace engineers
-
-Learn more about our sponsorship packages on the <a href='/sponsors' class='text-primary-600 hover:text-primary-800 transition-colors'>Sponsors page</a>.
-
-For partnership inquiries, please contact our team through our website!"""
-            
-            else:
-                ai_response_content = f"""Hi! Welcome to **{CLUB_INFO['name']}**! 🚀
-
-**Our Mission:** {CLUB_INFO['vision']}
-
-**What We Do:**
-🛰️ CubeSat development and land surveying
-🚀 Rocket launches and competitions  
-📚 Educational rocketry programs for UofG students
-🔬 Hands-on aerospace learning experiences
-
-**Our Departments:**
-• Software • Avionics • Rocketry • Finance
-
-**Get Involved:**
-• <a href='/team' class='text-primary-600 hover:text-primary-800 transition-colors'>Meet our Team</a>
-• <a href='/projects' class='text-primary-600 hover:text-primary-800 transition-colors'>View Projects</a>  
-• <a href='/join' class='text-primary-600 hover:text-primary-800 transition-colors'>Join Us</a>
-• <a href='/sponsors' class='text-primary-600 hover:text-primary-800 transition-colors'>Become a Sponsor</a>
-
-**Connect with us:**
-📱 [Discord]({CLUB_INFO['social_links']['discord']})
-💼 [LinkedIn]({CLUB_INFO['social_links']['linkedin']}) 
-📸 [Instagram]({CLUB_INFO['social_links']['instagram']})
-
-Ask me anything about our club, projects, or how to get involved!"""
-
-        # Use UTC timestamp for consistency
-        current_time = datetime.now(timezone.utc)
-
-        ai_message = ChatMessageModel(
-            conversation_id=conversation.id,
-            content=ai_response_content,
-            is_user=False,
-            timestamp=current_time
-        )
-        db.add(ai_message)
-        db.commit()
-        db.refresh(ai_message)
-
-        # Update conversation timestamp
-        conversation.updated_at = ai_message.timestamp
-        db.commit()
-        db.refresh(conversation)
-
-        # Build response objects: return ai message and full conversation messages (plain dicts)
-        messages_for_response = db.query(ChatMessageModel).filter(
-            ChatMessageModel.conversation_id == conversation.id
-        ).order_by(ChatMessageModel.timestamp.asc()).all()
-
-        message_list = [
-            {
-                "id": m.id,
-                "conversation_id": m.conversation_id,
-                "content": m.content,
-                "is_user": m.is_user,
-                "timestamp": m.timestamp.isoformat()  # return ISO string
-            } for m in messages_for_response
-        ]
-
-        conversation_dict = {
-            "id": conversation.id,
-            "title": conversation.title,
-            "user_id": conversation.user_id,
-            "created_at": conversation.created_at.isoformat(),
-            "updated_at": conversation.updated_at.isoformat(),
-            "messages": message_list
+            new_messages = result.scalars().all()
+        else:
+            new_messages = [user_msg, ai_message]
+
+        return {
+            "message": _message_dict(ai_message),
+            "user_message": _message_dict(user_msg),
+            "conversation": _conversation_dict(conversation, new_messages)
         }
 
-        ai_message_dict = {
-            "id": ai_message.id,
-            "conversation_id": ai_message.conversation_id,
-            "content": ai_message.content,
-            "is_user": ai_message.is_user,
-            "timestamp": ai_message.timestamp.isoformat()
-        }
-
-        return {"message": ai_message_dict, "conversation": conversation_dict}
-
     except Exception as e:
         print(f"Detailed error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/chat/stream", dependencies=[Depends(_rate_limit)])
+async def stream_message(
+    message: ChatMessageCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Server-Sent Events variant of /chat.
+
+    Emits ``start`` (conversation id and the saved user message), one ``token``
+    event per chunk of reply text, then ``done`` with the persisted assistant
+    message, or ``error`` if the reply could not be completed.
+    """
+    conversation, user_msg = await _start_turn(db, message)
+    faq_reply = intents.answer(message.content)
+    if faq_reply is None:
+        messages, key = await _build_prompt(db, conversation, message)
+    conversation_id = conversation.id
+    start_payload = {"conversation_id": conversation_id, "user_message": _message_dict(user_msg)}
+
+    async def event_stream():
+        yield _sse("start", start_payload)
+        parts = []
+        try:
+            if faq_reply is not None:
+                deltas = _stream_text(faq_reply)
+            else:
+                deltas = _stream_completion(messages, message.content, key)
+            async for delta in deltas:
+                parts.append(delta)
+                yield _sse("token", {"content": delta})
+
+            # The request's session may already be closed once streaming starts
+            async with AsyncSessionLocal() as session:
+                conversation = await session.get(ConversationModel, conversation_id)
+                ai_message = await _save_reply(session, conversation, "".join(parts))
+            yield _sse("done", {"message": _message_dict(ai_message)})
+        except Exception as e:
+            print(f"Detailed error: {str(e)}")
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.delete("/conversations/{conversation_id}")
-def delete_conversation(
+async def delete_conversation(
     conversation_id: int,
     # Remove authentication requirement
     # current_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    conversation = db.query(ConversationModel).filter(
-        ConversationModel.id == conversation_id
-    ).first()
-    
-    if conversation is None:
-        raise HTTPException(status_code=404, detail="Conversation not found")
+    conversation = await _get_conversation_or_404(db, conversation_id)
     
-    # Delete all messages in the conversation
-    db.query(ChatMessageModel).filter(
-        ChatMessageModel.conversation_id == conversation_id
-    ).delete()
-    
-    # Delete the conversation
-    db.delete(conversation)
-    db.commit()
+    # Its messages are removed by ON DELETE CASCADE
+    await db.delete(conversation)
+    await db.commit()
     
     return {"message": "Conversation deleted successfully"}
 
 @router.get("/conversations/{conversation_id}/messages", response_model=List[ChatMessage])
-def get_conversation_messages(
+async def get_conversation_messages(
     conversation_id: int,
+    before: Optional[int] = None,
+    limit: int = 50,
     # Remove auth requirement so anonymous usage works
     # current_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    conversation = db.query(ConversationModel).filter(
-        ConversationModel.id == conversation_id
-    ).first()
-    
-    if conversation is None:
-        raise HTTPException(status_code=404, detail="Conversation not found")
+    """Return up to ``limit`` messages older than message id ``before`` (newest page by default), oldest first"""
+    await _get_conversation_or_404(db, conversation_id)
     
-    messages = db.query(ChatMessageModel).filter(
-        ChatMessageModel.conversation_id == conversation_id
-    ).order_by(ChatMessageModel.timestamp.asc()).all()
+    query = select(ChatMessageModel).where(ChatMessageModel.conversation_id == conversation_id)
+    if before is not None:
+        query = query.where(ChatMessageModel.id < before)
+    result = await db.execute(query.order_by(ChatMessageModel.id.desc()).limit(max(limit, 0)))
+    messages = reversed(result.scalars().all())
     
     # return list of plain dicts (Pydantic will parse)
-    return [
-        {
-            "id": m.id,
-            "conversation_id": m.conversation_id,
-            "content": m.content,
-            "is_user": m.is_user,
-            "timestamp": m.timestamp
-        } for m in messages
-    ]
\ No newline at end of file
+    return [_message_dict(m) for m in messages]
\ No newline at end of file
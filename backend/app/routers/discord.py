@@ -1,12 +1,13 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+from typing import Optional
 import os
 
 router = APIRouter()
 
 class DiscordInvite(BaseModel):
     invite_url: str
-    expires_at: str = None
+    expires_at: Optional[str] = None
 
 @router.get("/invite", response_model=DiscordInvite)
 def get_discord_invite():
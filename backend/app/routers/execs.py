@@ -1,20 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from typing import List
 from ..db import get_db
 from ..models import Executive as ExecutiveModel
 from ..schemas import Executive, ExecutiveCreate
+from ..read_model import read_model
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Executive])
-def get_executives(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    execs = db.query(ExecutiveModel).offset(skip).limit(limit).all()
-    return execs
+def get_executives(request: Request, skip: int = 0, limit: int = 100):
+    return read_model.list_response("execs", request, skip, limit)
 
 @router.get("/{exec_id}", response_model=Executive)
-def get_executive(exec_id: int, db: Session = Depends(get_db)):
-    exec = db.query(ExecutiveModel).filter(ExecutiveModel.id == exec_id).first()
+def get_executive(exec_id: int, request: Request):
+    exec = read_model.item_response("execs", exec_id, request)
     if exec is None:
         raise HTTPException(status_code=404, detail="Executive not found")
     return exec
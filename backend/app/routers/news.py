@@ -1,23 +1,62 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from ..db import get_db
+from typing import List, Optional
+from ..db import get_db, get_async_db
 from ..models import NewsArticle as NewsModel
 from ..schemas import NewsArticle, NewsCreate
+from ..conditional import conditional_response_async, make_etag
+from ..pagination import keyset_page_async, NEXT_CURSOR_HEADER
 
 router = APIRouter()
 
+def _serialize(articles) -> bytes:
+    return b"[" + b",".join(
+        NewsArticle.model_validate(article, from_attributes=True).model_dump_json().encode()
+        for article in articles
+    ) + b"]"
+
 @router.get("/", response_model=List[NewsArticle])
-def get_news(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    news = db.query(NewsModel).order_by(NewsModel.published_at.desc()).offset(skip).limit(limit).all()
-    return news
+async def get_news(
+    request: Request,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Articles are append-only, so row count plus the newest row identify the table state
+    result = await db.execute(
+        select(func.count(NewsModel.id), func.max(NewsModel.published_at), func.max(NewsModel.id))
+    )
+    count, last_published, last_id = result.one()
+    etag = make_etag("news", count, last_published, last_id, cursor, skip, limit)
+
+    next_cursor = None
+    async def render():
+        nonlocal next_cursor
+        news, next_cursor = await keyset_page_async(
+            db, select(NewsModel), NewsModel.published_at, NewsModel.id, cursor, limit, skip
+        )
+        return _serialize(news)
+
+    response = await conditional_response_async(request, etag, last_published, render)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
 
 @router.get("/{news_id}", response_model=NewsArticle)
-def get_news_article(news_id: int, db: Session = Depends(get_db)):
-    article = db.query(NewsModel).filter(NewsModel.id == news_id).first()
+async def get_news_article(news_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    article = await db.get(NewsModel, news_id)
     if article is None:
         raise HTTPException(status_code=404, detail="News article not found")
-    return article
+
+    async def render():
+        return NewsArticle.model_validate(article, from_attributes=True).model_dump_json().encode()
+
+    return await conditional_response_async(
+        request, make_etag("news", article.id, article.published_at), article.published_at, render
+    )
 
 @router.post("/", response_model=NewsArticle)
 def create_news_article(article: NewsCreate, db: Session = Depends(get_db)):
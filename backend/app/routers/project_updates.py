@@ -1,46 +1,68 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional
 from ..db import get_db
-from ..models import ProjectUpdate as ProjectUpdateModel, Project as ProjectModel, Team as TeamModel
+from ..models import ProjectUpdate as ProjectUpdateModel, Project as ProjectModel, Team as TeamModel, user_team_association
 from ..schemas import ProjectUpdate, ProjectUpdateCreate
-from ..auth import get_current_active_user
+from ..auth import Principal, get_current_active_user
+from ..pagination import keyset_page, NEXT_CURSOR_HEADER
 
 router = APIRouter()
 
+def _updates_query(db: Session):
+    # Every response embeds the author; load it in the same statement
+    return db.query(ProjectUpdateModel).options(joinedload(ProjectUpdateModel.author))
+
+def _is_member(db: Session, user_id: int, team_id: int) -> bool:
+    return db.execute(
+        select(user_team_association.c.user_id).where(
+            user_team_association.c.user_id == user_id,
+            user_team_association.c.team_id == team_id,
+        ).limit(1)
+    ).first() is not None
+
 @router.get("/", response_model=List[ProjectUpdate])
 def get_project_updates(
+    response: Response,
     project_id: int = None,
     team_id: int = None,
+    cursor: Optional[str] = None,
     skip: int = 0, 
     limit: int = 100, 
     db: Session = Depends(get_db)
 ):
-    query = db.query(ProjectUpdateModel)
+    query = _updates_query(db)
     
     if project_id:
         query = query.filter(ProjectUpdateModel.project_id == project_id)
     if team_id:
         query = query.filter(ProjectUpdateModel.team_id == team_id)
     
-    updates = query.order_by(ProjectUpdateModel.created_at.desc()).offset(skip).limit(limit).all()
+    updates, next_cursor = keyset_page(
+        db, query, ProjectUpdateModel.created_at, ProjectUpdateModel.id, cursor, limit, skip
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return updates
 
 @router.get("/my-updates", response_model=List[ProjectUpdate])
 def get_my_updates(
-    current_user = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     # Get updates from user's teams
-    user_team_ids = [team.id for team in current_user.teams]
-    updates = db.query(ProjectUpdateModel).filter(
+    user_team_ids = select(user_team_association.c.team_id).where(
+        user_team_association.c.user_id == current_user.id
+    )
+    updates = _updates_query(db).filter(
         ProjectUpdateModel.team_id.in_(user_team_ids)
     ).order_by(ProjectUpdateModel.created_at.desc()).limit(50).all()
     return updates
 
 @router.get("/{update_id}", response_model=ProjectUpdate)
 def get_project_update(update_id: int, db: Session = Depends(get_db)):
-    update = db.query(ProjectUpdateModel).filter(ProjectUpdateModel.id == update_id).first()
+    update = _updates_query(db).filter(ProjectUpdateModel.id == update_id).first()
     if update is None:
         raise HTTPException(status_code=404, detail="Project update not found")
     return update
@@ -48,7 +70,7 @@ def get_project_update(update_id: int, db: Session = Depends(get_db)):
 @router.post("/", response_model=ProjectUpdate)
 def create_project_update(
     update: ProjectUpdateCreate,
-    current_user = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     # Verify project exists
@@ -57,7 +79,7 @@ def create_project_update(
         raise HTTPException(status_code=404, detail="Project not found")
     
     # Verify user is member of project's team
-    if project.team not in current_user.teams:
+    if not _is_member(db, current_user.id, project.team_id):
         raise HTTPException(status_code=403, detail="Not authorized to update this project")
     
     # Create update
@@ -80,7 +102,7 @@ def create_project_update(
 @router.get("/team/{team_id}", response_model=List[ProjectUpdate])
 def get_team_updates(
     team_id: int,
-    current_user = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     # Verify user is member of the team
@@ -88,10 +110,10 @@ def get_team_updates(
     if team is None:
         raise HTTPException(status_code=404, detail="Team not found")
     
-    if team not in current_user.teams:
+    if not _is_member(db, current_user.id, team_id):
         raise HTTPException(status_code=403, detail="Not authorized to view this team's updates")
     
-    updates = db.query(ProjectUpdateModel).filter(
+    updates = _updates_query(db).filter(
         ProjectUpdateModel.team_id == team_id
     ).order_by(ProjectUpdateModel.created_at.desc()).all()
     
@@ -1,26 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from typing import List
 from ..db import get_db
-from ..models import Project as ProjectModel
+from ..models import Project as ProjectModel, Team as TeamModel
 from ..schemas import Project, ProjectCreate
+from ..read_model import read_model
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Project])
-def get_projects(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    projects = db.query(ProjectModel).offset(skip).limit(limit).all()
-    return projects
+def get_projects(request: Request, skip: int = 0, limit: int = 100):
+    return read_model.list_response("projects", request, skip, limit)
 
 @router.get("/{project_id}", response_model=Project)
-def get_project(project_id: int, db: Session = Depends(get_db)):
-    project = db.query(ProjectModel).filter(ProjectModel.id == project_id).first()
+def get_project(project_id: int, request: Request):
+    project = read_model.item_response("projects", project_id, request)
     if project is None:
         raise HTTPException(status_code=404, detail="Project not found")
     return project
 
 @router.post("/", response_model=Project)
 def create_project(project: ProjectCreate, db: Session = Depends(get_db)):
+    if project.team_id is not None and db.get(TeamModel, project.team_id) is None:
+        raise HTTPException(status_code=404, detail="Team not found")
     db_project = ProjectModel(**project.dict())
     db.add(db_project)
     db.commit()
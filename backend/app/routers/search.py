@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from ..db import get_async_db
+from ..schemas import SearchResult
+from .. import search as search_index
+
+router = APIRouter()
+
+@router.get("", response_model=List[SearchResult])
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    types: Optional[str] = Query(None, description="Comma-separated: news, project, update"),
+    limit: int = Query(20, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Full-text search ranked by relevance; the last word matches as a prefix."""
+    if not search_index.available:
+        raise HTTPException(status_code=503, detail="Search is not available")
+
+    selected = search_index.SOURCE_TYPES
+    if types:
+        selected = tuple(t.strip() for t in types.split(",") if t.strip())
+        unknown = set(selected) - set(search_index.SOURCE_TYPES)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown search types: {', '.join(sorted(unknown))}")
+
+    return await search_index.search(db, q, selected, limit)
\ No newline at end of file
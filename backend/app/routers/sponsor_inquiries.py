@@ -1,34 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from ..db import get_db
 from ..models import SponsorInquiry as SponsorInquiryModel
 from ..schemas import SponsorInquiry, SponsorInquiryCreate
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import os
+from ..pagination import keyset_page, NEXT_CURSOR_HEADER
+from ..mailer import enqueue_email, outbox
 
 router = APIRouter()
 
-def send_sponsor_inquiry_notification(inquiry_data: SponsorInquiryCreate):
-    """Send email notification for new sponsor inquiry"""
-    try:
-        smtp_server = os.getenv("SMTP_SERVER")
-        smtp_port = int(os.getenv("SMTP_PORT", 587))
-        smtp_username = os.getenv("SMTP_USERNAME")
-        smtp_password = os.getenv("SMTP_PASSWORD")
-        contact_email_to = os.getenv("CONTACT_EMAIL_TO")
-        
-        if not all([smtp_server, smtp_username, smtp_password, contact_email_to]):
-            return False
-            
-        msg = MIMEMultipart()
-        msg['From'] = smtp_username
-        msg['To'] = contact_email_to
-        msg['Subject'] = f"New Sponsor Inquiry: {inquiry_data.company_name}"
-        
-        body = f"""
+def sponsor_inquiry_email(inquiry_data: SponsorInquiryCreate):
+    """Build the notification email for a new sponsor inquiry"""
+    subject = f"New Sponsor Inquiry: {inquiry_data.company_name}"
+    body = f"""
         New sponsor inquiry received:
         
         Company: {inquiry_data.company_name}
@@ -41,39 +25,37 @@ def send_sponsor_inquiry_notification(inquiry_data: SponsorInquiryCreate):
         
         Please follow up with this potential sponsor.
         """
-        
-        msg.attach(MIMEText(body, 'plain'))
-        
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()
-        server.login(smtp_username, smtp_password)
-        server.send_message(msg)
-        server.quit()
-        
-        return True
-    except Exception as e:
-        print(f"Failed to send sponsor inquiry email: {e}")
-        return False
+    return subject, body
 
 @router.post("/", response_model=SponsorInquiry)
 def create_sponsor_inquiry(
     inquiry: SponsorInquiryCreate, 
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     db_inquiry = SponsorInquiryModel(**inquiry.dict())
     db.add(db_inquiry)
+    # Queue the notification in the same transaction so it can't be lost
+    enqueue_email(db, "sponsor_inquiry", *sponsor_inquiry_email(inquiry))
     db.commit()
     db.refresh(db_inquiry)
-    
-    # Send email notification in background
-    background_tasks.add_task(send_sponsor_inquiry_notification, inquiry)
+    outbox.wake()
     
     return db_inquiry
 
 @router.get("/", response_model=List[SponsorInquiry])
-def get_sponsor_inquiries(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    inquiries = db.query(SponsorInquiryModel).order_by(SponsorInquiryModel.created_at.desc()).offset(skip).limit(limit).all()
+def get_sponsor_inquiries(
+    response: Response,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    inquiries, next_cursor = keyset_page(
+        db, db.query(SponsorInquiryModel), SponsorInquiryModel.created_at, SponsorInquiryModel.id,
+        cursor, limit, skip
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return inquiries
 
 @router.patch("/{inquiry_id}/status")
@@ -1,20 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from typing import List
 from ..db import get_db
 from ..models import Sponsor as SponsorModel
 from ..schemas import Sponsor, SponsorCreate
+from ..read_model import read_model
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Sponsor])
-def get_sponsors(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    sponsors = db.query(SponsorModel).offset(skip).limit(limit).all()
-    return sponsors
+def get_sponsors(request: Request, skip: int = 0, limit: int = 100):
+    return read_model.list_response("sponsors", request, skip, limit)
 
 @router.get("/{sponsor_id}", response_model=Sponsor)
-def get_sponsor(sponsor_id: int, db: Session = Depends(get_db)):
-    sponsor = db.query(SponsorModel).filter(SponsorModel.id == sponsor_id).first()
+def get_sponsor(sponsor_id: int, request: Request):
+    sponsor = read_model.item_response("sponsors", sponsor_id, request)
     if sponsor is None:
         raise HTTPException(status_code=404, detail="Sponsor not found")
     return sponsor
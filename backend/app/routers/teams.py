@@ -1,28 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session, selectinload
 from typing import List
 from ..db import get_db
 from ..models import Team as TeamModel, User as UserModel, user_team_association
 from ..schemas import Team, TeamCreate, User
-from ..auth import get_current_active_user, get_admin_user
+from ..auth import Principal, get_current_active_user, get_admin_user
+from ..read_model import read_model
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Team])
-def get_teams(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    teams = db.query(TeamModel).offset(skip).limit(limit).all()
-    return teams
+def get_teams(request: Request, skip: int = 0, limit: int = 100):
+    return read_model.list_response("teams", request, skip, limit)
 
 @router.get("/my-teams", response_model=List[Team])
 def get_my_teams(
-    current_user: UserModel = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    return current_user.teams
+    # Load the user's teams and all their members in two statements
+    return db.query(TeamModel).join(
+        user_team_association, user_team_association.c.team_id == TeamModel.id
+    ).filter(
+        user_team_association.c.user_id == current_user.id
+    ).options(selectinload(TeamModel.members)).all()
 
 @router.get("/{team_id}", response_model=Team)
-def get_team(team_id: int, db: Session = Depends(get_db)):
-    team = db.query(TeamModel).filter(TeamModel.id == team_id).first()
+def get_team(team_id: int, request: Request):
+    team = read_model.item_response("teams", team_id, request)
     if team is None:
         raise HTTPException(status_code=404, detail="Team not found")
     return team
@@ -31,8 +36,10 @@ def get_team(team_id: int, db: Session = Depends(get_db)):
 def create_team(
     team: TeamCreate, 
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
+    if team.team_lead_id is not None and db.get(UserModel, team.team_lead_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
     db_team = TeamModel(**team.dict())
     db.add(db_team)
     db.commit()
@@ -42,34 +49,38 @@ def create_team(
 @router.post("/{team_id}/join")
 def join_team(
     team_id: int,
-    current_user: UserModel = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     team = db.query(TeamModel).filter(TeamModel.id == team_id).first()
     if team is None:
         raise HTTPException(status_code=404, detail="Team not found")
     
-    if team in current_user.teams:
+    # Membership changes go through the ORM row, so the commit hooks see them
+    user = db.get(UserModel, current_user.id)
+    if team in user.teams:
         raise HTTPException(status_code=400, detail="Already a member of this team")
     
-    current_user.teams.append(team)
+    user.teams.append(team)
     db.commit()
     return {"message": "Successfully joined team"}
 
 @router.post("/{team_id}/leave")
 def leave_team(
     team_id: int,
-    current_user: UserModel = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     team = db.query(TeamModel).filter(TeamModel.id == team_id).first()
     if team is None:
         raise HTTPException(status_code=404, detail="Team not found")
     
-    if team not in current_user.teams:
+    # Membership changes go through the ORM row, so the commit hooks see them
+    user = db.get(UserModel, current_user.id)
+    if team not in user.teams:
         raise HTTPException(status_code=400, detail="Not a member of this team")
     
-    current_user.teams.remove(team)
+    user.teams.remove(team)
     db.commit()
     return {"message": "Successfully left team"}
 
@@ -85,7 +96,7 @@ def add_team_member(
     team_id: int,
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     team = db.query(TeamModel).filter(TeamModel.id == team_id).first()
     user = db.query(UserModel).filter(UserModel.id == user_id).first()
@@ -107,7 +118,7 @@ def remove_team_member(
     team_id: int,
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     team = db.query(TeamModel).filter(TeamModel.id == team_id).first()
     user = db.query(UserModel).filter(UserModel.id == user_id).first()
@@ -27,6 +27,10 @@ class User(UserBase):
     class Config:
         orm_mode = True
 
+class UserStatusUpdate(BaseModel):
+    is_active: Optional[bool] = None
+    is_admin: Optional[bool] = None
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -178,6 +182,7 @@ class ChatMessageBase(BaseModel):
 
 class ChatMessageCreate(ChatMessageBase):
     conversation_id: Optional[int] = None
+    last_message_id: Optional[int] = None  # newest message the client already has
 
 class ChatMessage(ChatMessageBase):
     id: int
@@ -206,4 +211,13 @@ class Conversation(ConversationBase):
 
 class ChatResponse(BaseModel):
     message: ChatMessage
-    conversation: Conversation
\ No newline at end of file
+    user_message: Optional[ChatMessage] = None
+    conversation: Conversation  # messages holds only what the client hasn't seen yet
+
+class SearchResult(BaseModel):
+    type: str  # "news", "project", "update"
+    id: int
+    title: str  # HTML-escaped, with matches wrapped in <mark>
+    snippet: str
+    score: float
+    timestamp: Optional[datetime] = None
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""Site-wide full-text search over news, projects and project updates.
+
+On SQLite each source table is mirrored by an external-content FTS5 table
+kept current by triggers; on Postgres a stored, generated ``tsvector`` column
+with a GIN index plays the same role. Either way the index is maintained
+incrementally by the database itself, so no application code path can
+forget to update it. The indexes are created by migration 10 (see
+app.migrations); ``install`` only checks that they are there.
+"""
+import html
+import re
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import DateTime, Float, Integer, String, text
+
+# Markers the database wraps around matches; the text is HTML-escaped
+# afterwards and only these become <mark> tags.
+_START, _STOP = "\x02", "\x03"
+
+SNIPPET_TOKENS = 16
+
+
+class Source(NamedTuple):
+    type: str
+    table: str
+    title: str
+    body: str
+    timestamp: str
+
+
+SOURCES = (
+    Source("news", "news", "title", "content", "published_at"),
+    Source("project", "projects", "title", "description", "created_at"),
+    Source("update", "project_updates", "title", "content", "created_at"),
+)
+SOURCE_TYPES = tuple(source.type for source in SOURCES)
+
+# Set by install(); the router answers 503 when the database can't search
+available = False
+
+
+def install(bind):
+    """Check that the search indexes exist; migration 10 creates them."""
+    global available
+    with bind.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            found = set(conn.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%_fts'"
+            ).scalars())
+            missing = [source.table for source in SOURCES if f"{source.table}_fts" not in found]
+        elif conn.dialect.name == "postgresql":
+            found = set(conn.exec_driver_sql(
+                "SELECT table_name FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND column_name = 'search_vector'"
+            ).scalars())
+            missing = [source.table for source in SOURCES if source.table not in found]
+        else:
+            print(f"Full-text search is not supported on {conn.dialect.name}")
+            available = False
+            return
+    if missing:
+        print(f"Full-text search unavailable: no search index on {', '.join(missing)}")
+    available = not missing
+
+
+def _terms(query: str) -> List[Tuple[str, bool]]:
+    """Split user input into (word, is_prefix) pairs.
+
+    Words ending in ``*`` are prefix matches, and so is the last word unless
+    it is followed by a space, so results update as the user types.
+    """
+    matches = list(re.finditer(r"(\w+)(\*?)", query))
+    return [
+        (match.group(1).lower(), bool(match.group(2)) or (i == len(matches) - 1 and not query.endswith(" ")))
+        for i, match in enumerate(matches)
+    ]
+
+
+def fts5_query(query: str) -> Optional[str]:
+    # Quoting every word keeps FTS5 operators (AND, NEAR, column filters) out of user input
+    terms = _terms(query)
+    if not terms:
+        return None
+    return " ".join(f'"{word}"' + ("*" if prefix else "") for word, prefix in terms)
+
+
+def tsquery(query: str) -> Optional[str]:
+    terms = _terms(query)
+    if not terms:
+        return None
+    return " & ".join(word + (":*" if prefix else "") for word, prefix in terms)
+
+
+def _mark(value: Optional[str]) -> str:
+    escaped = html.escape(value or "")
+    return escaped.replace(_START, "<mark>").replace(_STOP, "</mark>")
+
+
+def _sqlite_sql(source: Source) -> str:
+    fts = f"{source.table}_fts"
+    return (
+        f"SELECT s.id AS id, -bm25({fts}, 4.0, 1.0) AS score, "
+        f"highlight({fts}, 0, '{_START}', '{_STOP}') AS title, "
+        f"snippet({fts}, 1, '{_START}', '{_STOP}', '…', {SNIPPET_TOKENS}) AS snippet, "
+        f"s.{source.timestamp} AS timestamp "
+        f"FROM {fts} JOIN {source.table} s ON s.id = {fts}.rowid "
+        f"WHERE {fts} MATCH :query ORDER BY bm25({fts}, 4.0, 1.0) LIMIT :limit"
+    )
+
+
+def _postgres_sql(source: Source) -> str:
+    # Rank on the index first; ts_headline re-parses text, so run it on the winners only
+    options = f"StartSel={_START}, StopSel={_STOP}"
+    return (
+        f"WITH q AS (SELECT to_tsquery('english', :query) AS query), "
+        f"hits AS (SELECT s.id, ts_rank_cd(s.search_vector, q.query) AS score "
+        f"FROM {source.table} s, q WHERE s.search_vector @@ q.query "
+        f"ORDER BY score DESC LIMIT :limit) "
+        f"SELECT s.id AS id, hits.score AS score, "
+        f"ts_headline('english', coalesce(s.{source.title}, ''), q.query, '{options}, HighlightAll=true') AS title, "
+        f"ts_headline('english', coalesce(s.{source.body}, ''), q.query, "
+        f"'{options}, MaxWords={SNIPPET_TOKENS}, MinWords=8, MaxFragments=1, FragmentDelimiter=…') AS snippet, "
+        f"s.{source.timestamp} AS timestamp "
+        f"FROM hits JOIN {source.table} s ON s.id = hits.id, q ORDER BY hits.score DESC"
+    )
+
+
+async def search(db, query: str, types: Sequence[str] = SOURCE_TYPES, limit: int = 20) -> List[dict]:
+    """Best matches across ``types``, highest score first."""
+    postgres = db.get_bind().dialect.name == "postgresql"
+    match = tsquery(query) if postgres else fts5_query(query)
+    if match is None:
+        return []
+
+    results = []
+    for source in SOURCES:
+        if source.type not in types:
+            continue
+        sql = _postgres_sql(source) if postgres else _sqlite_sql(source)
+        statement = text(sql).columns(
+            id=Integer, score=Float, title=String, snippet=String, timestamp=DateTime(timezone=True)
+        )
+        rows = await db.execute(statement, {"query": match, "limit": limit})
+        for row in rows.mappings():
+            results.append({
+                "type": source.type,
+                "id": row["id"],
+                "title": _mark(row["title"]),
+                "snippet": _mark(row["snippet"]),
+                "score": float(row["score"]),
+                "timestamp": row["timestamp"],
+            })
+    # bm25 / ts_rank_cd scores are per-table, but close enough to interleave
+    results.sort(key=lambda result: result["score"], reverse=True)
+    return results[:limit]
\ No newline at end of file
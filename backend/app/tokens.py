@@ -0,0 +1,36 @@
+"""Local token counting for prompt budgeting.
+
+Uses tiktoken when it is installed and its encoding is available offline,
+otherwise a ~4 characters-per-token estimate, which is close enough for
+budgeting English prompts.
+"""
+import math
+import os
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # tiktoken fetches encodings on first use; treat an offline host as "not installed"
+        return None
+
+
+def count_tokens(text: str, model: str = None) -> int:
+    if not text:
+        return 0
+    encoding = _encoding(model or os.getenv("CHATBOT_MODEL", "gpt-3.5-turbo"))
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text, disallowed_special=()))
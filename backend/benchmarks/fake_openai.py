@@ -0,0 +1,101 @@
+"""A stand-in for the OpenAI chat completions API with configurable latency.
+
+Chat workloads run against this instead of the real API so they are free,
+repeatable and measure our code rather than OpenAI's. It serves
+``POST /v1/chat/completions`` (plain and ``stream=true``) and can be mounted
+in-process or run on its own::
+
+    python -m benchmarks.fake_openai --port 8099
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+# Time to first token, then the delay between streamed tokens
+FIRST_TOKEN_MS = float(os.getenv("FAKE_OPENAI_FIRST_TOKEN_MS", "300"))
+TOKEN_INTERVAL_MS = float(os.getenv("FAKE_OPENAI_TOKEN_INTERVAL_MS", "10"))
+REPLY = (
+    "The Guelph Rocketry Club designs, builds and launches high-power rockets. "
+    "Members work across propulsion, avionics, recovery and outreach, and new "
+    "members are welcome to join any team through our Discord."
+)
+
+app = FastAPI()
+stats = {"requests": 0, "streams": 0}
+
+
+def _chunk(completion_id: str, created: int, model: str, delta: dict, finish_reason=None) -> str:
+    payload = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": created,
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "gpt-3.5-turbo")
+    created = int(time.time())
+    stats["requests"] += 1
+    completion_id = f"chatcmpl-bench{stats['requests']}"
+    words = REPLY.split(" ")
+
+    if body.get("stream"):
+        stats["streams"] += 1
+
+        async def events():
+            await asyncio.sleep(FIRST_TOKEN_MS / 1000)
+            yield _chunk(completion_id, created, model, {"role": "assistant", "content": ""})
+            for i, word in enumerate(words):
+                if i:
+                    await asyncio.sleep(TOKEN_INTERVAL_MS / 1000)
+                yield _chunk(completion_id, created, model, {"content": word if i == 0 else " " + word})
+            yield _chunk(completion_id, created, model, {}, finish_reason="stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    await asyncio.sleep((FIRST_TOKEN_MS + TOKEN_INTERVAL_MS * len(words)) / 1000)
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": REPLY},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": len(words), "total_tokens": len(words)},
+    }
+
+
+def async_client(api_key: str = "sk-bench"):
+    """An ``AsyncOpenAI`` client whose requests are served in-process by :data:`app`."""
+    import httpx
+    from openai import AsyncOpenAI
+
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://fake-openai")
+    return AsyncOpenAI(api_key=api_key, base_url="http://fake-openai/v1", http_client=http_client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
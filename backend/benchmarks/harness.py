@@ -0,0 +1,177 @@
+"""Shared pieces of the benchmark suite: timing, percentiles and app targets.
+
+The app is driven either in-process through ``httpx.ASGITransport`` (no
+sockets, so the numbers isolate the application itself) or as a real
+``uvicorn`` server, optionally with several workers.
+"""
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager, contextmanager
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+        "p50_ms": round(pick(0.50) * 1000, 2),
+        "p95_ms": round(pick(0.95) * 1000, 2),
+        "p99_ms": round(pick(0.99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+class Recorder:
+    """Collects latencies and failures per endpoint label (e.g. ``GET /api/news/{id}``)."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.started = None
+        self.elapsed = 0.0
+
+    async def request(self, client, method: str, label: str, url: str, expect=(200,), **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            # Read streaming bodies to the end so SSE is timed to its last event
+            await response.aread()
+        except Exception:
+            self.latencies[label].append(time.perf_counter() - started)
+            self.errors[label] += 1
+            return None
+        self.latencies[label].append(time.perf_counter() - started)
+        if response.status_code not in expect:
+            self.errors[label] += 1
+        return response
+
+    def report(self) -> dict:
+        total = sum(len(samples) for samples in self.latencies.values())
+        endpoints = {}
+        for label in sorted(self.latencies):
+            stats = percentiles(self.latencies[label])
+            stats["errors"] = self.errors[label]
+            stats["throughput_rps"] = round(len(self.latencies[label]) / self.elapsed, 2) if self.elapsed else None
+            endpoints[label] = stats
+        return {
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "elapsed_s": round(self.elapsed, 3),
+            "throughput_rps": round(total / self.elapsed, 2) if self.elapsed else None,
+            "endpoints": endpoints,
+        }
+
+
+async def closed_loop(total: int, concurrency: int, task):
+    """Run ``task(i)`` for ``i in range(total)`` with at most ``concurrency`` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(i):
+        async with semaphore:
+            await task(i)
+
+    await asyncio.gather(*(limited(i) for i in range(total)))
+
+
+async def measure(recorder: Recorder, coro):
+    started = time.perf_counter()
+    try:
+        await coro
+    finally:
+        recorder.elapsed = time.perf_counter() - started
+
+
+def prepare_environment(database_path: str, **extra):
+    """Point the app at the benchmark database; must run before ``app`` is imported."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{database_path}"
+    # Set rather than cleared: the app's load_dotenv() would fill a missing one in from .env
+    os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{database_path}"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-placeholder")
+    os.environ.update({key: str(value) for key, value in extra.items()})
+
+
+@asynccontextmanager
+async def in_process_client(app=None, timeout=60.0):
+    """An httpx client wired straight into the app, with its lifespan running."""
+    import httpx
+
+    if app is None:
+        from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=timeout
+    ) as client:
+        yield client
+
+
+@asynccontextmanager
+async def http_client(base_url: str, timeout=60.0):
+    import httpx
+
+    limits = httpx.Limits(max_connections=1000, max_keepalive_connections=1000)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        yield client
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_http(url: str, timeout: float = 30.0):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not come up within {timeout:.0f}s")
+
+
+@contextmanager
+def uvicorn_server(app_path: str, port: int, env=None, workers: int = 1, probe: str = "/"):
+    """Run ``uvicorn app_path`` in a subprocess for the duration of the block."""
+    command = [
+        sys.executable, "-m", "uvicorn", app_path,
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning",
+    ]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env={**os.environ, **(env or {})})
+    try:
+        wait_for_http(f"http://127.0.0.1:{port}{probe}")
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""Login burst benchmark.
+
+Fires concurrent logins at the API in-process and, at the same time, polls a
+cheap public route to show that password hashing no longer starves
+unrelated requests. Prints latency percentiles as JSON.
+
+Run from the backend directory::
+
+    python -m benchmarks.login_burst --users 20 --requests 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from .harness import in_process_client, percentiles, prepare_environment
+
+
+async def run(args):
+    async with in_process_client() as client:
+        for i in range(args.users):
+            await client.post("/api/auth/register", json={
+                "email": f"bench{i}@example.com",
+                "username": f"bench{i}",
+                "full_name": "Bench User",
+                "password": "correct horse battery staple",
+            })
+
+        login_latencies, probe_latencies = [], []
+        semaphore = asyncio.Semaphore(args.concurrency)
+        done = asyncio.Event()
+
+        async def login(i):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/api/auth/login", json={
+                    "email": f"bench{i % args.users}@example.com",
+                    "password": "correct horse battery staple",
+                })
+                login_latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+
+        async def probe():
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/api/sponsors/")
+                probe_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+
+        prober = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await prober
+
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(args.requests / elapsed, 2),
+        "login": percentiles(login_latencies),
+        "public_route_during_burst": percentiles(probe_latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Point the app at a throwaway database before it is imported, whatever the environment says
+        prepare_environment(os.path.join(tmp, "bench.db"))
+        print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Run the benchmark workloads against a freshly seeded database.
+
+By default the app runs in-process behind ``httpx.ASGITransport``; with
+``--uvicorn`` it is started as a real server (``--workers`` processes), and
+``--url`` targets a server that is already running against a database
+seeded with ``python -m benchmarks.seed``. Chat workloads talk to the fake
+OpenAI backend in :mod:`benchmarks.fake_openai`, except with ``--url``.
+
+Results are printed (or written with ``--output``) as JSON, tagged with the
+current commit so runs can be diffed. The run exits non-zero if any request
+failed::
+
+    python -m benchmarks.run --output before.json
+    python -m benchmarks.run --workloads public_mix,chat --requests 500 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+from contextlib import ExitStack, redirect_stdout
+from datetime import datetime, timezone
+
+from . import harness
+from .seed import DEFAULT_SIZES, seed
+from .workloads import WORKLOADS
+
+
+async def run_workloads(client, args, sizes):
+    results = {}
+    for name in args.workloads:
+        # Each workload gets its own stream so adding one doesn't shift the others
+        rng = random.Random(f"{args.seed}:{name}")
+        requests = args.requests
+        if name == "chat":
+            requests = max(1, args.requests // 10)
+        recorder = await WORKLOADS[name](client, sizes, rng, requests, args.concurrency)
+        results[name] = recorder.report()
+        print(f"{name}: {results[name]['throughput_rps']} req/s, {results[name]['errors']} errors", file=sys.stderr)
+    return results
+
+
+async def in_process(args, sizes):
+    from app.main import app
+    from app.llm import gateway
+    from . import fake_openai
+
+    gateway.client = fake_openai.async_client()
+    async with harness.in_process_client(app) as client:
+        return await run_workloads(client, args, sizes)
+
+
+async def over_http(base_url, args, sizes):
+    async with harness.http_client(base_url) as client:
+        return await run_workloads(client, args, sizes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--workloads", default=",".join(WORKLOADS),
+        help=f"comma-separated subset of: {', '.join(WORKLOADS)}",
+    )
+    parser.add_argument("--requests", type=int, default=1000, help="requests per workload (chat: /10 conversations)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the seeded table sizes")
+    parser.add_argument("--uvicorn", action="store_true", help="run the app under uvicorn instead of in-process")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--url", help="benchmark an already running server instead")
+    parser.add_argument("--llm-latency-ms", type=float, default=300, help="fake OpenAI time to first token")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    args.workloads = [name.strip() for name in args.workloads.split(",") if name.strip()]
+    unknown = set(args.workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown workloads: {', '.join(sorted(unknown))}")
+    sizes = {name: max(1, int(size * args.scale)) for name, size in DEFAULT_SIZES.items()}
+
+    started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    with tempfile.TemporaryDirectory() as tmp, ExitStack() as stack:
+        if args.url:
+            mode = "url"
+            results = asyncio.run(over_http(args.url.rstrip("/"), args, sizes))
+        else:
+            database = os.path.join(tmp, "bench.db")
+            harness.prepare_environment(
+                database,
+                OPENAI_API_KEY="sk-bench",
+                FAKE_OPENAI_FIRST_TOKEN_MS=args.llm_latency_ms,
+                # Outbox emails stay queued; the flood measures the request path
+                SMTP_SERVER="",
+                # Every simulated client shares one address
+                CHAT_RATE_LIMIT_PER_IP_PER_MINUTE=0,
+                CHAT_RATE_LIMIT_PER_CONVERSATION_PER_MINUTE=0,
+                # Seeded conversations span years; keep them all in the hot tables
+                CHAT_RETENTION_DAYS=0,
+            )
+            seed(sizes, args.seed)
+
+            if args.uvicorn:
+                mode = f"uvicorn x{args.workers}"
+                openai_port = harness.free_port()
+                stack.enter_context(harness.uvicorn_server(
+                    "benchmarks.fake_openai:app", openai_port, probe="/docs"
+                ))
+                base_url = stack.enter_context(harness.uvicorn_server(
+                    "app.main:app", harness.free_port(), workers=args.workers,
+                    env={"OPENAI_BASE_URL": f"http://127.0.0.1:{openai_port}/v1"},
+                ))
+                results = asyncio.run(over_http(base_url, args, sizes))
+            else:
+                mode = "in-process"
+                # The app's own log lines (e.g. applied migrations) would corrupt the JSON on stdout
+                with redirect_stdout(sys.stderr):
+                    results = asyncio.run(in_process(args, sizes))
+
+    report = {
+        "meta": {
+            "commit": harness.git_commit(),
+            "started_at": started_at,
+            "mode": mode,
+            "python": platform.python_version(),
+            "seed": args.seed,
+            "sizes": sizes,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "workloads": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    # Failed requests make the latencies meaningless; don't let a run with any pass for a clean one
+    failed = {name: result["errors"] for name, result in results.items() if result["errors"]}
+    if failed:
+        sys.exit(f"requests failed: {', '.join(f'{name} {count}' for name, count in failed.items())}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,457 @@
+"""Deterministic synthetic data for every table in ``app/models.py``.
+
+The same ``--seed`` and sizes always produce the same rows, so results from
+different commits are measured against identical data. Rows are generated
+as streams and written with batched Core ``insert()`` executemany calls;
+secondary indexes are built once at the end rather than maintained row by
+row, which keeps a multi-million-row database to a few minutes.
+
+Every seeded member logs in as ``bench<i>@example.com`` with :data:`PASSWORD`.
+
+Run from the backend directory::
+
+    python -m benchmarks.seed --database /tmp/bench.db
+    python -m benchmarks.seed --database /tmp/large.db --profile large
+    python -m benchmarks.seed --database /tmp/chat.db --profile large --messages 20000000
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+PASSWORD = "correct horse battery staple"
+
+PROFILES = {
+    # Enough rows for every code path; what benchmarks.run uses
+    "bench": {
+        "users": 50,
+        "teams": 6,
+        "projects": 12,
+        "news": 200,
+        "updates": 500,
+        "execs": 8,
+        "sponsors": 10,
+        "inquiries": 50,
+        "contacts": 200,
+        "conversations": 100,
+        "messages": 1000,
+        "outbox": 100,
+    },
+    # Volumes for finding scaling cliffs
+    "large": {
+        "users": 5_000,
+        "teams": 25,
+        "projects": 400,
+        "news": 100_000,
+        "updates": 500_000,
+        "execs": 12,
+        "sponsors": 60,
+        "inquiries": 20_000,
+        "contacts": 100_000,
+        "conversations": 500_000,
+        "messages": 5_000_000,
+        "outbox": 50_000,
+    },
+}
+DEFAULT_SIZES = PROFILES["bench"]
+
+BATCH_SIZE = 10_000
+START = datetime(2021, 9, 1, tzinfo=timezone.utc)
+SPAN = timedelta(days=3 * 365)
+
+WORDS = (
+    "rocket motor avionics telemetry recovery parachute airframe launch static fire "
+    "nozzle grain payload cubesat ground station simulation composite fin apogee "
+    "competition design review test flight budget outreach sponsor altimeter "
+    "propellant oxidizer injector thrust drag stability fairing deployment drogue "
+    "main chute battery firmware radio antenna gps sensor calibration"
+).split()
+QUESTIONS = (
+    "What teams does the club have?",
+    "How do I join the rocketry club?",
+    "Tell me about your current rocket projects",
+    "Who are the executives?",
+    "How can my company sponsor you?",
+    "What does the avionics team work on?",
+    "When is the next launch?",
+    "Do I need experience to join?",
+    "What competitions do you enter?",
+    "How big is the team?",
+)
+PROGRAMS = ("Engineering", "Computer Science", "Physics", "Mathematics", "Chemistry", "Business")
+
+
+# The workloads sign in as the first members, so those are always active
+ACTIVE_MEMBERS = 20
+
+
+def member_email(i: int) -> str:
+    return f"bench{i}@example.com"
+
+
+class _Text:
+    """A fixed pool of sentences; picking from it is far cheaper than composing text per row."""
+
+    def __init__(self, rng: random.Random, size: int = 4000):
+        self.rng = rng
+        self.sentences = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 16))).capitalize() + "."
+            for _ in range(size)
+        ]
+
+    def sentence(self) -> str:
+        return self.rng.choice(self.sentences)
+
+    def paragraph(self, low: int, high: int) -> str:
+        return " ".join(self.rng.choices(self.sentences, k=self.rng.randint(low, high)))
+
+
+def _zipf(n: int, s: float = 1.1):
+    """Cumulative weights for rng.choices: a few items get most of the activity."""
+    return list(itertools.accumulate(1 / (k + 1) ** s for k in range(n)))
+
+
+def _moment(rng: random.Random, i: int, n: int) -> datetime:
+    """The i-th of n timestamps spread over SPAN, in order, with jitter.
+
+    Microseconds are always set, matching rows written by the app itself.
+    """
+    base = START + SPAN * (i / max(n, 1))
+    return base + timedelta(seconds=rng.uniform(0, 3600), microseconds=rng.randint(1, 999_999))
+
+
+def _users(rng, n, hashed_password):
+    for i in range(n):
+        yield {
+            "id": i + 1,
+            "email": member_email(i),
+            "username": f"bench{i}",
+            "full_name": f"Member {i}",
+            "hashed_password": hashed_password,
+            "is_active": rng.random() > 0.02 or i < ACTIVE_MEMBERS,
+            "is_admin": i == 0,
+            "token_version": 0,
+            "student_id": f"{1000000 + i}",
+            "program": rng.choice(PROGRAMS),
+            "year": str(rng.randint(1, 5)),
+            "created_at": _moment(rng, i, n),
+        }
+
+
+def _memberships(rng, users, teams):
+    """Each member joins 1-3 teams, favouring the popular ones; returns team -> member ids."""
+    weights = _zipf(teams, 0.8)
+    members = {team_id: [] for team_id in range(1, teams + 1)}
+    for user_id in range(1, users + 1):
+        joined = set(rng.choices(range(1, teams + 1), cum_weights=weights, k=rng.randint(1, 3)))
+        for team_id in sorted(joined):
+            members[team_id].append(user_id)
+    return members
+
+
+def _teams(rng, text, n, members):
+    for team_id in range(1, n + 1):
+        yield {
+            "id": team_id,
+            "name": f"Team {team_id}",
+            "description": text.paragraph(1, 3),
+            "team_lead_id": members[team_id][0] if members[team_id] else None,
+            "created_at": _moment(rng, team_id, n),
+        }
+
+
+def _projects(rng, text, n, teams):
+    for i in range(n):
+        created_at = _moment(rng, i, n)
+        yield {
+            "id": i + 1,
+            "title": f"Project {i + 1}",
+            "description": text.paragraph(2, 5),
+            "image_url": None,
+            "status": rng.choices(("active", "completed", "planned"), weights=(5, 3, 2))[0],
+            "team_id": rng.randint(1, teams),
+            "progress_percentage": rng.randint(0, 100),
+            "priority": rng.choices(("low", "medium", "high", "critical"), weights=(3, 5, 2, 1))[0],
+            "due_date": created_at + timedelta(days=rng.randint(30, 365)),
+            "created_at": created_at,
+        }
+
+
+def _news(rng, text, n):
+    for i in range(n):
+        yield {
+            "id": i + 1,
+            "title": text.sentence()[:80],
+            "content": text.paragraph(3, 12),
+            "image_url": None,
+            "published_at": _moment(rng, i, n),
+        }
+
+
+def _execs(rng, text, n):
+    positions = ("President", "Vice President", "Finance", "Outreach Lead", "Team Lead", "Advisor")
+    for i in range(n):
+        yield {
+            "id": i + 1,
+            "name": f"Executive {i + 1}",
+            "position": positions[i % len(positions)],
+            "bio": text.paragraph(1, 3),
+            "image_url": None,
+            "email": f"exec{i + 1}@example.com",
+        }
+
+
+def _sponsors(rng, text, n):
+    for i in range(n):
+        yield {
+            "id": i + 1,
+            "name": f"Sponsor {i + 1}",
+            "logo_url": None,
+            "website_url": f"https://sponsor{i + 1}.example.com",
+            "tier": rng.choices(("gold", "silver", "bronze"), weights=(1, 2, 4))[0],
+        }
+
+
+def _inquiries(rng, text, n):
+    for i in range(n):
+        yield {
+            "id": i + 1,
+            "company_name": f"Company {i + 1}",
+            "contact_name": f"Contact {i + 1}",
+            "email": f"inquiry{i + 1}@example.com",
+            "phone": None if rng.random() < 0.5 else f"519-555-{rng.randint(0, 9999):04d}",
+            "message": text.paragraph(1, 4),
+            "created_at": _moment(rng, i, n),
+            "status": rng.choices(("pending", "contacted", "closed"), weights=(2, 3, 5))[0],
+        }
+
+
+def _contacts(rng, text, n):
+    for i in range(n):
+        yield {
+            "id": i + 1,
+            "name": f"Visitor {i + 1}",
+            "email": f"visitor{i + 1}@example.com",
+            "subject": text.sentence()[:60],
+            "message": text.paragraph(1, 4),
+            "created_at": _moment(rng, i, n),
+            "status": rng.choices(("unread", "read", "replied"), weights=(1, 3, 6))[0],
+        }
+
+
+def _updates(rng, text, n, projects, project_teams, members, users):
+    # A handful of projects get most of the updates
+    picks = _zipf(projects)
+    for i in range(n):
+        project_id = rng.choices(range(1, projects + 1), cum_weights=picks)[0]
+        team_id = project_teams[project_id]
+        authors = members.get(team_id) or range(1, users + 1)
+        yield {
+            "id": i + 1,
+            "project_id": project_id,
+            "team_id": team_id,
+            "author_id": rng.choice(authors),
+            "title": text.sentence()[:80],
+            "content": text.paragraph(1, 6),
+            "update_type": rng.choices(("progress", "milestone", "issue", "announcement"), weights=(6, 2, 2, 1))[0],
+            "progress_change": rng.randint(0, 10),
+            "images": None,
+            "created_at": _moment(rng, i, n),
+        }
+
+
+def _conversation_lengths(rng, conversations, messages):
+    """Split ``messages`` over ``conversations`` with a long tail of chatty ones."""
+    if not conversations:
+        return []
+    mean = messages / conversations
+    lengths = [max(1, round(rng.expovariate(1 / mean))) for _ in range(conversations)]
+    difference = messages - sum(lengths)
+    while difference:
+        i = rng.randrange(conversations)
+        if difference > 0:
+            lengths[i] += 1
+            difference -= 1
+        elif lengths[i] > 1:
+            lengths[i] -= 1
+            difference += 1
+    return lengths
+
+
+def _conversations(rng, lengths, users, starts):
+    for i, (length, started) in enumerate(zip(lengths, starts)):
+        yield {
+            "id": i + 1,
+            "title": rng.choice(QUESTIONS)[:50],
+            # Most visitors chat without signing in
+            "user_id": rng.randint(1, users) if rng.random() < 0.4 else None,
+            "created_at": started,
+            "updated_at": started + timedelta(seconds=30 * length),
+        }
+
+
+def _messages(rng, text, lengths, starts):
+    message_id = 0
+    for i, (length, started) in enumerate(zip(lengths, starts)):
+        at = started
+        for k in range(length):
+            message_id += 1
+            at = at + timedelta(seconds=rng.randint(2, 58))
+            is_user = k % 2 == 0
+            yield {
+                "id": message_id,
+                "conversation_id": i + 1,
+                "content": rng.choice(QUESTIONS) if is_user else text.paragraph(1, 4),
+                "is_user": is_user,
+                "timestamp": at,
+            }
+
+
+def _outbox(rng, text, n):
+    for i in range(n):
+        created_at = _moment(rng, i, n)
+        kind = "contact" if rng.random() < 0.8 else "sponsor_inquiry"
+        yield {
+            "id": i + 1,
+            "kind": kind,
+            "subject": text.sentence()[:60],
+            "body": text.paragraph(1, 3),
+            "status": "sent",
+            "attempts": 0,
+            "next_attempt_at": created_at,
+            "last_error": None,
+            "created_at": created_at,
+            "sent_at": created_at + timedelta(seconds=rng.randint(1, 30)),
+        }
+
+
+def _insert(conn, table, rows, quiet=False):
+    started = time.perf_counter()
+    count = 0
+    statement = table.insert()
+    while True:
+        batch = list(itertools.islice(rows, BATCH_SIZE))
+        if not batch:
+            break
+        conn.execute(statement, batch)
+        conn.commit()
+        count += len(batch)
+    if not quiet:
+        elapsed = time.perf_counter() - started
+        rate = count / elapsed if elapsed else 0
+        print(f"  {table.name}: {count:,} rows in {elapsed:.1f}s ({rate:,.0f} rows/s)", file=sys.stderr)
+
+
+def seed(sizes=None, seed: int = 42, quiet: bool = False):
+    """Create the schema and fill it; the database comes from ``DATABASE_URL``."""
+    sizes = {**DEFAULT_SIZES, **(sizes or {})}
+    sizes["users"] = max(sizes["users"], 1)
+    sizes["teams"] = max(sizes["teams"], 1)
+    sizes["projects"] = max(sizes["projects"], 1)
+    sizes["conversations"] = min(sizes["conversations"], sizes["messages"])
+    rng = random.Random(seed)
+    text = _Text(rng)
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import NullPool
+
+    from app.auth import get_password_hash
+    from app.db import DATABASE_URL, Base, IS_SQLITE
+    from app import models
+
+    engine = create_engine(DATABASE_URL, poolclass=NullPool)
+    tables = Base.metadata.tables
+    started = time.perf_counter()
+
+    with engine.connect() as conn:
+        if IS_SQLITE:
+            # Nothing here needs to survive a crash until the load is done
+            conn.exec_driver_sql("PRAGMA journal_mode=OFF")
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+            conn.exec_driver_sql("PRAGMA cache_size=-262144")
+            conn.exec_driver_sql("PRAGMA temp_store=MEMORY")
+
+        Base.metadata.create_all(conn)
+        indexes = [index for table in Base.metadata.sorted_tables for index in table.indexes]
+        for index in indexes:
+            index.drop(conn)
+        conn.commit()
+
+        # Hashing is deliberately slow; every member shares one password
+        hashed_password = get_password_hash(PASSWORD)
+        members = _memberships(rng, sizes["users"], sizes["teams"])
+        projects = list(_projects(rng, text, sizes["projects"], sizes["teams"]))
+        project_teams = {project["id"]: project["team_id"] for project in projects}
+        lengths = _conversation_lengths(rng, sizes["conversations"], sizes["messages"])
+        starts = [_moment(rng, i, sizes["conversations"]) for i in range(sizes["conversations"])]
+
+        _insert(conn, models.User.__table__, _users(rng, sizes["users"], hashed_password), quiet)
+        _insert(conn, models.Team.__table__, _teams(rng, text, sizes["teams"], members), quiet)
+        _insert(conn, tables["user_teams"], (
+            {"user_id": user_id, "team_id": team_id}
+            for team_id, user_ids in members.items() for user_id in user_ids
+        ), quiet)
+        _insert(conn, models.Project.__table__, iter(projects), quiet)
+        _insert(conn, models.NewsArticle.__table__, _news(rng, text, sizes["news"]), quiet)
+        _insert(conn, models.Executive.__table__, _execs(rng, text, sizes["execs"]), quiet)
+        _insert(conn, models.Sponsor.__table__, _sponsors(rng, text, sizes["sponsors"]), quiet)
+        _insert(conn, models.SponsorInquiry.__table__, _inquiries(rng, text, sizes["inquiries"]), quiet)
+        _insert(conn, models.ContactMessage.__table__, _contacts(rng, text, sizes["contacts"]), quiet)
+        _insert(conn, models.ProjectUpdate.__table__, _updates(
+            rng, text, sizes["updates"], sizes["projects"], project_teams, members, sizes["users"]
+        ), quiet)
+        _insert(conn, models.Conversation.__table__, _conversations(rng, lengths, sizes["users"], starts), quiet)
+        _insert(conn, models.ChatMessage.__table__, _messages(rng, text, lengths, starts), quiet)
+        _insert(conn, models.EmailOutbox.__table__, _outbox(rng, text, sizes["outbox"]), quiet)
+
+        index_started = time.perf_counter()
+        for index in indexes:
+            index.create(conn)
+        conn.commit()
+        if not quiet:
+            print(f"  indexes: {len(indexes)} in {time.perf_counter() - index_started:.1f}s", file=sys.stderr)
+
+        if IS_SQLITE:
+            conn.exec_driver_sql("ANALYZE")
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        elif conn.dialect.name == "postgresql":
+            # Ids were supplied explicitly, so move the serial sequences past them
+            for table in Base.metadata.sorted_tables:
+                if "id" in table.c:
+                    conn.exec_driver_sql(
+                        f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                        f"COALESCE((SELECT MAX(id) FROM {table.name}), 0) + 1, false)"
+                    )
+            conn.exec_driver_sql("ANALYZE")
+        conn.commit()
+    engine.dispose()
+
+    if not quiet:
+        print(f"seeded in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", required=True, help="SQLite file to create")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="bench")
+    parser.add_argument("--seed", type=int, default=42)
+    for name in DEFAULT_SIZES:
+        parser.add_argument(f"--{name}", type=int, help="override the profile's row count")
+    args = parser.parse_args()
+
+    if os.path.exists(args.database):
+        parser.error(f"{args.database} already exists")
+    sizes = dict(PROFILES[args.profile])
+    sizes.update({name: getattr(args, name) for name in DEFAULT_SIZES if getattr(args, name) is not None})
+
+    from .harness import prepare_environment
+    prepare_environment(os.path.abspath(args.database))
+    seed(sizes, args.seed)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,163 @@
+"""Scripted workloads; each drives one kind of traffic and returns a Recorder.
+
+Every workload takes the same arguments: an httpx client pointed at the app,
+the seeded sizes, a seeded ``random.Random``, the number of requests (or
+sessions) to issue and how many may be in flight at once.
+"""
+import asyncio
+import json
+
+from .harness import Recorder, closed_loop, measure
+from .seed import ACTIVE_MEMBERS, PASSWORD, member_email
+
+# (weight, label, path factory) - roughly what the public pages fetch
+PUBLIC_PAGES = (
+    (20, "GET /api/news/", lambda rng, sizes: "/api/news/?limit=10"),
+    (10, "GET /api/news/{id}", lambda rng, sizes: f"/api/news/{rng.randint(1, sizes['news'])}"),
+    (15, "GET /api/projects/", lambda rng, sizes: "/api/projects/"),
+    (10, "GET /api/projects/{id}", lambda rng, sizes: f"/api/projects/{rng.randint(1, sizes['projects'])}"),
+    (10, "GET /api/teams/", lambda rng, sizes: "/api/teams/"),
+    (5, "GET /api/teams/{id}", lambda rng, sizes: f"/api/teams/{rng.randint(1, sizes['teams'])}"),
+    (10, "GET /api/execs/", lambda rng, sizes: "/api/execs/"),
+    (10, "GET /api/sponsors/", lambda rng, sizes: "/api/sponsors/"),
+    (5, "GET /api/project-updates/", lambda rng, sizes: "/api/project-updates/?limit=20"),
+    (5, "GET /api/discord/invite", lambda rng, sizes: "/api/discord/invite"),
+)
+
+CHAT_QUESTIONS = (
+    "What teams does the club have?",
+    "How do I join the rocketry club?",
+    "Tell me about your current rocket projects",
+    "Who are the executives?",
+    "How can my company sponsor you?",
+    "What does the avionics team work on?",
+    "When is the next launch?",
+    "Do I need experience to join?",
+)
+
+
+async def public_mix(client, sizes, rng, requests, concurrency):
+    recorder = Recorder()
+    weights = [weight for weight, _, _ in PUBLIC_PAGES]
+    plan = rng.choices(PUBLIC_PAGES, weights=weights, k=requests)
+    paths = [(label, make_path(rng, sizes)) for _, label, make_path in plan]
+
+    async def hit(i):
+        label, path = paths[i]
+        await recorder.request(client, "GET", label, path)
+
+    await measure(recorder, closed_loop(requests, concurrency, hit))
+    return recorder
+
+
+async def login_burst(client, sizes, rng, requests, concurrency):
+    recorder = Recorder()
+
+    async def login(i):
+        await recorder.request(client, "POST", "POST /api/auth/login", "/api/auth/login", json={
+            "email": member_email(i % sizes["users"]), "password": PASSWORD,
+        })
+
+    await measure(recorder, closed_loop(requests, concurrency, login))
+    return recorder
+
+
+async def _tokens(client, users):
+    tokens = []
+    for i in range(users):
+        response = await client.post("/api/auth/login", json={"email": member_email(i), "password": PASSWORD})
+        response.raise_for_status()
+        tokens.append(response.json()["access_token"])
+    return tokens
+
+
+async def member_dashboard(client, sizes, rng, requests, concurrency):
+    """A signed-in member opening the dashboard; ``requests`` counts page loads."""
+    recorder = Recorder()
+    tokens = await _tokens(client, min(sizes["users"], ACTIVE_MEMBERS))
+
+    async def dashboard(i):
+        headers = {"Authorization": f"Bearer {tokens[i % len(tokens)]}"}
+        # The dashboard fires these together on load
+        await asyncio.gather(
+            recorder.request(client, "GET", "GET /api/auth/me", "/api/auth/me", headers=headers),
+            recorder.request(client, "GET", "GET /api/teams/my-teams", "/api/teams/my-teams", headers=headers),
+            recorder.request(
+                client, "GET", "GET /api/project-updates/my-updates", "/api/project-updates/my-updates",
+                headers=headers,
+            ),
+            recorder.request(client, "GET", "GET /api/projects/", "/api/projects/", headers=headers),
+        )
+
+    await measure(recorder, closed_loop(requests, concurrency, dashboard))
+    return recorder
+
+
+def _start_event(body: str) -> dict:
+    for event in body.split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in event.splitlines() if ": " in line)
+        if lines.get("event") == "start":
+            return json.loads(lines["data"])
+    raise ValueError("stream had no start event")
+
+
+async def chat(client, sizes, rng, requests, concurrency, turns=3):
+    """``requests`` conversations of ``turns`` messages; every other one streams."""
+    recorder = Recorder()
+    scripts = [[rng.choice(CHAT_QUESTIONS) for _ in range(turns)] for _ in range(requests)]
+
+    async def conversation(i):
+        conversation_id = None
+        for question in scripts[i]:
+            payload = {"content": question, "conversation_id": conversation_id}
+            if i % 2:
+                response = await recorder.request(
+                    client, "POST", "POST /api/chatbot/chat/stream", "/api/chatbot/chat/stream", json=payload,
+                )
+                if response is None or response.status_code != 200:
+                    return
+                conversation_id = _start_event(response.text)["conversation_id"]
+            else:
+                response = await recorder.request(
+                    client, "POST", "POST /api/chatbot/chat", "/api/chatbot/chat", json=payload,
+                )
+                if response is None or response.status_code != 200:
+                    return
+                conversation_id = response.json()["conversation"]["id"]
+
+    await measure(recorder, closed_loop(requests, concurrency, conversation))
+    return recorder
+
+
+async def contact_flood(client, sizes, rng, requests, concurrency):
+    recorder = Recorder()
+
+    async def submit(i):
+        if i % 4 == 3:
+            await recorder.request(
+                client, "POST", "POST /api/sponsor-inquiries/", "/api/sponsor-inquiries/", json={
+                    "company_name": f"Company {i}",
+                    "contact_name": "Bench Contact",
+                    "email": f"sponsor{i}@example.com",
+                    "message": "We would like to support the club.",
+                },
+            )
+        else:
+            await recorder.request(client, "POST", "POST /api/contact/", "/api/contact/", json={
+                "name": "Bench Visitor",
+                "email": f"visitor{i}@example.com",
+                "subject": f"Question {i}",
+                "message": "How can I get involved with the club?",
+            })
+
+    await measure(recorder, closed_loop(requests, concurrency, submit))
+    return recorder
+
+
+WORKLOADS = {
+    "public_mix": public_mix,
+    "login_burst": login_burst,
+    "member_dashboard": member_dashboard,
+    "chat": chat,
+    "contact_flood": contact_flood,
+}
\ No newline at end of file
@@ -0,0 +1,58 @@
+import itertools
+import os
+import tempfile
+
+# The app reads its settings at import time, so point it at a scratch
+# database and switch off everything that talks to the outside world first
+_tmpdir = tempfile.mkdtemp(prefix="rocketry-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/test.db"
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ["SMTP_SERVER"] = ""
+os.environ["CHAT_RETENTION_DAYS"] = "0"
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.auth import create_access_token, get_password_hash, token_claims
+from app.db import SessionLocal
+from app.main import app
+from app.models import User
+
+_ids = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def db(client):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    def make_user(**fields):
+        n = next(_ids)
+        user = User(
+            email=f"member{n}@example.com",
+            username=f"member{n}",
+            full_name=f"Member {n}",
+            hashed_password=get_password_hash("password"),
+            **fields,
+        )
+        db.add(user)
+        db.commit()
+        return user
+    return make_user
+
+
+def auth_headers(user: User) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(token_claims(user))}"}
@@ -0,0 +1,58 @@
+"""Claims-based authentication, the principal cache and token revocation."""
+from app.auth import create_access_token, principal_cache, token_claims
+from app.db import count_queries
+
+from .conftest import auth_headers
+
+
+def test_profile_edits_replace_the_cached_principal(client, make_user):
+    user = make_user()
+    headers = auth_headers(user)
+    assert client.get("/api/auth/me", headers=headers).json()["full_name"] == user.full_name
+    with count_queries() as cached:
+        client.get("/api/auth/me", headers=headers)
+    assert cached.count == 0
+
+    response = client.patch("/api/auth/me", headers=headers, json={"full_name": "Renamed Member"})
+    assert response.status_code == 200
+    assert principal_cache.get(user.id) is None
+    assert client.get("/api/auth/me", headers=headers).json()["full_name"] == "Renamed Member"
+
+
+def test_status_changes_revoke_outstanding_tokens(client, make_user):
+    admin = make_user(is_admin=True)
+    member = make_user()
+    old_token = auth_headers(member)
+    assert client.get("/api/teams/my-teams", headers=old_token).status_code == 200
+
+    response = client.patch(f"/api/auth/users/{member.id}", headers=auth_headers(admin), json={"is_active": False})
+    assert response.status_code == 200
+
+    assert client.get("/api/teams/my-teams", headers=old_token).status_code == 401
+    assert client.get("/api/auth/me", headers=old_token).status_code == 401
+    login = client.post("/api/auth/login", json={"email": member.email, "password": "password"})
+    new_token = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    assert client.get("/api/auth/me", headers=new_token).status_code == 400  # Inactive user
+
+
+def test_unchanged_status_keeps_tokens_valid(client, make_user):
+    admin = make_user(is_admin=True)
+    member = make_user()
+    headers = auth_headers(member)
+    response = client.patch(f"/api/auth/users/{member.id}", headers=auth_headers(admin), json={"is_active": True})
+    assert response.status_code == 200
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+
+def test_tokens_need_a_current_version(client, make_user):
+    user = make_user()
+    claims = token_claims(user)
+    assert client.get("/api/auth/me", headers=auth_headers(user)).status_code == 200
+
+    stale = create_access_token({**claims, "ver": claims["ver"] + 1})
+    assert client.get("/api/auth/me", headers={"Authorization": f"Bearer {stale}"}).status_code == 401
+
+    for missing in ("ver", "uid"):
+        unversioned = create_access_token({k: v for k, v in claims.items() if k != missing})
+        response = client.get("/api/auth/me", headers={"Authorization": f"Bearer {unversioned}"})
+        assert response.status_code == 401
@@ -0,0 +1,199 @@
+"""The OpenAI gateway's deadline and circuit breaker, against a stub client."""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import BadRequestError
+
+from app.llm import CircuitBreaker, CircuitOpen, DeadlineExceeded, LLMGateway
+
+RESET_SECONDS = 0.05
+
+
+class StubCompletions:
+    """Stands in for ``client.chat.completions``; ``reply`` decides each call's outcome."""
+
+    def __init__(self):
+        self.calls = 0
+        self.reply = self.ok
+
+    @staticmethod
+    async def ok(options):
+        return {"answer": options["messages"][-1]["content"]}
+
+    async def create(self, **options):
+        self.calls += 1
+        return await self.reply(options)
+
+
+def _gateway(failures=3, deadline=1.0):
+    completions = StubCompletions()
+    gateway = LLMGateway(
+        SimpleNamespace(chat=SimpleNamespace(completions=completions)),
+        deadline=deadline, breaker=CircuitBreaker(failure_threshold=failures, reset_seconds=RESET_SECONDS),
+    )
+    return gateway, completions
+
+
+def _ask(gateway, question="When is launch day?"):
+    return gateway.complete(model="gpt-test", messages=[{"role": "user", "content": question}])
+
+
+async def _fail(options):
+    raise RuntimeError("upstream unavailable")
+
+
+async def _bad_request(options):
+    request = httpx.Request("POST", "https://api.openai.test/v1/chat/completions")
+    raise BadRequestError("bad request", response=httpx.Response(400, request=request), body=None)
+
+
+async def _trip(gateway, completions):
+    completions.reply = _fail
+    for _ in range(gateway.breaker.failure_threshold):
+        with pytest.raises(RuntimeError):
+            await _ask(gateway)
+
+
+def test_breaker_opens_after_consecutive_failures():
+    async def scenario():
+        gateway, completions = _gateway(failures=3)
+        completions.reply = _fail
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await _ask(gateway)
+        assert gateway.breaker.state == CircuitBreaker.CLOSED
+
+        with pytest.raises(RuntimeError):
+            await _ask(gateway)
+        assert gateway.breaker.state == CircuitBreaker.OPEN
+
+        # Refused without trying OpenAI
+        with pytest.raises(CircuitOpen):
+            await _ask(gateway)
+        assert completions.calls == 3
+
+    asyncio.run(scenario())
+
+
+def test_a_success_resets_the_failure_count():
+    async def scenario():
+        gateway, completions = _gateway(failures=2)
+        completions.reply = _fail
+        with pytest.raises(RuntimeError):
+            await _ask(gateway)
+        completions.reply = completions.ok
+        await _ask(gateway)
+        completions.reply = _fail
+        with pytest.raises(RuntimeError):
+            await _ask(gateway)
+        assert gateway.breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_half_open_breaker_lets_one_probe_through():
+    async def scenario():
+        gateway, completions = _gateway()
+        await _trip(gateway, completions)
+        await asyncio.sleep(RESET_SECONDS * 2)
+
+        answer = asyncio.Event()
+
+        async def slow_ok(options):
+            await answer.wait()
+            return await completions.ok(options)
+
+        completions.reply = slow_ok
+        probe = asyncio.ensure_future(_ask(gateway, "Probe"))
+        await asyncio.sleep(0)
+        assert gateway.breaker.state == CircuitBreaker.HALF_OPEN
+        # A different question would be a second call; only the probe may run
+        with pytest.raises(CircuitOpen):
+            await _ask(gateway, "Another question")
+
+        answer.set()
+        assert await probe == {"answer": "Probe"}
+        assert gateway.breaker.state == CircuitBreaker.CLOSED
+        assert await _ask(gateway, "Another question") == {"answer": "Another question"}
+
+    asyncio.run(scenario())
+
+
+def test_failed_probe_reopens_the_breaker():
+    async def scenario():
+        gateway, completions = _gateway()
+        await _trip(gateway, completions)
+        await asyncio.sleep(RESET_SECONDS * 2)
+
+        with pytest.raises(RuntimeError):
+            await _ask(gateway, "Probe")
+        assert gateway.breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpen):
+            await _ask(gateway)
+
+    asyncio.run(scenario())
+
+
+def test_bad_requests_do_not_count_against_the_breaker():
+    async def scenario():
+        gateway, completions = _gateway(failures=2)
+        completions.reply = _bad_request
+        for _ in range(5):
+            with pytest.raises(BadRequestError):
+                await _ask(gateway)
+        assert gateway.breaker.state == CircuitBreaker.CLOSED
+        assert gateway.breaker.failures == 0
+        assert completions.calls == 5
+
+    asyncio.run(scenario())
+
+
+def test_deadline_fails_every_waiting_caller_and_clears_the_call():
+    async def scenario():
+        gateway, completions = _gateway(deadline=0.05)
+
+        async def hang(options):
+            await asyncio.sleep(10)
+
+        completions.reply = hang
+        started = time.perf_counter()
+        # Identical questions share one call; each caller still gets its deadline
+        results = await asyncio.gather(_ask(gateway), _ask(gateway), return_exceptions=True)
+        assert time.perf_counter() - started < 1
+        assert [type(result) for result in results] == [DeadlineExceeded, DeadlineExceeded]
+        assert completions.calls == 1
+
+        # The call gives up at the same deadline, reports a failure and leaves nothing behind
+        await asyncio.sleep(0.1)
+        assert gateway._inflight == {}
+        assert gateway.breaker.failures == 1
+
+    asyncio.run(scenario())
+
+
+def test_a_caller_going_away_does_not_cancel_the_shared_call():
+    async def scenario():
+        gateway, completions = _gateway()
+        answer = asyncio.Event()
+
+        async def slow_ok(options):
+            await answer.wait()
+            return await completions.ok(options)
+
+        completions.reply = slow_ok
+        leaving = asyncio.ensure_future(_ask(gateway))
+        staying = asyncio.ensure_future(_ask(gateway))
+        await asyncio.sleep(0)
+        leaving.cancel()
+        await asyncio.sleep(0)
+
+        answer.set()
+        assert await staying == {"answer": "When is launch day?"}
+        assert completions.calls == 1
+        assert gateway._inflight == {}
+        assert gateway.breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
@@ -0,0 +1,141 @@
+"""Email outbox delivery against a local aiosmtpd server."""
+import socket
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app import mailer
+from app.mailer import OutboxWorker, enqueue_email
+from app.models import EmailOutbox
+
+
+class RecordingHandler:
+    """Keeps every message and the SMTP session it arrived on; can refuse them."""
+
+    def __init__(self):
+        self.messages = []
+        self.sessions = []
+        self.refuse = False
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.refuse:
+            return "451 4.3.0 Try again later"
+        self.messages.append(envelope.content.decode())
+        if not any(seen is session for seen in self.sessions):
+            self.sessions.append(session)
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    monkeypatch.setenv("SMTP_SERVER", "127.0.0.1")
+    monkeypatch.setenv("SMTP_PORT", str(controller.port))
+    monkeypatch.setenv("SMTP_STARTTLS", "false")
+    monkeypatch.delenv("SMTP_USERNAME", raising=False)
+    monkeypatch.delenv("SMTP_PASSWORD", raising=False)
+    monkeypatch.setenv("CONTACT_EMAIL_FROM", "noreply@example.com")
+    monkeypatch.setenv("CONTACT_EMAIL_TO", "club@example.com")
+    yield handler
+    controller.stop()
+
+
+@pytest.fixture
+def outbox_db(db):
+    db.query(EmailOutbox).delete()
+    db.commit()
+    return db
+
+
+@pytest.fixture
+def worker():
+    worker = OutboxWorker()
+    yield worker
+    if worker._smtp is not None:
+        worker._smtp.close()
+
+
+def _enqueue(db, kind, count):
+    emails = [enqueue_email(db, kind, f"{kind} {i}", f"Body {i}") for i in range(count)]
+    db.commit()
+    return emails
+
+
+def test_claim_leases_rows_until_the_lease_expires(outbox_db, worker):
+    _enqueue(outbox_db, "contact", 2)
+    now = datetime.now(timezone.utc) + timedelta(seconds=1)
+
+    assert len(worker._claim(outbox_db, now)) == 2
+    # Leased: a second worker polling now finds nothing due
+    assert worker._claim(outbox_db, now) == []
+    # Never settled (the worker died): claimable again once the lease runs out
+    expired = now + timedelta(seconds=mailer.OUTBOX_LEASE_SECONDS + 1)
+    assert len(worker._claim(outbox_db, expired)) == 2
+
+
+def test_emails_share_one_smtp_session(smtp, outbox_db, worker):
+    _enqueue(outbox_db, "contact", 1)
+    _enqueue(outbox_db, "sponsor_inquiry", 1)
+    assert worker.drain_once() == 2
+
+    _enqueue(outbox_db, "contact", 1)
+    assert worker.drain_once() == 1
+
+    assert len(smtp.messages) == 3
+    assert len(smtp.sessions) == 1
+
+
+def test_bursts_are_sent_as_one_digest(smtp, outbox_db, worker):
+    burst = mailer.OUTBOX_DIGEST_THRESHOLD + 1
+    _enqueue(outbox_db, "contact", burst)
+    _enqueue(outbox_db, "sponsor_inquiry", 1)
+
+    assert worker.drain_once() == burst + 1
+
+    subjects = sorted(line for message in smtp.messages for line in message.splitlines() if line.startswith("Subject:"))
+    assert subjects == [f"Subject: {burst} new contact form submissions", "Subject: sponsor_inquiry 0"]
+    digest = next(message for message in smtp.messages if "new contact form submissions" in message)
+    for i in range(burst):
+        assert f"contact {i}" in digest
+    outbox_db.expire_all()
+    assert {email.status for email in outbox_db.query(EmailOutbox)} == {"sent"}
+
+
+def test_failed_sends_back_off_then_give_up(smtp, outbox_db, worker):
+    smtp.refuse = True
+    (email,) = _enqueue(outbox_db, "contact", 1)
+    delays = []
+    for attempt in range(1, mailer.OUTBOX_MAX_ATTEMPTS + 1):
+        # Make the row due again without waiting out the backoff
+        outbox_db.query(EmailOutbox).update({EmailOutbox.next_attempt_at: datetime.now(timezone.utc)})
+        outbox_db.commit()
+        started = datetime.now(timezone.utc)
+        assert worker.drain_once() == 0
+
+        outbox_db.refresh(email)
+        assert email.attempts == attempt
+        assert "Try again later" in email.last_error
+        if attempt < mailer.OUTBOX_MAX_ATTEMPTS:
+            assert email.status == "pending"
+            next_attempt = email.next_attempt_at.replace(tzinfo=timezone.utc)
+            delays.append((next_attempt - started).total_seconds())
+        else:
+            assert email.status == "failed"
+
+    for attempt, delay in enumerate(delays, start=1):
+        expected = mailer.OUTBOX_BACKOFF_SECONDS * 2 ** (attempt - 1)
+        assert expected - 1 <= delay <= expected + 1
+
+    # A failed email is never retried
+    smtp.refuse = False
+    assert worker.drain_once() == 0
+    assert smtp.messages == []
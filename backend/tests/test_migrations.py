@@ -0,0 +1,81 @@
+from sqlalchemy import create_engine, inspect
+
+from app import search
+from app.db import Base
+from app.migrations import MIGRATIONS, applied_versions, check_plans, migrate
+
+
+def _schema(engine):
+    inspector = inspect(engine)
+    return {
+        table: (
+            {column["name"] for column in inspector.get_columns(table)},
+            {index["name"] for index in inspector.get_indexes(table)},
+            {(fk["referred_table"], fk["options"].get("ondelete")) for fk in inspector.get_foreign_keys(table)},
+        )
+        for table in inspector.get_table_names()
+        # The search indexes are FTS5 tables the models don't declare
+        if table != "schema_migrations" and "_fts" not in table
+    }
+
+
+def test_every_checked_query_uses_an_index(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/fresh.db")
+    migrate(engine)
+    assert applied_versions(engine) == {migration.version for migration in MIGRATIONS}
+    assert check_plans(engine)
+
+
+def test_a_missing_index_fails_the_check(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/fresh.db")
+    migrate(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_conversations_updated_at")
+    # Connections cache prepared EXPLAINs along with their plans
+    engine.dispose()
+    assert not check_plans(engine)
+
+
+def test_upgrading_the_baseline_matches_the_models(tmp_path):
+    old = create_engine(f"sqlite:///{tmp_path}/old.db")
+    MIGRATIONS[0].upgrade(old)
+    with old.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO conversations (id, title) VALUES (1, 'Launch window')")
+        conn.exec_driver_sql("INSERT INTO chat_messages (conversation_id, content, is_user) VALUES (1, 'Go?', 1)")
+    migrate(old)
+
+    current = create_engine(f"sqlite:///{tmp_path}/current.db")
+    Base.metadata.create_all(current)
+    assert _schema(old) == _schema(current)
+    with old.connect() as conn:
+        assert conn.exec_driver_sql("SELECT conversation_id, content FROM chat_messages").all() == [(1, "Go?")]
+        create = conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE name = 'conversations'").scalar()
+        assert "AUTOINCREMENT" in create
+
+
+def test_search_indexes_are_a_migration(tmp_path, monkeypatch):
+    monkeypatch.setattr(search, "available", False)
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    for migration in MIGRATIONS:
+        if migration.version >= 10:
+            break
+        migration.upgrade(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO news (id, title, content) VALUES (1, 'Launch window', 'Static fire')")
+    search.install(engine)
+    assert not search.available
+
+    migrate(engine)
+    search.install(engine)
+    assert search.available
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO news (id, title, content) VALUES (2, 'Recovery', 'Parachute test')")
+        conn.exec_driver_sql("UPDATE news SET content = 'Hot fire' WHERE id = 1")
+        matches = lambda word: conn.exec_driver_sql(
+            "SELECT rowid FROM news_fts WHERE news_fts MATCH ? ORDER BY rowid", (word,)
+        ).scalars().all()
+        # Rows from before the migration are indexed, and triggers follow later writes
+        assert matches("launch") == [1]
+        assert matches("parachute") == [2]
+        assert matches("static") == []
+        assert matches("hot") == [1]
@@ -0,0 +1,93 @@
+"""Pin the number of SQL statements per endpoint.
+
+Each endpoint is measured, the data it returns is grown, and it is measured
+again; an N+1 regression shows up as a count that moves with the row count.
+"""
+import pytest
+
+from app.db import count_queries
+from app.models import Project, ProjectUpdate, Team
+from app.read_model import read_model
+
+from .conftest import auth_headers
+
+
+def _add_team(db, make_user, viewer, members=3, updates=4):
+    team = Team(name="Avionics", description="Flight computers")
+    team.members = [viewer] + [make_user() for _ in range(members)]
+    project = Project(title="Telemetry", description="Downlink", status="active", team=team)
+    db.add_all([team, project])
+    db.flush()
+    for i in range(updates):
+        db.add(ProjectUpdate(
+            project_id=project.id, team_id=team.id, author_id=team.members[i % len(team.members)].id,
+            title=f"Update {i}", content="Progress", update_type="progress",
+        ))
+    db.commit()
+    return team
+
+
+def _statements(client, path, headers=None):
+    with count_queries() as counter:
+        response = client.get(path, headers=headers)
+    assert response.status_code == 200, response.text
+    return counter.count
+
+
+@pytest.fixture
+def club(db, make_user):
+    viewer = make_user()
+    team = _add_team(db, make_user, viewer)
+    return db, make_user, viewer, team
+
+
+# Signed-in requests are counted with the caller's principal already cached
+ENDPOINTS = {
+    # teams, members of those teams
+    "/api/teams/my-teams": 2,
+    # the team, the membership check, updates joined with authors
+    "/api/project-updates/team/{team_id}": 3,
+    # updates joined with authors
+    "/api/project-updates/my-updates": 1,
+    # updates joined with authors
+    "/api/project-updates/?team_id={team_id}": 1,
+    # team, its members
+    "/api/teams/{team_id}/members": 2,
+}
+
+
+@pytest.mark.parametrize("path, expected", ENDPOINTS.items())
+def test_statement_count_does_not_grow_with_rows(client, club, path, expected):
+    db, make_user, viewer, team = club
+    headers = auth_headers(viewer)
+    url = path.format(team_id=team.id)
+    client.get(url, headers=headers)
+
+    assert _statements(client, url, headers) == expected
+
+    for _ in range(2):
+        _add_team(db, make_user, viewer, members=5, updates=6)
+    more = make_user()
+    team.members.append(more)
+    db.add(ProjectUpdate(
+        project_id=team.projects[0].id, team_id=team.id, author_id=more.id,
+        title="Late update", content="More progress", update_type="progress",
+    ))
+    db.commit()
+
+    assert _statements(client, url, headers) == expected
+
+
+def test_public_team_list_is_served_from_memory(client, club):
+    assert _statements(client, "/api/teams/") == 0
+
+
+def test_teams_snapshot_loads_members_in_one_statement(club):
+    db, make_user, viewer, _ = club
+    with count_queries() as before:
+        read_model.refresh("teams")
+    _add_team(db, make_user, viewer, members=8)
+    with count_queries() as after:
+        read_model.refresh("teams")
+    # teams, then all of their members
+    assert before.count == after.count == 2
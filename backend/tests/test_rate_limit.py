@@ -0,0 +1,99 @@
+"""Client addresses behind proxies, token buckets, and shedding chat traffic."""
+import pytest
+from starlette.requests import Request
+
+from app import rate_limit
+from app.models import ChatMessage, Conversation
+from app.rate_limit import TokenBucketLimiter, client_ip
+from app.routers import chatbot
+
+
+def _request(peer, forwarded_for=None):
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "client": (peer, 50000), "headers": headers})
+
+
+@pytest.fixture
+def trust(monkeypatch):
+    def trust(value):
+        trust_any, networks = rate_limit._parse_proxies(value)
+        monkeypatch.setattr(rate_limit, "_TRUST_ANY_PEER", trust_any)
+        monkeypatch.setattr(rate_limit, "_TRUSTED_NETWORKS", networks)
+    return trust
+
+
+def test_spoofed_left_hops_are_ignored(trust):
+    trust("127.0.0.1")
+    # The client sent "6.6.6.6" itself; the proxy appended the address it saw
+    assert client_ip(_request("127.0.0.1", "6.6.6.6, 203.0.113.7")) == "203.0.113.7"
+
+
+def test_a_chain_of_trusted_proxies_is_skipped(trust):
+    trust("127.0.0.1, 10.0.0.0/8")
+    assert client_ip(_request("127.0.0.1", "6.6.6.6, 203.0.113.7, 10.0.0.2, 10.1.2.3")) == "203.0.113.7"
+
+
+def test_untrusted_peers_are_taken_at_their_address(trust):
+    trust("127.0.0.1")
+    assert client_ip(_request("198.51.100.9", "203.0.113.7")) == "198.51.100.9"
+    assert client_ip(_request("127.0.0.1")) == "127.0.0.1"
+
+
+def test_trusting_any_peer_still_reads_right_to_left(trust):
+    trust("*")
+    assert client_ip(_request("198.51.100.9", "6.6.6.6, 203.0.113.7")) == "203.0.113.7"
+    assert client_ip(_request("198.51.100.9")) == "198.51.100.9"
+
+
+def test_bucket_allows_a_burst_then_asks_to_wait():
+    limiter = TokenBucketLimiter("test", per_minute=60, burst=2)
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") == 0
+    assert 0.9 < limiter.acquire("a") <= 1.0
+    # Other keys have their own buckets
+    assert limiter.acquire("b") == 0
+
+
+def test_least_recently_seen_keys_are_forgotten():
+    limiter = TokenBucketLimiter("test", per_minute=1, burst=1, max_keys=2)
+    limiter.acquire("a")
+    limiter.acquire("b")
+    assert limiter.acquire("a") > 0  # a is now the most recent
+    limiter.acquire("c")  # drops b
+
+    assert limiter.acquire("b") == 0  # a fresh bucket
+    assert len(limiter._buckets) == 2
+
+
+def _messages(db):
+    db.expire_all()
+    return db.query(ChatMessage).count()
+
+
+def test_limited_chat_requests_write_nothing(client, db, monkeypatch):
+    ip_limiter = TokenBucketLimiter("chat_ip", per_minute=1, burst=1)
+    monkeypatch.setattr(chatbot, "ip_limiter", ip_limiter)
+    ip_limiter.acquire("testclient")  # The TestClient's address; its bucket is now empty
+    conversations, messages = db.query(Conversation).count(), _messages(db)
+
+    response = client.post("/api/chatbot/chat", json={"content": "Hello?"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert db.query(Conversation).count() == conversations
+    assert _messages(db) == messages
+
+
+def test_busy_conversations_are_limited_before_writing(client, db, monkeypatch):
+    conversation_limiter = TokenBucketLimiter("chat_conversation", per_minute=1, burst=1)
+    # A zero rate disables the per-address limit, so only the conversation limit applies
+    monkeypatch.setattr(chatbot, "ip_limiter", TokenBucketLimiter("chat_ip", per_minute=0, burst=0))
+    monkeypatch.setattr(chatbot, "conversation_limiter", conversation_limiter)
+    conversation = Conversation(title="Busy")
+    db.add(conversation)
+    db.commit()
+    conversation_limiter.acquire(conversation.id)
+    messages = _messages(db)
+
+    response = client.post("/api/chatbot/chat", json={"content": "Again?", "conversation_id": conversation.id})
+    assert response.status_code == 429
+    assert _messages(db) == messages
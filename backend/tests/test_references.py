@@ -0,0 +1,39 @@
+"""Writes that reference other rows check them first (SQLite enforces foreign keys too)."""
+from app.models import Team
+
+from .conftest import auth_headers
+
+
+def _project(title, **fields):
+    return {"title": title, "description": "", "status": "planned", **fields}
+
+
+def test_projects_need_an_existing_team(client, db):
+    response = client.post("/api/projects/", json=_project("Orphan", team_id=999999))
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Team not found"
+
+    team = Team(name="Recovery", description="Parachutes")
+    db.add(team)
+    db.commit()
+    response = client.post("/api/projects/", json=_project("Parachute", team_id=team.id))
+    assert response.status_code == 200
+    assert response.json()["team_id"] == team.id
+
+    assert client.post("/api/projects/", json=_project("Unassigned")).status_code == 200
+
+
+def test_teams_need_an_existing_lead(client, make_user):
+    admin = make_user(is_admin=True)
+    response = client.post(
+        "/api/teams/", headers=auth_headers(admin), json={"name": "Ground", "description": "Ops", "team_lead_id": 999999},
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "User not found"
+
+    lead = make_user()
+    response = client.post(
+        "/api/teams/", headers=auth_headers(admin), json={"name": "Ground", "description": "Ops", "team_lead_id": lead.id},
+    )
+    assert response.status_code == 200
+    assert response.json()["team_lead_id"] == lead.id
@@ -0,0 +1,104 @@
+"""Archiving idle chat conversations."""
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+from app.db import engine
+from app.models import ChatMessage, Conversation, ConversationArchive
+from app.retention import archive_batch
+
+
+@pytest.fixture
+def chat_db(db):
+    db.query(ConversationArchive).delete()
+    db.query(Conversation).delete()
+    db.commit()
+    return db
+
+
+def _conversation(db, title: str) -> int:
+    conversation = Conversation(title=title)
+    db.add(conversation)
+    db.flush()
+    db.add(ChatMessage(conversation_id=conversation.id, content=f"About {title}", is_user=True))
+    db.commit()
+    return conversation.id
+
+
+def _everything_idle() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(days=1)
+
+
+@contextmanager
+def _while_loading_messages(action):
+    """Run ``action(connection)`` after the batch has read its conversations, before it deletes them."""
+    def after_cursor_execute(conn, cursor, statement, *args):
+        if statement.lstrip().startswith("SELECT") and "FROM chat_messages" in statement:
+            action(conn)
+
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    try:
+        yield
+    finally:
+        event.remove(engine, "after_cursor_execute", after_cursor_execute)
+
+
+def test_archived_conversation_ids_are_never_reused(client, chat_db):
+    first = _conversation(chat_db, "Launch window")
+    assert archive_batch(chat_db, _everything_idle()) == 1
+
+    second = _conversation(chat_db, "Recovery")
+    assert second > first
+    assert archive_batch(chat_db, _everything_idle()) == 1
+
+    for conversation_id, title in ((first, "Launch window"), (second, "Recovery")):
+        response = client.get(f"/api/chatbot/conversations/{conversation_id}")
+        assert response.status_code == 200
+        assert response.json()["title"] == title
+        assert [message["content"] for message in response.json()["messages"]] == [f"About {title}"]
+
+
+def test_conversations_touched_mid_batch_are_kept(chat_db):
+    active = _conversation(chat_db, "Still talking")
+    idle = _conversation(chat_db, "Done")
+
+    def reply(conn):
+        # As a write from a database without the batch's lock would
+        conn.connection.cursor().execute(
+            "UPDATE conversations SET updated_at = ? WHERE id = ?",
+            ((datetime.now(timezone.utc) + timedelta(days=2)).isoformat(" "), active),
+        )
+
+    with _while_loading_messages(reply):
+        assert archive_batch(chat_db, _everything_idle()) == 1
+
+    chat_db.expire_all()
+    assert [c.id for c in chat_db.query(Conversation)] == [active]
+    assert chat_db.query(ChatMessage).filter(ChatMessage.conversation_id == active).count() == 1
+    assert [a.conversation_id for a in chat_db.query(ConversationArchive)] == [idle]
+
+
+def test_chat_writes_wait_for_the_batch(chat_db):
+    conversation_id = _conversation(chat_db, "Launch window")
+    errors = []
+
+    def post_message(conn):
+        writer = sqlite3.connect(engine.url.database, timeout=0.1)
+        try:
+            writer.execute(
+                "INSERT INTO chat_messages (conversation_id, content, is_user) VALUES (?, 'One more thing', 1)",
+                (conversation_id,),
+            )
+            writer.commit()
+        except sqlite3.OperationalError as e:
+            errors.append(str(e))
+        finally:
+            writer.close()
+
+    with _while_loading_messages(post_message):
+        assert archive_batch(chat_db, _everything_idle()) == 1
+
+    assert errors == ["database is locked"]
@@ -120,7 +120,7 @@ const ChatbotWidget = () => {
         conversation_id: currentConversation?.id
       })
 
-      const { message: aiMessage, conversation } = response.data
+      const { message: aiMessage, user_message: savedUserMessage, conversation } = response.data
 
       if (!currentConversation) {
         setCurrentConversation(conversation)
@@ -131,7 +131,7 @@ const ChatbotWidget = () => {
         const cleaned = prev.filter(m => m.id !== 'typing')
         return [
           ...cleaned.slice(0, -1),
-          { ...tempUserMessage, id: tempUserMessage.id },
+          savedUserMessage || tempUserMessage,
           aiMessage
         ]
       })